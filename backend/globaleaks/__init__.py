@@ -10,7 +10,7 @@ __copyright__ = '2011-2020 - Hermes Center for Transparency and Digital Human Ri
 __version__ = '3.11.59'
 __license__ = 'AGPL-3.0'
 
-DATABASE_VERSION = 51
+DATABASE_VERSION = 52
 FIRST_DATABASE_VERSION_SUPPORTED = 24
 
 # Add new languages as they are supported here! To do this retrieve the name of
@@ -97,6 +97,8 @@ class Alarm(object):
 
         self.measured_freespace = 0
         self.measured_totalspace = 0
+        self.measured_tmp_uploads = 0
+        self.measured_tmp_uploads_size = 0
 
         self.alarm_levels = {
             'disk_space': 0,
@@ -159,6 +161,8 @@ class Alarm(object):
             'alarm_levels': self.alarm_levels,
             'measured_freespace': self.measured_freespace,
             'measured_totalspace': self.measured_totalspace,
+            'measured_tmp_uploads': self.measured_tmp_uploads,
+            'measured_tmp_uploads_size': self.measured_tmp_uploads_size,
             'event_matrix': self.event_matrix
         }
 
@@ -177,6 +181,8 @@ class Alarm(object):
         https://github.com/globaleaks/GlobaLeaks/issues/872
         """
         self.measured_freespace, self.measured_totalspace = get_disk_space(self.state.settings.working_path)
+        self.measured_tmp_uploads = len(self.state.TempUploadFiles)
+        self.measured_tmp_uploads_size = self.state.TempUploadFiles.get_size()
 
         disk_space = 0
         disk_message = ""
@@ -194,6 +200,9 @@ class Alarm(object):
                 else:  # == 1
                     disk_message = "[WARNING]: Disk anomaly: %s" % info_msg
 
+                disk_message += " (pending uploads: %d files, %d bytes)" % (self.measured_tmp_uploads,
+                                                                             self.measured_tmp_uploads_size)
+
                 accept_submissions = c['accept_submissions']
                 break
 
@@ -1,25 +1,51 @@
 # -*- coding: utf-8
 #   backend
 #   *******
+import json
 import sys
+import time
 import traceback
 
+from urllib.parse import parse_qs
+
 from twisted.application import service
 from twisted.internet import reactor, defer
 from twisted.python.log import ILogObserver
-from twisted.web import server
+from twisted.web import http, server
 
 from globaleaks.db import create_db, init_db, update_db, \
-    sync_refresh_memory_variables, sync_clean_untracked_files, sync_initialize_snimap
+    sync_refresh_memory_variables, sync_get_untracked_files, \
+    sync_mark_untracked_files_for_secure_deletion, sync_initialize_snimap
+from globaleaks.rest import errors
 from globaleaks.rest.api import APIResourceWrapper
 from globaleaks.settings import Settings
 from globaleaks.state import State
 from globaleaks.utils.log import log, openLogFile, logFormatter, LogObserver
+from globaleaks.utils.multipart import parse_boundary
 from globaleaks.utils.process import disable_swap, set_proc_title
 from globaleaks.utils.sock import listen_tcp_on_sock, listen_tls_on_sock, reserve_port_for_ip
 from globaleaks.utils.utility import fix_file_permissions, drop_privileges
 
 
+class StartupTimer(object):
+    """
+    Keeps track of the time spent in each phase of the startup
+    """
+    def __init__(self):
+        self.start = self.last = time.time()
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.time()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        log.info('Startup completed in %.3fs (%s)',
+                 self.last - self.start,
+                 ', '.join('%s: %.3fs' % x for x in self.phases))
+
+
 def fail_startup(excep):
     log.err("ERROR: Cannot start GlobaLeaks. Please manually examine the exception.")
     log.err("EXCEPTION: %s", excep)
@@ -31,13 +57,93 @@ def fail_startup(excep):
 class Request(server.Request):
     current_user = None
     log_ip_and_ua = False
+    upload = None
+    rejected = False
+
+    def gotLength(self, length):
+        server.Request.gotLength(self, length)
+
+        boundary = parse_boundary(self.requestHeaders.getRawHeaders(b'content-type', [b''])[0])
+
+        # The request line is still held by the channel while receiving the body
+        command = getattr(self.channel, '_command', None)
+        uri = getattr(self.channel, '_path', None)
+        if boundary is None or command != b'POST' or uri is None:
+            return
+
+        self.path, _, query = uri.partition(b'?')
+        self.args = parse_qs(query, 1)
+
+        try:
+            self.upload = self.channel.site.resource.prepare_upload(self, boundary)
+        except errors.GLException as excep:
+            self.reject(excep)
+
+    def reject(self, error):
+        """
+        Answer with the error and close the connection without
+        receiving the rest of the body of the request
+        """
+        self.rejected = True
+
+        if self.upload is not None:
+            self.upload.abort()
+            self.upload = None
+
+        body = json.dumps({
+            'error_message': error.reason,
+            'error_code': error.error_code,
+            'arguments': getattr(error, 'arguments', [])
+        }).encode()
+
+        self.setHeader(b'content-type', b'application/json')
+        self.setHeader(b'content-length', b'%d' % len(body))
+        self.setHeader(b'connection', b'close')
+
+        # Do not invite the client to send the body
+        self.requestHeaders.removeHeader(b'expect')
+
+        response = [b'HTTP/1.1 %d %s' % (error.status_code, http.RESPONSES.get(error.status_code, b''))]
+        for name, values in self.responseHeaders.getAllRawHeaders():
+            response.extend(name + b': ' + value for value in values)
+
+        self.channel.transport.write(b'\r\n'.join(response) + b'\r\n\r\n' + body)
+        self.channel.loseConnection()
+
+    def handleContentChunk(self, data):
+        if self.rejected:
+            return
+
+        if self.upload is None:
+            server.Request.handleContentChunk(self, data)
+            return
+
+        self.upload.feed(data)
+        if self.upload.error is not None:
+            self.reject(self.upload.error)
+
+    def process(self):
+        if self.rejected:
+            return
+
+        if self.upload is not None:
+            self.upload.conclude()
+            self.args.update(self.upload.fields)
+
+        server.Request.process(self)
+
+    def connectionLost(self, reason):
+        if self.upload is not None:
+            self.upload.abort()
+
+        server.Request.connectionLost(self, reason)
 
 
 class Site(server.Site):
     requestFactory = Request
 
     def _openLogFile(self, path):
-        return openLogFile(path, Settings.log_file_size, Settings.num_log_files)
+        return openLogFile(path, Settings.log_file_size, Settings.num_log_files, Settings.log_buffer_policy)
 
 
 class Service(service.Service):
@@ -141,6 +247,8 @@ class Service(service.Service):
         return defer.DeferredList(deferred_list)
 
     def _deferred_start(self):
+        timer = StartupTimer()
+
         ret = update_db()
 
         if ret == -1:
@@ -151,9 +259,22 @@ class Service(service.Service):
             create_db()
             init_db()
 
-        sync_clean_untracked_files()
+        timer.mark('database')
+
+        # The untracked files are enqueued and securely deleted in
+        # background by the SecureFileDeletion job
+        untracked_files = sync_get_untracked_files()
+        if untracked_files:
+            log.info('Enqueuing %d untracked files for secure deletion', len(untracked_files))
+            sync_mark_untracked_files_for_secure_deletion(untracked_files)
+
+        timer.mark('untracked files scan')
+
         sync_refresh_memory_variables()
+        timer.mark('tenant cache')
+
         sync_initialize_snimap()
+        timer.mark('tls')
 
         self.state.orm_tp.start()
 
@@ -168,7 +289,12 @@ class Service(service.Service):
                                contextFactory=self.state.snimap,
                                factory=self.api_factory)
 
+        timer.mark('listeners')
+
         self.start_jobs()
+        timer.mark('jobs')
+
+        timer.report()
 
         self.print_listening_interfaces()
 
@@ -202,7 +328,7 @@ try:
     application = service.Application('GLBackend')
 
     if not Settings.nodaemon:
-        logfile = openLogFile(Settings.logfile, Settings.log_file_size, Settings.num_log_files)
+        logfile = openLogFile(Settings.logfile, Settings.log_file_size, Settings.num_log_files, Settings.log_buffer_policy)
         application.setComponent(ILogObserver, LogObserver(logfile).emit)
 
     Service().setServiceParent(application)
@@ -10,6 +10,7 @@ from sqlalchemy import exc as sa_exc
 
 from globaleaks import models, DATABASE_VERSION
 from globaleaks.db.appdata import db_load_default_questionnaires, db_load_default_fields
+from globaleaks.handlers.file import db_mark_files_for_secure_deletion
 from globaleaks.models import Config
 from globaleaks.models.config import ConfigFactory
 from globaleaks.models.config_desc import ConfigFilters
@@ -17,8 +18,8 @@ from globaleaks.orm import transact, transact_sync, get_session, make_db_uri
 from globaleaks.sessions import Session
 from globaleaks.settings import Settings
 from globaleaks.state import State, TenantState
-from globaleaks.utils import fs
 from globaleaks.utils.crypto import GCE
+from globaleaks.utils.ip import compile_ip_filter
 from globaleaks.utils.log import log
 from globaleaks.utils.objectdict import ObjectDict
 
@@ -118,30 +119,34 @@ def update_db():
 
 def db_get_tracked_files(session):
     """
-    returns a list the basenames of files tracked by InternalFile and ReceiverFile.
+    returns the set of the basenames of files tracked by InternalFile, ReceiverFile and WhistleblowerFile.
     """
-    ifiles = [x[0] for x in session.query(models.InternalFile.filename)]
-    rfiles = [x[0] for x in session.query(models.ReceiverFile.filename)]
-    wbfiles = [x[0] for x in session.query(models.WhistleblowerFile.filename)]
+    tracked_files = set()
 
-    return [files for files in list(set(ifiles + rfiles + wbfiles))]
+    for model in [models.InternalFile, models.ReceiverFile, models.WhistleblowerFile]:
+        tracked_files.update(x[0] for x in session.query(model.filename))
+
+    return tracked_files
 
 
 @transact_sync
-def sync_clean_untracked_files(session):
+def sync_get_untracked_files(session):
     """
-    removes files in Settings.attachments_path that are not
-    tracked by InternalFile/ReceiverFile.
+    returns the list of the files in Settings.attachments_path that are not
+    tracked by InternalFile/ReceiverFile/WhistleblowerFile.
     """
     tracked_files = db_get_tracked_files(session)
-    for filesystem_file in os.listdir(Settings.attachments_path):
-        if filesystem_file not in tracked_files:
-            file_to_remove = os.path.join(Settings.attachments_path, filesystem_file)
-            try:
-                log.debug('Removing untracked file: %s', file_to_remove)
-                fs.overwrite_and_remove(file_to_remove)
-            except OSError:
-                log.err('Failed to remove untracked file', file_to_remove)
+
+    with os.scandir(Settings.attachments_path) as it:
+        return [entry.path for entry in it if entry.name not in tracked_files]
+
+
+@transact_sync
+def sync_mark_untracked_files_for_secure_deletion(session, paths):
+    """
+    enqueues for secure deletion the files returned by sync_get_untracked_files
+    """
+    db_mark_files_for_secure_deletion(session, paths)
 
 
 @transact_sync
@@ -151,6 +156,14 @@ def sync_initialize_snimap(session):
             State.snimap.load(cfg['tid'], cfg)
 
 
+ip_filter_roles = [('admin', 'ip_filter_admin_enable', 'ip_filter_admin'),
+                   ('custodian', 'ip_filter_custodian_enable', 'ip_filter_custodian'),
+                   ('receiver', 'ip_filter_receiver_enable', 'ip_filter_receiver'),
+                   ('whistleblower', 'ip_filter_whistleblower_enable', 'ip_filter_whistleblower')]
+
+https_roles = ['admin', 'custodian', 'receiver', 'whistleblower']
+
+
 def db_set_cache_exception_delivery_list(session, tenant_cache):
     """
     Constructs and sets a list of (email_addr, public_key) pairs that will receive
@@ -168,12 +181,19 @@ def db_set_cache_exception_delivery_list(session, tenant_cache):
     tenant_cache.notification.exception_delivery_list = [x for x in lst if x[0] != '']
 
 
-def db_refresh_tenant_cache(session, tid_list):
+def db_load_tenant_config(session, tid_list, var_names=None):
     """
-    This routine loads in memory few variables of node and notification tables
-    that are subject to high usage.
+    Load in the tenant cache the node and notification variables
+    of the specified tenants, optionally limited to a set of variables
     """
-    for cfg in session.query(Config).filter(Config.tid.in_(tid_list)):
+    if not tid_list or (var_names is not None and not var_names):
+        return
+
+    query = session.query(Config).filter(Config.tid.in_(tid_list))
+    if var_names is not None:
+        query = query.filter(Config.var_name.in_(var_names))
+
+    for cfg in query:
         tenant_cache = State.tenant_cache[cfg.tid]
 
         if cfg.var_name in ConfigFilters['node']:
@@ -182,33 +202,174 @@ def db_refresh_tenant_cache(session, tid_list):
             tenant_cache.setdefault('notification', ObjectDict())
             tenant_cache['notification'][cfg.var_name] = cfg.value
 
+
+def db_load_tenant_languages(session, tid_list):
+    for tid in tid_list:
+        State.tenant_cache[tid]['languages_enabled'] = []
+
     for tid, lang in models.EnabledLanguage.tid_list(session, tid_list):
-        State.tenant_cache[tid].setdefault('languages_enabled', []).append(lang)
+        State.tenant_cache[tid]['languages_enabled'].append(lang)
+
+
+def refresh_ip_filter(tid_list):
+    root_cache = State.tenant_cache[1]
+    compiled = {}
 
     for tid in tid_list:
-        State.tenant_cache[tid]['ip_filter'] = {}
-        State.tenant_cache[tid]['https_allowed'] = {}
-        State.tenant_cache[tid]['redirects'] = {}
+        tenant_cache = State.tenant_cache[tid]
+        tenant_cache['ip_filter'] = {}
+
+        for role, enable, ip_filter in ip_filter_roles:
+            if tenant_cache.get(enable, False) and root_cache[ip_filter]:
+                if ip_filter not in compiled:
+                    compiled[ip_filter] = compile_ip_filter(root_cache[ip_filter])
 
-        for x in [('admin', 'ip_filter_admin_enable', 'ip_filter_admin'),
-                  ('custodian', 'ip_filter_custodian_enable', 'ip_filter_custodian'),
-                  ('receiver', 'ip_filter_receiver_enable', 'ip_filter_receiver'),
-                  ('whistleblower', 'ip_filter_whistleblower_enable', 'ip_filter_whistleblower')]:
-            if State.tenant_cache[tid].get(x[1], False) and State.tenant_cache[1][x[2]]:
-                State.tenant_cache[tid]['ip_filter'][x[0]] = State.tenant_cache[1][x[2]]
+                tenant_cache['ip_filter'][role] = compiled[ip_filter]
 
-        for x in ['admin', 'custodian', 'receiver', 'whistleblower']:
-            State.tenant_cache[tid]['https_allowed'][x] = State.tenant_cache[tid].get('https_' + x, True)
 
+def refresh_https_allowed(tid_list):
+    for tid in tid_list:
+        tenant_cache = State.tenant_cache[tid]
+        tenant_cache['https_allowed'] = {x: tenant_cache.get('https_' + x, True) for x in https_roles}
+
+
+def refresh_inherited_settings(tid_list):
+    for tid in tid_list:
         if State.tenant_cache[tid].mode == 'whistleblowing.it':
             State.tenant_cache[tid]['https_preload'] = State.tenant_cache[1]['https_preload']
             State.tenant_cache[tid]['frame_ancestors'] = State.tenant_cache[1]['frame_ancestors']
 
+
+def refresh_hostnames(tenant_map, tid_list):
+    """
+    Update the names through which the tenants are reachable and
+    their entries in the hostname to tenant map
+    """
+    rootdomain = State.tenant_cache[1].rootdomain
+    root_onionservice = State.tenant_cache[1].onionservice
+
+    for tid in tid_list:
+        if tid not in tenant_map:
+            continue
+
+        tenant = tenant_map[tid]
+        tenant_cache = State.tenant_cache[tid]
+
+        for h in tenant_cache.get('hostnames', []) + tenant_cache.get('onionnames', []):
+            if State.tenant_hostname_id_map.get(h) == tid:
+                del State.tenant_hostname_id_map[h]
+
+        hostnames = []
+        onionnames = []
+
+        if tenant_cache.hostname != '':
+            hostnames.append(tenant_cache.hostname.encode())
+
+        if tenant_cache.onionservice != '':
+            onionnames.append(tenant_cache.onionservice.encode())
+
+        if tenant.subdomain != '':
+            if rootdomain != '':
+                onionnames.append('{}.{}'.format(tenant.subdomain, rootdomain).encode())
+            if root_onionservice != '':
+                onionnames.append('{}.{}'.format(tenant.subdomain, root_onionservice).encode())
+
+        tenant_cache.hostnames = hostnames
+        tenant_cache.onionnames = onionnames
+
+        State.tenant_hostname_id_map.update({h: tid for h in hostnames + onionnames})
+
+
+def db_refresh_root_settings(session):
+    db_set_cache_exception_delivery_list(session, State.tenant_cache[1])
+
+    if State.tenant_cache[1].admin_api_token_digest:
+        State.api_token_session = Session(1, 0, 1, 'admin', False, False, '')
+
+    log.setloglevel(State.tenant_cache[1].log_level)
+
+
+def db_refresh_tenant_cache(session, tid_list):
+    """
+    This routine loads in memory few variables of node and notification tables
+    that are subject to high usage.
+    """
+    db_load_tenant_config(session, tid_list)
+    db_load_tenant_languages(session, tid_list)
+
+    refresh_ip_filter(tid_list)
+    refresh_https_allowed(tid_list)
+    refresh_inherited_settings(tid_list)
+
+    for tid in tid_list:
+        State.tenant_cache[tid]['redirects'] = {}
+
     for redirect in session.query(models.Redirect).filter(models.Redirect.tid.in_(tid_list)):
-        State.tenant_cache[tid]['redirects'][redirect.path1] = redirect.path2
+        State.tenant_cache[redirect.tid]['redirects'][redirect.path1] = redirect.path2
+
+
+def db_patch_tenant_cache(session, tenant_map, tid_list, changed):
+    """
+    Update in the tenant cache only the variables reported as changed
+    recomputing only the derived settings that depend on them
+    """
+    changed = set(changed)
+    all_tids = list(tenant_map.keys())
+
+    db_load_tenant_config(session, tid_list, changed)
 
+    if 'languages_enabled' in changed:
+        db_load_tenant_languages(session, tid_list)
+
+    ip_filter_tids = set()
+    https_tids = set()
+    inherited_tids = set()
+    hostname_tids = set()
+
+    for tid in tid_list:
+        if changed & {x[1] for x in ip_filter_roles}:
+            ip_filter_tids.add(tid)
+
+        if changed & {'https_' + x for x in https_roles}:
+            https_tids.add(tid)
+
+        if changed & {'hostname', 'onionservice'}:
+            hostname_tids.add(tid)
+
+        if 'mode' in changed:
+            inherited_tids.add(tid)
+
+    if 1 in tid_list:
+        # The root tenant defines settings that are shared with the other tenants
+        if changed & {x[2] for x in ip_filter_roles}:
+            ip_filter_tids.update(all_tids)
+
+        if changed & {'https_preload', 'frame_ancestors'}:
+            inherited_tids.update(all_tids)
+
+        if changed & {'rootdomain', 'onionservice'}:
+            hostname_tids.update(all_tids)
+
+        if changed & {'enable_admin_exception_notification',
+                      'enable_developers_exception_notification',
+                      'admin_api_token_digest',
+                      'log_level'}:
+            db_refresh_root_settings(session)
+
+    refresh_ip_filter(ip_filter_tids)
+    refresh_https_allowed(https_tids)
+    refresh_inherited_settings(inherited_tids)
+    refresh_hostnames(tenant_map, hostname_tids)
+
+
+def db_refresh_memory_variables(session, to_refresh=None, changed=None):
+    """
+    Refresh the tenant cache
 
-def db_refresh_memory_variables(session, to_refresh=None):
+    :param session: the session on which perform queries.
+    :param to_refresh: the list of the tenants to be refreshed; None to refresh all the tenants
+    :param changed: the set of the config variables changed; None to reload all the variables
+    """
     tenant_map = {tenant.id: tenant for tenant in session.query(models.Tenant).filter(models.Tenant.active == True)}
 
     existing_tids = set(tenant_map.keys())
@@ -222,6 +383,10 @@ def db_refresh_memory_variables(session, to_refresh=None):
             del State.tenant_state[tid]
 
         if tid in State.tenant_cache:
+            for h in State.tenant_cache[tid].get('hostnames', []) + State.tenant_cache[tid].get('onionnames', []):
+                if State.tenant_hostname_id_map.get(h) == tid:
+                    del State.tenant_hostname_id_map[h]
+
             del State.tenant_cache[tid]
 
     for tid in to_add:
@@ -229,57 +394,29 @@ def db_refresh_memory_variables(session, to_refresh=None):
         State.tenant_cache[tid] = ObjectDict()
 
     if to_refresh is None:
-        to_refresh = tenant_map.keys()
+        to_refresh = list(tenant_map.keys())
     else:
         to_refresh = [tid for tid in to_refresh if tid in tenant_map]
 
+    if changed is not None and not to_add and not to_remove:
+        if changed and to_refresh:
+            db_patch_tenant_cache(session, tenant_map, to_refresh, changed)
+
+        return
+
     if to_refresh:
         db_refresh_tenant_cache(session, to_refresh)
 
     if 1 in to_refresh:
-        to_refresh = State.tenant_cache.keys()
-        db_set_cache_exception_delivery_list(session, State.tenant_cache[1])
+        to_refresh = list(State.tenant_cache.keys())
+        db_refresh_root_settings(session)
 
-        if State.tenant_cache[1].admin_api_token_digest:
-            State.api_token_session = Session(1, 0, 1, 'admin', False, False, '')
-
-        log.setloglevel(State.tenant_cache[1].log_level)
-
-    rootdomain = State.tenant_cache[1].rootdomain
-    root_onionservice = State.tenant_cache[1].onionservice
-
-    for tid in to_refresh:
-        if tid not in tenant_map:
-            continue
-
-        tenant = tenant_map[tid]
-        if not tenant.active and tid != 1:
-            continue
-
-        hostnames = []
-        onionnames = []
-
-        if State.tenant_cache[tid].hostname != '':
-            hostnames.append(State.tenant_cache[tid].hostname.encode())
-
-        if State.tenant_cache[tid].onionservice != '':
-            onionnames.append(State.tenant_cache[tid].onionservice.encode())
-
-        if tenant.subdomain != '':
-            if rootdomain != '':
-                onionnames.append('{}.{}'.format(tenant.subdomain, rootdomain).encode())
-            if root_onionservice != '':
-                onionnames.append('{}.{}'.format(tenant.subdomain, root_onionservice).encode())
-
-        State.tenant_cache[tid].hostnames = hostnames
-        State.tenant_cache[tid].onionnames = onionnames
-
-        State.tenant_hostname_id_map.update({h: tid for h in hostnames + onionnames})
+    refresh_hostnames(tenant_map, to_refresh)
 
 
 @transact
-def refresh_memory_variables(session, to_refresh=None):
-    return db_refresh_memory_variables(session, to_refresh)
+def refresh_memory_variables(session, to_refresh=None, changed=None):
+    return db_refresh_memory_variables(session, to_refresh, changed)
 
 
 @transact_sync
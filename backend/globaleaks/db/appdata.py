@@ -2,17 +2,27 @@
 # datainit.py: database initialization
 #   ******************
 import os
-from sqlalchemy import not_
+from collections import defaultdict
+from functools import lru_cache
 
 from globaleaks import models
-from globaleaks.handlers.admin.field import db_create_field, db_update_fieldattrs
-from globaleaks.handlers.admin.questionnaire import db_create_questionnaire
+from globaleaks.handlers.admin.field import dump_field_rows
+from globaleaks.handlers.admin.questionnaire import db_insert_questionnaire_rows, dump_questionnaire_rows
 from globaleaks.settings import Settings
-from globaleaks.utils.utility import read_json_file
+from globaleaks.utils.utility import read_json_file, uuid4
+
+
+@lru_cache(maxsize=1)
+def read_appdata(path, mtime):
+    return read_json_file(path)
 
 
 def load_appdata():
-    return read_json_file(Settings.appdata_file)
+    """
+    Return the parsed appdata; the file is parsed again only when modified
+    and the returned dictionary is shared and thus must not be modified.
+    """
+    return read_appdata(Settings.appdata_file, os.path.getmtime(Settings.appdata_file))
 
 
 def db_load_default_questionnaires(session):
@@ -30,8 +40,11 @@ def db_load_default_questionnaires(session):
     session.query(models.Step).filter(models.Step.questionnaire_id.in_(
         qids)).delete(synchronize_session='fetch')
 
+    rows = defaultdict(list)
     for questionnaire in questionnaires:
-        db_create_questionnaire(session, 1, questionnaire, None)
+        dump_questionnaire_rows(rows, 1, questionnaire)
+
+    db_insert_questionnaire_rows(session, rows)
 
 
 def db_load_default_fields(session):
@@ -49,8 +62,11 @@ def db_load_default_fields(session):
     session.query(models.FieldAttr).filter(models.FieldAttr.field_id.in_(qids)).delete(synchronize_session='fetch')
     session.query(models.FieldOption).filter(models.FieldOption.field_id.in_(qids)).delete(synchronize_session='fetch')
 
+    rows = defaultdict(list)
     for question in questions:
-        db_create_field(session, 1, question, None)
+        dump_field_rows(rows, 1, question)
+
+    db_insert_questionnaire_rows(session, rows)
 
 
 def db_fix_fields_attrs(session):
@@ -58,33 +74,55 @@ def db_fix_fields_attrs(session):
     Ensures that the current store and the field_attrs.json file correspond.
     The content of the field_attrs dict is used to add and remove all of the
     excepted forms of field_attrs for FieldAttrs in the db.
+
+    The differences are computed in memory from a single scan of the fields
+    and of their attributes so that only the needed deletes and inserts are
+    performed; the attributes stored with a type different from the expected
+    one are replaced with their default.
     """
     field_attrs = read_json_file(Settings.field_attrs_file)
 
     std_lst = ['inputbox', 'textarea', 'checkbox', 'tos', 'date']
 
-    for field_type, attrs_dict in field_attrs.items():
-        attrs_to_keep_for_type = attrs_dict.keys()
-        if field_type in std_lst:
-            # Ensure that the standard field attrs do not have extra attr rows
-            _filter = not_(models.FieldAttr.name.in_(attrs_to_keep_for_type)), \
-                      models.FieldAttr.field_id == models.Field.id, \
-                      models.Field.type == field_type, \
-                      models.Field.template_id == None
+    fields = {}
+    scoped = set()
+    for field_id, field_type, template_id in session.query(models.Field.id, models.Field.type, models.Field.template_id):
+        # The extra attrs are removed only from the standard fields and
+        # from the fields of non-standard field_groups like whistleblower_identity
+        if (template_id is None and field_type in std_lst) or template_id in field_attrs:
+            scoped.add(field_id)
+
+        field_type = field_type if template_id is None else template_id
+        if field_attrs.get(field_type):
+            fields[field_id] = field_attrs[field_type]
+
+    present = set()
+    to_remove = []
+    for attr_id, field_id, name, attr_type in session.query(models.FieldAttr.id,
+                                                            models.FieldAttr.field_id,
+                                                            models.FieldAttr.name,
+                                                            models.FieldAttr.type):
+        if field_id not in fields:
+            continue
+
+        attr = fields[field_id].get(name)
+        if attr is None:
+            if field_id in scoped:
+                to_remove.append(attr_id)
+        elif attr['type'] != attr_type:
+            to_remove.append(attr_id)
         else:
-            # Look for dropped attrs in non-standard field_groups like whistleblower_identity
-            _filter = not_(models.FieldAttr.name.in_(attrs_to_keep_for_type)), \
-                      models.FieldAttr.field_id == models.Field.id, \
-                      models.Field.template_id == field_type
-
-        for res in session.query(models.FieldAttr).filter(*_filter):
-            session.delete(res)
-
-    # Add keys to the db that have been added to field_attrs
-    for field in session.query(models.Field):
-        type = field.type if field.template_id is None else field.template_id
-        attrs = field_attrs.get(type, {})
-        db_update_fieldattrs(session, field.id, attrs, None)
+            present.add((field_id, name))
+
+    for i in range(0, len(to_remove), 500):
+        session.query(models.FieldAttr).filter(models.FieldAttr.id.in_(to_remove[i:i + 500])).delete(synchronize_session=False)
+
+    to_add = [{'id': uuid4(), 'field_id': field_id, 'name': name, 'type': attr['type'], 'value': attr['value']}
+              for field_id, attrs in fields.items()
+              for name, attr in attrs.items() if (field_id, name) not in present]
+
+    if to_add:
+        session.bulk_insert_mappings(models.FieldAttr, to_add)
 
 
 def db_update_defaults(session):
@@ -0,0 +1,64 @@
+# -*- coding: UTF-8
+import base64
+
+from globaleaks.db.migrations.update import MigrationBase
+from globaleaks.handlers.admin.modelimgs import get_img_hash
+from globaleaks.models import Model
+from globaleaks.models.properties import *
+from globaleaks.utils.utility import datetime_now
+
+
+class ContextImg_v_51(Model):
+    __tablename__ = 'contextimg'
+    id = Column(UnicodeText(36), primary_key=True, default=uuid4)
+    data = Column(UnicodeText, nullable=False)
+
+
+class File_v_51(Model):
+    __tablename__ = 'file'
+    tid = Column(Integer, primary_key=True, default=1)
+    id = Column(UnicodeText(36), primary_key=True, default=uuid4)
+    name = Column(UnicodeText, default='', nullable=False)
+    data = Column(UnicodeText, nullable=False)
+
+
+class Mail_v_51(Model):
+    __tablename__ = 'mail'
+    id = Column(UnicodeText(36), primary_key=True, default=uuid4)
+    tid = Column(Integer, default=1, nullable=False)
+    creation_date = Column(DateTime, default=datetime_now, nullable=False)
+    address = Column(UnicodeText, nullable=False)
+    subject = Column(UnicodeText, nullable=False)
+    body = Column(UnicodeText, nullable=False)
+    processing_attempts = Column(Integer, default=0, nullable=False)
+
+
+class UserImg_v_51(Model):
+    __tablename__ = 'userimg'
+    id = Column(UnicodeText(36), primary_key=True, default=uuid4)
+    data = Column(UnicodeText, nullable=False)
+
+
+class MigrationScript(MigrationBase):
+    def migrate_hashed_model(self, model_name):
+        old_objs = self.session_old.query(self.model_from[model_name])
+        for old_obj in old_objs:
+            new_obj = self.model_to[model_name]()
+            for key in [c.key for c in old_obj.__table__.columns]:
+                if key == 'data':
+                    new_obj.data = base64.b64decode(old_obj.data)
+                else:
+                    setattr(new_obj, key, getattr(old_obj, key))
+
+            new_obj.hash = get_img_hash(new_obj.data)
+
+            self.session_new.add(new_obj)
+
+    def migrate_ContextImg(self):
+        self.migrate_hashed_model('ContextImg')
+
+    def migrate_File(self):
+        self.migrate_hashed_model('File')
+
+    def migrate_UserImg(self):
+        self.migrate_hashed_model('UserImg')
@@ -24,6 +24,10 @@ def login_check(uri):
     return uri == b'/authentication'
 
 
+def token_check(uri):
+    return uri == b'/token'
+
+
 def submission_check(uri):
     return uri.startswith(b'/submission') and (len(uri) == 11 or len(uri) == 54)
 
@@ -41,6 +45,12 @@ events_monitored = [
         'method': 'POST',
         'status_check': success_status_check
     },
+    {
+        'name': 'created_tokens',
+        'handler_check': token_check,
+        'method': 'POST',
+        'status_check': success_status_check
+    },
     {
         'name': 'started_submissions',
         'handler_check': submission_check,
@@ -7,7 +7,7 @@
 from sqlalchemy.sql.expression import not_
 
 from globaleaks import models
-from globaleaks.handlers.admin.modelimgs import db_get_model_img
+from globaleaks.handlers.admin.modelimgs import db_get_model_img_url
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.handlers.operation import OperationHandler
 from globaleaks.models import fill_localized_keys, get_localized_values
@@ -27,7 +27,7 @@ def admin_serialize_context(session, context, language):
     receivers = [r[0] for r in session.query(models.ReceiverContext.receiver_id)
                                       .filter(models.ReceiverContext.context_id == context.id)
                                       .order_by(models.ReceiverContext.presentation_order)]
-    picture = db_get_model_img(session, 'contexts', context.id)
+    picture = db_get_model_img_url(session, 'contexts', context.id)
 
     ret_dict = {
         'id': context.id,
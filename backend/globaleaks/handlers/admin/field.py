@@ -13,7 +13,7 @@ from globaleaks.models import fill_localized_keys
 from globaleaks.orm import transact
 from globaleaks.rest import errors, requests
 from globaleaks.settings import Settings
-from globaleaks.utils.utility import read_json_file
+from globaleaks.utils.utility import read_json_file, uuid4
 
 
 def db_create_trigger(session, tid, option_id, type, object_id, sufficient):
@@ -172,6 +172,50 @@ def db_create_field(session, tid, field_dict, language):
     return field
 
 
+def row_from_dict(model, values):
+    """
+    Return the column values of an object of the specified model initialized with the given dict
+    """
+    obj = model(values)
+
+    return {c.key: getattr(obj, c.key) for c in model.__table__.columns if getattr(obj, c.key) is not None}
+
+
+def dump_field_rows(rows, tid, field_dict):
+    """
+    Append to rows the rows of the field and of its attributes, options, triggers and children
+
+    Differently from db_create_field no validation is performed and the references to the
+    field templates are not resolved; this is intended for the load of trusted data.
+    """
+    field_dict['tid'] = tid
+    field_dict['id'] = field_dict.get('id') or uuid4()
+
+    rows[models.Field].append(row_from_dict(models.Field, field_dict))
+
+    for attr_name, attr_dict in field_dict.get('attrs', {}).items():
+        rows[models.FieldAttr].append(row_from_dict(models.FieldAttr, dict(attr_dict,
+                                                                           id=uuid4(),
+                                                                           name=attr_name,
+                                                                           field_id=field_dict['id'])))
+
+    for idx, option_dict in enumerate(field_dict.get('options', [])):
+        option_dict['id'] = option_dict.get('id') or uuid4()
+        option_dict['field_id'] = field_dict['id']
+        option_dict['presentation_order'] = idx
+        rows[models.FieldOption].append(row_from_dict(models.FieldOption, option_dict))
+
+    for trigger in field_dict.get('triggered_by_options', []):
+        rows[models.FieldOptionTriggerField].append({'option_id': trigger['option'],
+                                                     'object_id': field_dict['id'],
+                                                     'sufficient': trigger.get('sufficient', True)})
+
+    if field_dict.get('instance') != 'reference':
+        for c in field_dict.get('children', []):
+            c['fieldgroup_id'] = field_dict['id']
+            dump_field_rows(rows, tid, c)
+
+
 @transact
 def create_field(session, tid, field_dict, language):
     """
@@ -4,12 +4,12 @@
 #  *****
 #
 # API handling db files upload/download/delete
-import base64
 import os
 
 from twisted.internet.defer import inlineCallbacks, returnValue
 
 from globaleaks import models
+from globaleaks.handlers.admin.modelimgs import get_img_hash
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.handlers.user import can_edit_general_settings_or_raise
 from globaleaks.orm import transact
@@ -25,8 +25,7 @@ def get_files(session, tid):
     for sf in session.query(models.File).filter(models.File.name != "", models.File.tid == tid):
         ret.append({
             'id': sf.id,
-            'name': sf.name,
-            'data': sf.data,
+            'name': sf.name
         })
 
     return ret
@@ -47,6 +46,7 @@ def db_add_file(session, tid, id, name, data):
 
     file_obj.name = name
     file_obj.data = data
+    file_obj.hash = get_img_hash(data)
 
 
 @transact
@@ -57,7 +57,7 @@ def add_file(session, tid, id, name, data):
 def db_get_file(session, tid, id):
     file_obj = session.query(models.File).filter(models.File.tid == tid, models.File.id == id).one_or_none()
 
-    return file_obj.data if file_obj is not None else ''
+    return file_obj.data if file_obj is not None else b''
 
 
 @transact
@@ -85,13 +85,12 @@ class FileInstance(BaseHandler):
             with sf.open('r') as encrypted_file:
                 data = encrypted_file.read()
 
-            data = base64.b64encode(data).decode()
             d = yield add_file(self.request.tid, id, '', data)
         else:
             id = uuid4()
             path = os.path.join(self.state.settings.files_path, id)
             d = yield self.write_upload_plaintext_to_disk(path)
-            yield add_file(self.request.tid, id, self.uploaded_file['name'], '')
+            yield add_file(self.request.tid, id, self.uploaded_file['name'], b'')
 
         returnValue(d)
 
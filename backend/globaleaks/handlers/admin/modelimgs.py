@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 # API handling upload/delete of users/contexts picture
-import base64
-
 from globaleaks import models
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.orm import transact
+from globaleaks.utils.crypto import sha256
 
 model_map = {
     'users': models.UserImg,
@@ -12,15 +11,38 @@ model_map = {
 }
 
 
+def get_img_hash(data):
+    return sha256(data).decode()[:16] if data else ''
+
+
+def get_img_url(path, img_hash):
+    """
+    Return the content addressed url of an image or an empty string if there is no image
+
+    The hash is computed and stored when the image is written so that the
+    url is built without loading the image
+    """
+    if not img_hash:
+        return ''
+
+    return '%s?h=%s' % (path, img_hash)
+
+
 def db_get_model_img(session, obj_key, obj_id):
     model = model_map[obj_key]
     img = session.query(model).filter(model.id == obj_id).one_or_none()
     if img is None:
-        return ''
+        return b''
 
     return img.data
 
 
+def db_get_model_img_url(session, obj_key, obj_id):
+    model = model_map[obj_key]
+    img_hash = session.query(model.hash).filter(model.id == obj_id).scalar()
+    return get_img_url('s/img/%s/%s' % (obj_key, obj_id), img_hash)
+
+
 @transact
 def get_model_img(session, obj_key, obj_id):
     return db_get_model_img(session, obj_key, obj_id)
@@ -29,12 +51,14 @@ def get_model_img(session, obj_key, obj_id):
 @transact
 def add_model_img(session, tid, obj_key, obj_id, data):
     model = model_map[obj_key]
-    data = base64.b64encode(data).decode()
     img = session.query(model).filter(model.id == obj_id).one_or_none()
     if img is None:
-        session.add(model({'id': obj_id, 'data': data}))
-    else:
-        img.data = data
+        img = model({'id': obj_id})
+        session.add(img)
+
+    img.data = data
+
+    img.hash = get_img_hash(data)
 
 
 @transact
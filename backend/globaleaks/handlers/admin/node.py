@@ -64,6 +64,8 @@ def db_update_enabled_languages(session, tid, languages_enabled, default_languag
         session.query(models.User).filter(models.User.tid == tid, models.User.language.in_(to_remove)).update({'language': default_language}, synchronize_session='fetch')
         session.query(models.EnabledLanguage).filter(models.EnabledLanguage.tid == tid, models.EnabledLanguage.name.in_(to_remove)).delete(synchronize_session='fetch')
 
+    return bool(to_remove) or appdata is not None
+
 
 def db_update_node(session, tid, request, language):
     """
@@ -99,15 +101,16 @@ def db_update_node(session, tid, request, language):
         parse_csv_ip_ranges_to_ip_networks(request['ip_filter_whistleblower'])
 
     if 'languages_enabled' in request and 'default_language' in request:
-        db_update_enabled_languages(session,
-                                    tid,
-                                    request['languages_enabled'],
-                                    request['default_language'])
+        if db_update_enabled_languages(session,
+                                       tid,
+                                       request['languages_enabled'],
+                                       request['default_language']):
+            config.changed.add('languages_enabled')
 
     if language in models.EnabledLanguage.list(session, tid):
         ConfigL10NFactory(session, tid).update('node', request, language)
 
-    db_refresh_memory_variables(session, [tid])
+    db_refresh_memory_variables(session, [tid], config.changed)
 
     if tid == 1:
         log.setloglevel(config.get_val('log_level'))
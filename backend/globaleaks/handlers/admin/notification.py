@@ -46,7 +46,7 @@ def update_notification(session, tid, request, language):
     if request.pop('reset_templates'):
         config_l10n.reset('notification', load_appdata())
 
-    db_refresh_memory_variables(session, [tid])
+    db_refresh_memory_variables(session, [tid], config.changed)
 
     return admin_serialize_notification(session, tid, language)
 
@@ -56,8 +56,7 @@ class AdminOperationHandler(OperationHandler):
     def set_hostname(self, req_args, *args, **kwargs):
         yield check_hostname(self.request.tid, req_args['value'])
         yield tw(db_set_config_variable, self.request.tid, 'hostname', req_args['value'])
-        yield tw(db_refresh_memory_variables, [self.request.tid])
-        self.state.tenant_cache[self.request.tid].hostname = req_args['value']
+        yield tw(db_refresh_memory_variables, [self.request.tid], {'hostname'})
 
     def reset_user_password(self, req_args, *args, **kwargs):
         return generate_password_reset_token(self.state,
@@ -5,10 +5,13 @@
 # Implementation of the code executed on handler /admin/questionnaires
 #
 
+from collections import defaultdict
+
 from twisted.internet.defer import inlineCallbacks, returnValue
 
 from globaleaks import models, QUESTIONNAIRE_EXPORT_VERSION
-from globaleaks.handlers.admin.step import db_create_step
+from globaleaks.handlers.admin.field import row_from_dict
+from globaleaks.handlers.admin.step import db_create_step, dump_step_rows
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.handlers.public import serialize_questionnaire
 from globaleaks.models import fill_localized_keys
@@ -115,83 +118,104 @@ def update_questionnaire(session, tid, questionnaire_id, request, language):
     return serialize_questionnaire(session, tid, questionnaire, language)
 
 
-@transact
-def duplicate_questionnaire(session, tid, questionnaire_id, new_name):
+def dump_questionnaire_rows(rows, tid, questionnaire_dict):
     """
-    Duplicates a questionaire, assigning new IDs to all sub components
+    Append to rows the rows of the questionnaire and of its steps
     """
+    questionnaire_dict['tid'] = tid
+    questionnaire_dict['id'] = questionnaire_dict.get('id') or uuid4()
+
+    rows[models.Questionnaire].append(row_from_dict(models.Questionnaire, questionnaire_dict))
+
+    for step in questionnaire_dict.get('steps', []):
+        step['questionnaire_id'] = questionnaire_dict['id']
+        dump_step_rows(rows, tid, step)
+
+
+def db_insert_questionnaire_rows(session, rows):
+    """
+    Insert the rows collected for the questionnaires with a single bulk insert for each table
+    """
+    for model in [models.Questionnaire,
+                  models.Step,
+                  models.Field,
+                  models.FieldAttr,
+                  models.FieldOption,
+                  models.FieldOptionTriggerField,
+                  models.FieldOptionTriggerStep]:
+        if rows.get(model):
+            session.bulk_insert_mappings(model, rows[model])
+
+
+def db_duplicate_questionnaire(session, tid, questionnaire_id, new_name):
+    """
+    Duplicates a questionnaire copying the rows of its steps, fields, attributes,
+    options and triggers and assigning new IDs through a remap table
+    """
+    q = models.db_get(session, models.Questionnaire, models.Questionnaire.tid.in_(set([1, tid])), models.Questionnaire.id == questionnaire_id)
+
     id_map = {}
+    rows = defaultdict(list)
+
+    def clone(obj, **kwargs):
+        row = {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+        row.update(kwargs)
+        for key in ['id', 'questionnaire_id', 'step_id', 'fieldgroup_id', 'field_id', 'option_id', 'object_id']:
+            if row.get(key) in id_map:
+                row[key] = id_map[row[key]]
+
+        rows[type(obj)].append(row)
+
+    def remap(objs):
+        for obj in objs:
+            id_map[obj.id] = uuid4()
 
-    q = db_get_questionnaire(session, tid, questionnaire_id, None, serialize_templates=False)
-
-    # We need to change the primary key references and so this can be reimported
-    # as a new questionnaire
-    q['id'] = uuid4()
-    q['editable'] = True
-
-    # Each step has a UUID that needs to be replaced
-
-    def fix_field_pass_1(field):
-        new_child_id = uuid4()
-        id_map[field['id']] = new_child_id
-        field['id'] = new_child_id
-
-        # Tweak the fiel in order to make a raw copy
-        field['editable'] = True
-        field['instance'] = 'instance'
-        field['template_id'] = field['template_override_id'] = ''
-
-        # Rewrite the option ID if it exists
-        for option in field['options']:
-            option_id = option.get('id', None)
-            if option_id is not None:
-                new_option_id = uuid4()
-                id_map[option['id']] = new_option_id
-                option['id'] = new_option_id
-
-        # And now we need to keep going down the latter
-        for attr in field['attrs'].values():
-            attr['id'] = uuid4()
-
-        # Recursion!
-        for child in field['children']:
-            child['field_id'] = new_child_id
-            fix_field_pass_1(child)
-
-    def fix_field_pass_2(field):
-        # Fix triggers references
-        for trigger in field.get('triggered_by_options', []):
-            trigger['field'] = id_map[trigger['field']]
-            trigger['option'] = id_map[trigger['option']]
-
-        # Recursion!
-        for child in field['children']:
-            fix_field_pass_2(child)
-
-    # Step1: replacement of IDs
-    for step in q['steps']:
-        new_step_id = uuid4()
-        id_map[step['id']] = new_step_id
-        step['id'] = new_step_id
-
-        # Each field has a UUID that needs to be replaced
-        for field in step['children']:
-            field['step_id'] = step['id']
-            fix_field_pass_1(field)
-
-    # Step2: fix of fields triggers following IDs replacement
-    for step in q['steps']:
-        # Fix triggers references
-        for trigger in step.get('triggered_by_options', []):
-            trigger['field'] = id_map[trigger['field']]
-            trigger['option'] = id_map[trigger['option']]
-
-        for field in step['children']:
-            fix_field_pass_2(field)
-
-    q['name'] = new_name
-
-    db_create_questionnaire(session, tid, q, None)
+        return objs
+
+    remap([q])
+    clone(q, tid=tid, name=new_name, editable=True)
+
+    steps = remap(session.query(models.Step).filter(models.Step.questionnaire_id == q.id).all())
+    for step in steps:
+        clone(step)
+
+    steps_ids = [step.id for step in steps]
+    fields_ids = []
+
+    # Fields are fetched one level of nesting at a time so that the parents are cloned before their children
+    fields = remap(session.query(models.Field).filter(models.Field.step_id.in_(steps_ids)).all()) if steps_ids else []
+    while fields:
+        for field in fields:
+            clone(field, tid=tid, editable=True)
+            fields_ids.append(field.id)
+
+        fields = remap(session.query(models.Field).filter(models.Field.fieldgroup_id.in_([f.id for f in fields])).all())
+
+    if fields_ids:
+        for attr in session.query(models.FieldAttr).filter(models.FieldAttr.field_id.in_(fields_ids)):
+            clone(attr, id=uuid4())
+
+        for option in remap(session.query(models.FieldOption).filter(models.FieldOption.field_id.in_(fields_ids)).all()):
+            clone(option)
+
+        for trigger in session.query(models.FieldOptionTriggerField).filter(models.FieldOptionTriggerField.object_id.in_(fields_ids)):
+            clone(trigger)
+
+    if steps_ids:
+        for trigger in session.query(models.FieldOptionTriggerStep).filter(models.FieldOptionTriggerStep.object_id.in_(steps_ids)):
+            clone(trigger)
+
+    db_insert_questionnaire_rows(session, rows)
+
+    return id_map[q.id]
+
+
+@transact
+def duplicate_questionnaire(session, tid, questionnaire_id, new_name):
+    """
+    Transaction that perform db_duplicate_questionnaire
+    """
+    db_duplicate_questionnaire(session, tid, questionnaire_id, new_name)
 
 
 class QuestionnairesCollection(BaseHandler):
@@ -3,11 +3,17 @@
 import operator
 from datetime import timedelta
 
+from twisted.internet.defer import inlineCallbacks, returnValue
+
 from globaleaks.event import events_monitored
 from globaleaks.handlers.base import BaseHandler
-from globaleaks.models import Stats, Anomalies
-from globaleaks.orm import transact
+from globaleaks.models import Mail, Stats, Anomalies
+from globaleaks.orm import get_thread_pool, transact
+from globaleaks.rest import errors
+from globaleaks.rest.cache import Cache
 from globaleaks.state import State
+from globaleaks.utils.mail import smtp_pool
+from globaleaks.utils.metrics import MetricFamily, metrics, render_metrics
 from globaleaks.utils.utility import datetime_to_ISO8601, datetime_now, \
     iso_to_gregorian
 
@@ -190,3 +196,84 @@ class JobsTiming(BaseHandler):
             })
 
         return response
+
+
+@transact
+def get_mail_spool_size(session):
+    return session.query(Mail).count()
+
+
+def get_runtime_metrics(mail_spool_size):
+    """
+    Return the families of the metrics describing the state of the platform
+    """
+    families = metrics.get_families()
+
+    thread_pool = get_thread_pool()
+    thread_pool_queue = getattr(thread_pool, '_queue', None)
+
+    family = MetricFamily('globaleaks_orm_queue_depth', 'gauge',
+                          'Number of transactions waiting for a thread of the ORM pool')
+    family.add((), thread_pool_queue.qsize() if thread_pool_queue is not None else 0)
+    families.append(family)
+
+    family = MetricFamily('globaleaks_orm_threads_busy', 'gauge',
+                          'Number of threads of the ORM pool running a transaction')
+    family.add((), len(getattr(thread_pool, 'working', [])))
+    families.append(family)
+
+    family = MetricFamily('globaleaks_cache_requests_total', 'counter',
+                          'Number of lookups in the cache of the API by result')
+    family.add((('result', 'hit'),), Cache.hits)
+    family.add((('result', 'miss'),), Cache.misses)
+    families.append(family)
+
+    family = MetricFamily('globaleaks_mail_spool_size', 'gauge',
+                          'Number of mails waiting to be delivered')
+    family.add((), mail_spool_size)
+    families.append(family)
+
+    family = MetricFamily('globaleaks_pending_uploads', 'gauge',
+                          'Number of uploads in progress')
+    family.add((), len(State.TempUploadFiles))
+    families.append(family)
+
+    family = MetricFamily('globaleaks_pending_uploads_bytes', 'gauge',
+                          'Size of the files of the uploads in progress')
+    family.add((), State.TempUploadFiles.get_size())
+    families.append(family)
+
+    smtp_stats = sorted(smtp_pool.get_stats().items())
+    for name, description in [('sent', 'Number of mails delivered by SMTP relay'),
+                              ('failed', 'Number of mails failed to be delivered by SMTP relay')]:
+        family = MetricFamily('globaleaks_smtp_mails_%s_total' % name, 'counter', description)
+        for relay, stats in smtp_stats:
+            family.add((('relay', relay),), stats[name])
+        families.append(family)
+
+    return families
+
+
+class MetricsHandler(BaseHandler):
+    """
+    This handler exports the runtime metrics in the Prometheus text format
+
+    The metrics are accessible to the administrators of the root tenant
+    and to the local scrapers connecting from the loopback interface
+    """
+    check_roles = 'none'
+    root_tenant_only = True
+
+    @inlineCallbacks
+    def get(self):
+        if (self.request.client_ip not in self.state.settings.local_hosts or self.request.client_using_tor) and \
+           (self.current_user is None or
+            self.current_user.tid != 1 or
+            self.current_user.user_role != 'admin'):
+            raise errors.NotAuthenticated
+
+        mail_spool_size = yield get_mail_spool_size()
+
+        self.request.setHeader(b'content-type', b'text/plain; version=0.0.4')
+
+        returnValue(render_metrics(get_runtime_metrics(mail_spool_size)))
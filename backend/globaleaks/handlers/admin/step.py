@@ -5,13 +5,15 @@
 # Implementation of the code executed on handler /admin/steps
 #
 from globaleaks import models
-from globaleaks.handlers.admin.field import db_create_field, db_update_field, db_create_trigger, db_reset_option_triggers
+from globaleaks.handlers.admin.field import db_create_field, db_update_field, db_create_trigger, db_reset_option_triggers, \
+    dump_field_rows, row_from_dict
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.handlers.operation import OperationHandler
 from globaleaks.handlers.public import serialize_step
 from globaleaks.models import fill_localized_keys
 from globaleaks.orm import transact
 from globaleaks.rest import requests, errors
+from globaleaks.utils.utility import uuid4
 
 
 def db_create_step(session, tid, step_dict, language):
@@ -38,6 +40,24 @@ def db_create_step(session, tid, step_dict, language):
     return step
 
 
+def dump_step_rows(rows, tid, step_dict):
+    """
+    Append to rows the rows of the step and of its triggers and fields
+    """
+    step_dict['id'] = step_dict.get('id') or uuid4()
+
+    rows[models.Step].append(row_from_dict(models.Step, step_dict))
+
+    for trigger in step_dict.get('triggered_by_options', []):
+        rows[models.FieldOptionTriggerStep].append({'option_id': trigger['option'],
+                                                    'object_id': step_dict['id'],
+                                                    'sufficient': trigger.get('sufficient', True)})
+
+    for c in step_dict['children']:
+        c['step_id'] = step_dict['id']
+        dump_field_rows(rows, tid, c)
+
+
 @transact
 def create_step(session, tid, step, language):
     """
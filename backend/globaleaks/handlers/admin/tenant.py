@@ -4,9 +4,10 @@
 #   tenant
 #   *****
 # Implementation of the Tenant handlers
-import base64
 import os
 
+from functools import lru_cache
+
 from globaleaks import models
 from globaleaks.db import db_refresh_memory_variables
 from globaleaks.db.appdata import load_appdata
@@ -14,7 +15,7 @@ from globaleaks.handlers.admin import file
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.models.config import db_set_config_variable
 from globaleaks.orm import transact
-from globaleaks.rest import requests
+from globaleaks.rest import errors, requests
 from globaleaks.settings import Settings
 from globaleaks.state import State
 from globaleaks.utils.log import log
@@ -32,8 +33,6 @@ def initialize_submission_statuses(session, tid):
 
 
 def serialize_tenant(session, tenant, signup=None):
-    from globaleaks.handlers.signup import serialize_signup
-
     ret = {
         'id': tenant.id,
         'label': tenant.label,
@@ -51,6 +50,7 @@ def serialize_tenant(session, tenant, signup=None):
         ret['mode'] = tc.mode
 
     if signup is not None:
+        from globaleaks.handlers.signup import serialize_signup
         ret['signup'] = serialize_signup(signup)
 
     return ret
@@ -65,6 +65,21 @@ def db_preallocate(session, desc):
     return t
 
 
+@lru_cache(maxsize=8)
+def read_default_file(path, mtime):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def load_default_file(path):
+    """
+    Return the content of a file of the client used as default asset of the tenants
+    """
+    path = os.path.join(Settings.client_path, path)
+
+    return read_default_file(path, os.path.getmtime(path))
+
+
 def db_initialize(session, tenant, mode):
     tenant.active = True
 
@@ -83,19 +98,26 @@ def db_initialize(session, tenant, mode):
         ]
 
         for file_desc in file_descs:
-            with open(os.path.join(Settings.client_path, file_desc[1]), 'rb') as f:
-                data = base64.b64encode(f.read()).decode()
-                file.db_add_file(session, tenant.id, file_desc[0], '', data)
+            file.db_add_file(session, tenant.id, file_desc[0], '', load_default_file(file_desc[1]))
 
 
-def db_create(session, desc):
-    t = db_preallocate(session, desc)
+def db_create_tenants(session, descs):
+    """
+    Create the specified tenants refreshing the tenant cache once for all of them
+    """
+    tenants = []
+    for desc in descs:
+        t = db_preallocate(session, desc)
+        db_initialize(session, t, desc['mode'])
+        tenants.append(t)
 
-    db_initialize(session, t, desc['mode'])
+    db_refresh_memory_variables(session, [t.id for t in tenants])
 
-    db_refresh_memory_variables(session, [t.id])
+    return tenants
 
-    return t
+
+def db_create(session, desc):
+    return db_create_tenants(session, [desc])[0]
 
 
 @transact
@@ -103,14 +125,69 @@ def create(session, desc, *args, **kwargs):
     return serialize_tenant(session, db_create(session, desc, *args, **kwargs))
 
 
-def db_get_tenant_list(session):
-    return [serialize_tenant(session, r[0], r[1]) for r in session.query(models.Tenant, models.Signup)
-                                                                  .outerjoin(models.Signup, models.Tenant.id == models.Signup.tid)]
+@transact
+def create_tenants(session, descs):
+    return [serialize_tenant(session, t) for t in db_create_tenants(session, descs)]
+
+
+tenant_list_sort_keys = {
+    'id': models.Tenant.id,
+    'label': models.Tenant.label,
+    'subdomain': models.Tenant.subdomain,
+    'creation_date': models.Tenant.creation_date
+}
+
+
+def escape_like(value):
+    """
+    Escape the wildcards of a value to be matched literally by a LIKE expression
+    """
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def db_get_tenant_list(session, limit=None, offset=0, label=None, subdomain=None, active=None, sort='id'):
+    """
+    Return the list of the tenants
+
+    :param session: the session on which perform queries.
+    :param limit: the maximum number of tenants to be returned
+    :param offset: the number of tenants to be skipped
+    :param label: a string that should be contained in the label of the tenants
+    :param subdomain: a prefix of the subdomain of the tenants
+    :param active: the activation status of the tenants
+    :param sort: the key used to sort the tenants, prefixed by '-' for a descending order
+    :return: the list of the serialized tenants
+    """
+    query = session.query(models.Tenant, models.Signup) \
+                   .outerjoin(models.Signup, models.Tenant.id == models.Signup.tid)
+
+    if label:
+        query = query.filter(models.Tenant.label.like('%' + escape_like(label) + '%', escape='\\'))
+
+    if subdomain:
+        query = query.filter(models.Tenant.subdomain.like(escape_like(subdomain) + '%', escape='\\'))
+
+    if active is not None:
+        query = query.filter(models.Tenant.active == active)
+
+    key = tenant_list_sort_keys[sort.lstrip('-')]
+    if sort.startswith('-'):
+        query = query.order_by(key.desc(), models.Tenant.id.desc())
+    else:
+        query = query.order_by(key, models.Tenant.id)
+
+    if offset:
+        query = query.offset(offset)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [serialize_tenant(session, r[0], r[1]) for r in query]
 
 
 @transact
-def get_tenant_list(session):
-    return db_get_tenant_list(session)
+def get_tenant_list(session, *args, **kwargs):
+    return db_get_tenant_list(session, *args, **kwargs)
 
 
 @transact
@@ -149,9 +226,42 @@ class TenantCollection(BaseHandler):
 
     def get(self):
         """
-        Return the list of registered tenants
+        Return the list of registered tenants optionally paginated, filtered and sorted
         """
-        return get_tenant_list()
+        args = {}
+
+        for arg, minimum in [('limit', 1), ('offset', 0)]:
+            value = self.request.args.get(arg.encode(), [None])[0]
+            if value is not None:
+                try:
+                    args[arg] = int(value)
+                except ValueError:
+                    raise errors.InputValidationError('Invalid ' + arg)
+
+                if args[arg] < minimum:
+                    raise errors.InputValidationError('Invalid ' + arg)
+
+        for arg in ['label', 'subdomain']:
+            value = self.request.args.get(arg.encode(), [None])[0]
+            if value is not None:
+                args[arg] = value.decode()
+
+        active = self.request.args.get(b'active', [None])[0]
+        if active is not None:
+            if active not in (b'true', b'false'):
+                raise errors.InputValidationError('Invalid active')
+
+            args['active'] = active == b'true'
+
+        sort = self.request.args.get(b'sort', [None])[0]
+        if sort is not None:
+            sort = sort.decode()
+            if sort.lstrip('-') not in tenant_list_sort_keys:
+                raise errors.InputValidationError('Invalid sort')
+
+            args['sort'] = sort
+
+        return get_tenant_list(**args)
 
     def post(self):
         """
@@ -164,6 +274,23 @@ class TenantCollection(BaseHandler):
         return create(request)
 
 
+class TenantBatchCollection(BaseHandler):
+    check_roles = 'admin'
+    root_tenant_only = True
+    invalidate_cache = True
+    refresh_connection_endpoints = True
+
+    def post(self):
+        """
+        Create the list of tenants specified
+        """
+        request = self.validate_message(self.request.content.read(), [requests.AdminTenantDesc])
+
+        log.info('Creating %d new tenants', len(request), tid=self.request.tid)
+
+        return create_tenants(request)
+
+
 class TenantInstance(BaseHandler):
     check_roles = 'admin'
     invalidate_cache = True
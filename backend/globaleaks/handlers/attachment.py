@@ -7,6 +7,7 @@ from globaleaks import models
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.models import serializers
 from globaleaks.orm import transact
+from globaleaks.rest import errors
 from globaleaks.utils.crypto import GCE
 from globaleaks.utils.utility import datetime_now
 
@@ -46,6 +47,10 @@ class SubmissionAttachment(BaseHandler):
     check_roles = 'none'
     upload_handler = True
 
+    def check_upload(self, token_id):
+        if token_id not in self.state.tokens:
+            raise errors.ForbiddenOperation
+
     def post(self, token_id):
         token = self.state.tokens.get(token_id)
 
@@ -61,6 +66,9 @@ class PostSubmissionAttachment(SubmissionAttachment):
     check_roles = 'whistleblower'
     upload_handler = True
 
+    def check_upload(self):
+        return
+
     def post(self):
         self.uploaded_file['submission'] = False
 
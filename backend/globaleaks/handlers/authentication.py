@@ -48,7 +48,7 @@ def random_login_delay():
 
 def connection_check(client_ip, tid, role, client_using_tor):
     ip_filter = State.tenant_cache[tid]['ip_filter'].get(role)
-    if ip_filter and not check_ip(client_ip, ip_filter):
+    if ip_filter is not None and not check_ip(client_ip, ip_filter):
         raise errors.AccessLocationInvalid
 
     https_allowed = State.tenant_cache[tid]['https_allowed'].get(role)
@@ -156,6 +156,7 @@ class AuthenticationHandler(BaseHandler):
     """
     check_roles = 'none'
     uniform_answer_time = True
+    rate_limit = 'auth'
 
     @inlineCallbacks
     def post(self):
@@ -192,6 +193,7 @@ class TokenAuthHandler(BaseHandler):
     """
     check_roles = 'none'
     uniform_answer_time = True
+    rate_limit = 'auth'
 
     @inlineCallbacks
     def post(self):
@@ -231,6 +233,7 @@ class ReceiptAuthHandler(BaseHandler):
     """
     check_roles = 'none'
     uniform_answer_time = True
+    rate_limit = 'auth'
 
     @inlineCallbacks
     def post(self):
@@ -20,6 +20,8 @@ from globaleaks.utils.securetempfile import SecureTemporaryFile
 from globaleaks.sessions import Sessions
 from globaleaks.settings import Settings
 from globaleaks.utils.log import log
+from globaleaks.utils.multipart import MultipartError, MultipartParser, parse_header_params
+from globaleaks.utils.producer import ThreadedFileProducer
 from globaleaks.utils.utility import datetime_now, deferred_sleep
 
 # https://github.com/globaleaks/GlobaLeaks/issues/1601
@@ -30,18 +32,137 @@ mimetypes.add_type('application/woff', '.woff')
 mimetypes.add_type('application/woff2', '.woff2')
 
 
-def serve_file(request, fo):
+def serve_file(request, fo, threaded=False):
+    """
+    Serve the content of a file object
+
+    :param threaded: if True the file is read in a worker thread in order to not
+                     block the reactor while performing I/O and decryption
+    """
     def on_finish(ignored):
         fo.close()
         request.finish()
 
-    filesender = FileSender().beginFileTransfer(fo, request)
+    if threaded:
+        filesender = ThreadedFileProducer(request, fo).start()
+    else:
+        filesender = FileSender().beginFileTransfer(fo, request)
 
     filesender.addBoth(on_finish)
 
     return filesender
 
 
+class StreamingFileUpload(object):
+    """
+    Parser of the multipart body of a file upload request
+
+    The body is parsed while it is received and the content of the file is
+    encrypted directly into the temporary file of the upload so that the
+    chunks are never buffered in memory; the size limits are enforced while
+    receiving, rejecting oversized uploads as soon as the limit is exceeded.
+
+    The temporary files are indexed by the flow identifier within the scope
+    of the uploader returned by BaseHandler.get_upload_scope.
+    """
+    max_fields_size = 64 * 1024
+
+    def __init__(self, state, tid, boundary, scope):
+        self.state = state
+        self.tid = tid
+        self.scope = scope
+        self.parser = MultipartParser(boundary, self.part_begin, self.part_data, self.part_end)
+        self.fields = {}
+        self.fields_size = 0
+        self.part_name = None
+        self.file = None
+        self.file_offset = 0
+        self.chunk_size = 0
+        self.error = None
+
+    def feed(self, data):
+        if self.error is not None:
+            return
+
+        try:
+            self.parser.feed(data)
+        except errors.GLException as excep:
+            self.fail(excep)
+        except MultipartError as excep:
+            self.fail(errors.InputValidationError(str(excep)))
+
+    def fail(self, error):
+        self.error = error
+        self.abort()
+
+    def check_size(self, size):
+        maximum_filesize = self.state.tenant_cache[self.tid].maximum_filesize
+        if size / (1024 * 1024) > maximum_filesize:
+            log.err("File upload request rejected: file too big", tid=self.tid)
+            raise errors.FileTooBig(maximum_filesize)
+
+    def part_begin(self, headers):
+        self.part_name = parse_header_params(headers.get(b'content-disposition', b'')).get(b'name', b'')
+
+        if self.part_name != b'file':
+            self.fields.setdefault(self.part_name, []).append(b'')
+            return
+
+        try:
+            total_file_size = int(self.fields[b'flowTotalSize'][0])
+            key = self.scope + (self.fields[b'flowIdentifier'][0].decode(),)
+        except (KeyError, ValueError):
+            raise errors.InputValidationError("Missing upload parameters")
+
+        self.check_size(total_file_size)
+
+        if key not in self.state.TempUploadFiles:
+            self.state.TempUploadFiles.set(key, SecureTemporaryFile(Settings.tmp_path))
+
+        self.file = self.state.TempUploadFiles[key].open('w')
+        self.file_offset = self.file.size()
+
+    def part_data(self, data):
+        if self.part_name != b'file':
+            self.fields_size += len(data)
+            if self.fields_size > self.max_fields_size:
+                raise errors.InputValidationError("Upload parameters too long")
+
+            self.fields[self.part_name][-1] += data
+            return
+
+        if self.file is None:
+            return
+
+        self.chunk_size += len(data)
+        self.check_size(self.file_offset + self.chunk_size)
+
+        self.file.write(data)
+
+    def part_end(self):
+        if self.part_name == b'file' and self.file is not None:
+            if self.fields.get(b'flowChunkNumber') == self.fields.get(b'flowTotalChunks'):
+                self.file.finalize_write()
+
+            self.file.close()
+            self.file = None
+
+        self.part_name = None
+
+    def abort(self):
+        """
+        Discard the content of the chunk written to the temporary file
+        """
+        if self.file is not None:
+            self.file.truncate(self.file_offset)
+            self.file.close()
+            self.file = None
+
+    def conclude(self):
+        if self.error is None and not self.parser.is_complete():
+            self.fail(errors.InputValidationError("Incomplete upload"))
+
+
 class BaseHandler(object):
     check_roles = 'admin'
     handler_exec_time_threshold = 120
@@ -52,6 +173,7 @@ class BaseHandler(object):
     root_tenant_only = False
     upload_handler = False
     uploaded_file = None
+    rate_limit = 'api'
     require_multisite = False
     refresh_connection_handpoints = False
 
@@ -212,6 +334,9 @@ class BaseHandler(object):
             return True
 
         elif isinstance(message_template, list):
+            if not isinstance(jmessage, list):
+                raise errors.InputValidationError("invalid json massage: expected list")
+
             if not all(BaseHandler.validate_type(x, message_template[0]) for x in jmessage):
                 raise errors.InputValidationError("Not every element in %s is %s" %
                                                   (jmessage, message_template[0]))
@@ -269,7 +394,7 @@ class BaseHandler(object):
         self.request.setHeader(b'Content-Disposition',
                                'attachment; filename="%s"' % filename)
 
-        return serve_file(self.request, fo)
+        return serve_file(self.request, fo, threaded=True)
 
     def write_file_as_download(self, filename, filepath):
         fo = self.open_file(filepath)
@@ -321,30 +446,55 @@ class BaseHandler(object):
         if constant_time.bytes_eq(sha512(token), stored_token_hash):
             return self.state.api_token_session
 
+    def get_upload_scope(self):
+        """
+        Return the scope of the flow identifiers of the uploads
+
+        The identifiers are chosen by the clients and are therefore
+        scoped to the resource and to the session of the uploader.
+        """
+        session_id = self.current_user.id if self.current_user else None
+
+        return self.request.tid, self.request.path, session_id
+
+    def check_upload(self, *args):
+        """
+        Validate an upload request before the reception of its body
+        """
+
     def process_file_upload(self):
+        upload = getattr(self.request, 'upload', None)
+        if upload is not None and upload.error is not None:
+            raise upload.error
+
         if b'flowFilename' not in self.request.args:
             return
 
         total_file_size = int(self.request.args[b'flowTotalSize'][0])
         file_id = self.request.args[b'flowIdentifier'][0].decode()
+        key = self.get_upload_scope() + (file_id,)
+
+        # When streamed the chunk has been already encrypted to disk while receiving the request
+        if upload is None:
+            chunk_size = len(self.request.args[b'file'][0])
+            if ((chunk_size / (1024 * 1024)) > self.state.tenant_cache[self.request.tid].maximum_filesize or
+                (total_file_size / (1024 * 1024)) > self.state.tenant_cache[self.request.tid].maximum_filesize):
+                log.err("File upload request rejected: file too big", tid=self.request.tid)
+                raise errors.FileTooBig(self.state.tenant_cache[self.request.tid].maximum_filesize)
 
-        chunk_size = len(self.request.args[b'file'][0])
-        if ((chunk_size / (1024 * 1024)) > self.state.tenant_cache[self.request.tid].maximum_filesize or
-            (total_file_size / (1024 * 1024)) > self.state.tenant_cache[self.request.tid].maximum_filesize):
-            log.err("File upload request rejected: file too big", tid=self.request.tid)
-            raise errors.FileTooBig(self.state.tenant_cache[self.request.tid].maximum_filesize)
+            if key not in self.state.TempUploadFiles:
+                self.state.TempUploadFiles.set(key, SecureTemporaryFile(Settings.tmp_path))
 
-        if file_id not in self.state.TempUploadFiles:
-            self.state.TempUploadFiles.set(file_id, SecureTemporaryFile(Settings.tmp_path))
+            with self.state.TempUploadFiles[key].open('w') as f:
+                f.write(self.request.args[b'file'][0])
 
-        f = self.state.TempUploadFiles[file_id]
-        with f.open('w') as f:
-            f.write(self.request.args[b'file'][0])
+                if self.request.args[b'flowChunkNumber'][0] == self.request.args[b'flowTotalChunks'][0]:
+                    f.finalize_write()
 
-            if self.request.args[b'flowChunkNumber'][0] != self.request.args[b'flowTotalChunks'][0]:
-                return None
+        if self.request.args[b'flowChunkNumber'][0] != self.request.args[b'flowTotalChunks'][0]:
+            return None
 
-            f.finalize_write()
+        f = self.state.TempUploadFiles[key]
 
         mime_type, _ = mimetypes.guess_type(self.request.args[b'flowFilename'][0].decode())
         if mime_type is None:
@@ -1,22 +1,16 @@
 # -*- coding: utf-8 -*-
 #
 # Handlers dealing with custodian user functionalities
+from sqlalchemy import and_, or_
+
 from globaleaks import models
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.orm import transact
-from globaleaks.rest import requests
+from globaleaks.rest import errors, requests
 from globaleaks.utils.utility import datetime_to_ISO8601, datetime_now
 
 
-def serialize_identityaccessrequest(session, identityaccessrequest):
-    itip, user = session.query(models.InternalTip, models.User) \
-                      .filter(models.InternalTip.id == models.ReceiverTip.internaltip_id,
-                              models.ReceiverTip.id == identityaccessrequest.receivertip_id,
-                              models.User.id == models.ReceiverTip.receiver_id).one()
-
-    reply_user = session.query(models.User) \
-                        .filter(models.User.id == identityaccessrequest.reply_user_id).one_or_none()
-
+def serialize_identityaccessrequest_row(identityaccessrequest, itip, user):
     return {
         'id': identityaccessrequest.id,
         'receivertip_id': identityaccessrequest.receivertip_id,
@@ -24,7 +18,7 @@ def serialize_identityaccessrequest(session, identityaccessrequest):
         'request_user_name': user.name,
         'request_motivation': identityaccessrequest.request_motivation,
         'reply_date': datetime_to_ISO8601(identityaccessrequest.reply_date),
-        'reply_user_name': reply_user.id if reply_user is not None else '',
+        'reply_user_name': identityaccessrequest.reply_user_id,
         'reply': identityaccessrequest.reply,
         'reply_motivation': identityaccessrequest.reply_motivation,
         'submission_progressive': itip.progressive,
@@ -32,12 +26,55 @@ def serialize_identityaccessrequest(session, identityaccessrequest):
     }
 
 
+def db_query_identityaccessrequests(session, *filters):
+    """
+    Query the identity access requests along with all the data needed
+    for their serialization by means of a single joined query
+    """
+    return session.query(models.IdentityAccessRequest, models.InternalTip, models.User) \
+                  .filter(models.ReceiverTip.id == models.IdentityAccessRequest.receivertip_id,
+                          models.InternalTip.id == models.ReceiverTip.internaltip_id,
+                          models.User.id == models.ReceiverTip.receiver_id,
+                          *filters)
+
+
+def serialize_identityaccessrequest(session, identityaccessrequest):
+    row = db_query_identityaccessrequests(session, models.IdentityAccessRequest.id == identityaccessrequest.id).one()
+
+    return serialize_identityaccessrequest_row(*row)
+
+
 @transact
-def get_identityaccessrequest_list(session, tid):
-    return [serialize_identityaccessrequest(session, iar)
-        for iar in session.query(models.IdentityAccessRequest).filter(models.IdentityAccessRequest.receivertip_id == models.ReceiverTip.id,
-                                                                      models.ReceiverTip.internaltip_id == models.InternalTip.id,
-                                                                      models.InternalTip.tid == tid)]
+def get_identityaccessrequest_list(session, tid, limit=None, before=None):
+    """
+    Return the identity access requests of a tenant sorted from the most recent
+
+    :param limit: the maximum number of requests to be returned
+    :param before: the id of the last request of the previous page
+    """
+    filters = [models.InternalTip.tid == tid]
+
+    if before is not None:
+        cursor = session.query(models.IdentityAccessRequest.request_date) \
+                        .filter(models.IdentityAccessRequest.id == before,
+                                models.ReceiverTip.id == models.IdentityAccessRequest.receivertip_id,
+                                models.InternalTip.id == models.ReceiverTip.internaltip_id,
+                                models.InternalTip.tid == tid).one_or_none()
+        if cursor is None:
+            return []
+
+        filters.append(or_(models.IdentityAccessRequest.request_date < cursor[0],
+                           and_(models.IdentityAccessRequest.request_date == cursor[0],
+                                models.IdentityAccessRequest.id < before)))
+
+    query = db_query_identityaccessrequests(session, *filters) \
+                .order_by(models.IdentityAccessRequest.request_date.desc(),
+                          models.IdentityAccessRequest.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [serialize_identityaccessrequest_row(*row) for row in query]
 
 
 @transact
@@ -97,4 +134,19 @@ class IdentityAccessRequestsCollection(BaseHandler):
     check_roles = 'custodian'
 
     def get(self):
-        return get_identityaccessrequest_list(self.request.tid)
+        limit = self.request.args.get(b'limit', [None])[0]
+        before = self.request.args.get(b'before', [None])[0]
+
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise errors.InputValidationError('Invalid limit')
+
+            if limit < 1:
+                raise errors.InputValidationError('Invalid limit')
+
+        if before is not None:
+            before = before.decode()
+
+        return get_identityaccessrequest_list(self.request.tid, limit, before)
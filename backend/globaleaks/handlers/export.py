@@ -5,7 +5,7 @@ import os
 
 from io import BytesIO
 from twisted.internet import abstract
-from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.defer import inlineCallbacks
 from twisted.internet.threads import deferToThread
 
 from globaleaks import models
@@ -20,6 +20,7 @@ from globaleaks.handlers.user import user_serialize_user
 from globaleaks.orm import transact
 from globaleaks.settings import Settings
 from globaleaks.utils.crypto import GCE
+from globaleaks.utils.producer import ThreadedProducer
 from globaleaks.utils.templating import Templating
 from globaleaks.utils.utility import msdos_encode, datetime_now
 from globaleaks.utils.zipstream import ZipStream
@@ -72,34 +73,20 @@ def get_tip_export(session, tid, user_id, rtip_id, language):
     return export_dict
 
 
-class ZipStreamProducer(object):
-    """Streaming producter for ZipStream"""
+class ZipStreamProducer(ThreadedProducer):
+    """
+    Streaming producer for ZipStream
+
+    The archive is generated in a worker thread ahead of the transport
+    so that reading, decrypting and compressing the files does not block
+    the reactor.
+    """
 
     def __init__(self, handler, zipstreamObject):
-        self.finish = Deferred()
+        ThreadedProducer.__init__(self, handler.request, self.zip_chunk)
         self.handler = handler
         self.zipstreamObject = zipstreamObject
 
-    def start(self):
-        self.handler.request.registerProducer(self, False)
-        return self.finish
-
-    def resumeProducing(self):
-        if not self.handler:
-            return
-
-        data = self.zip_chunk()
-        if data:
-            self.handler.request.write(data)
-        else:
-            self.stopProducing()
-
-    def stopProducing(self):
-        self.handler.request.unregisterProducer()
-        self.handler.request.finish()
-        self.handler = None
-        self.finish.callback(None)
-
     def zip_chunk(self):
         chunk = []
         chunk_size = 0
@@ -136,6 +123,8 @@ class ExportHandler(BaseHandler):
 
                 tip_prv_key = GCE.asymmetric_decrypt(self.current_user.cc, tip_export['crypto_tip_prv_key'])
                 file_dict['fo'] = GCE.streaming_encryption_open('DECRYPT', tip_prv_key, file_dict['path'])
+                # The size of the encrypted file is an upper bound of the plaintext size
+                file_dict['size'] = os.path.getsize(file_dict['path'])
                 del file_dict['path']
 
         export_template = Templating().format_template(tip_export['notification']['export_template'], tip_export).encode()
@@ -150,4 +139,7 @@ class ExportHandler(BaseHandler):
 
         self.zip_stream = iter(ZipStream(tip_export['files']))
 
-        yield ZipStreamProducer(self, self.zip_stream).start()
+        def on_finish(ignored):
+            self.request.finish()
+
+        yield ZipStreamProducer(self, self.zip_stream).start().addBoth(on_finish)
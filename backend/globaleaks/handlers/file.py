@@ -1,21 +1,56 @@
 # -*- coding: utf-8 -*-
 #
 # Handlers exposing customization files
-import base64
 import os
 
 from twisted.internet.defer import inlineCallbacks, returnValue
 
 from globaleaks import models
 from globaleaks.handlers.admin.file import get_file
+from globaleaks.handlers.admin.modelimgs import model_map
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.orm import transact
+from globaleaks.rest import errors
+from globaleaks.rest.cache import Cache
 
 appfiles = {
     'css': 'text/css',
     'script': 'application/javascript'
 }
 
+imgfiles = {
+    'logo': 'image/png',
+    'favicon': 'image/x-icon'
+}
+
+imgmodels = {
+    'users': models.User,
+    'contexts': models.Context
+}
+
+img_signatures = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\x00\x00\x01\x00', 'image/x-icon'),
+    (b'BM', 'image/bmp')
+]
+
+
+def get_img_content_type(data, default):
+    """
+    Return the content type of an image detected from its signature
+    """
+    for signature, content_type in img_signatures:
+        if data.startswith(signature):
+            return content_type
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+
+    return default
+
 
 def db_mark_file_for_secure_deletion(session, directory, filename):
     path = os.path.join(directory, filename)
@@ -27,25 +62,135 @@ def db_mark_file_for_secure_deletion(session, directory, filename):
     session.add(secure_file_delete)
 
 
+def db_mark_files_for_secure_deletion(session, paths):
+    """
+    Enqueue the files for the secure deletion performed by the SecureFileDeletion job
+
+    :param session: An ORM session
+    :param paths: The absolute paths of the files to be deleted
+    """
+    session.bulk_insert_mappings(models.SecureFileDelete,
+                                 [{'filepath': path} for path in paths if os.path.exists(path)])
+
+
+@transact
+def mark_files_for_secure_deletion(session, paths):
+    db_mark_files_for_secure_deletion(session, paths)
+
+
 @transact
 def get_file_id(session, tid, name):
     return models.db_get(session, models.File, models.File.tid == tid, models.File.name == name).id
 
 
+@transact
+def get_img(session, tid, name):
+    """
+    Return the data and the hash of the logo or of the favicon of a tenant
+    """
+    ret = session.query(models.File.data, models.File.hash).filter(models.File.tid == tid, models.File.id == name).one_or_none()
+
+    return tuple(ret) if ret is not None else (b'', '')
+
+
+@transact
+def get_model_img(session, tid, obj_key, obj_id):
+    """
+    Return the data and the hash of the picture of a user or of a context
+
+    The pictures of the users are public only for the recipients
+    """
+    model, img_model = imgmodels[obj_key], model_map[obj_key]
+    filters = [img_model.id == obj_id, model.id == obj_id, model.tid == tid]
+    if obj_key == 'users':
+        filters.append(models.User.role == 'receiver')
+
+    ret = session.query(img_model.data, img_model.hash).filter(*filters).one_or_none()
+
+    return tuple(ret) if ret is not None else (b'', '')
+
+
 class FileHandler(BaseHandler):
     check_roles = 'none'
 
     @inlineCallbacks
-    def get(self, name):
-        if name in appfiles:
+    def get_appfile(self, name):
+        """
+        Return the cache entry of a customization file
+
+        The entry holds the content type, the gzipped content and the etag
+        and it is invalidated together with the API cache of the tenant
+        on the upload of a new file.
+        """
+        c = Cache.get(self.request.tid, self.request.path, None)
+        if c is None:
             x = yield get_file(self.request.tid, name)
             if not x and self.state.tenant_cache[self.request.tid]['mode'] != 'default':
                 x = yield get_file(1, name)
 
-            self.request.setHeader(b'Content-Type', appfiles[name])
-            x = base64.b64decode(x)
-            returnValue(x)
+            c = (appfiles[name], x, None)
+            if self.state.settings.enable_api_cache:
+                c = Cache.set(self.request.tid, self.request.path, None, appfiles[name], c[1])
+
+        returnValue(c)
+
+    @inlineCallbacks
+    def get(self, name):
+        if name in appfiles:
+            content_type, data, etag = yield self.get_appfile(name)
+
+            self.request.setHeader(b'Content-Type', content_type)
+
+            if etag is None:
+                returnValue(data)
+
+            # Allow browsers to store the file and to revalidate it at each use
+            self.request.setHeader(b'Cache-Control', b'no-cache')
+            self.request.responseHeaders.removeHeader(b'Pragma')
+            self.request.responseHeaders.removeHeader(b'Expires')
+            self.request.setHeader(b'ETag', etag)
+
+            if self.request.getHeader(b'If-None-Match') == etag:
+                self.request.setResponseCode(304)
+                returnValue(None)
+
+            self.request.setHeader(b'Content-encoding', b'gzip')
+            returnValue(data)
         else:
             id = yield get_file_id(self.request.tid, name)
             path = os.path.abspath(os.path.join(self.state.settings.files_path, id))
             yield self.write_file(name, path)
+
+
+class ImageHandler(BaseHandler):
+    """
+    Handler exposing the logo, the favicon and the pictures of users and contexts
+
+    The resources are referenced by content addressed urls and are thus
+    served with long lived caching when requested with the current hash
+    """
+    check_roles = 'none'
+
+    @inlineCallbacks
+    def get(self, obj_key, obj_id=None):
+        if obj_id is None:
+            data, img_hash = yield get_img(self.request.tid, obj_key)
+            if not data and self.state.tenant_cache[self.request.tid]['mode'] != 'default':
+                data, img_hash = yield get_img(1, obj_key)
+
+            content_type = imgfiles[obj_key]
+        else:
+            data, img_hash = yield get_model_img(self.request.tid, obj_key, obj_id)
+            content_type = 'image/png'
+
+        if not data:
+            raise errors.ResourceNotFound
+
+        if self.request.args.get(b'h', [b''])[0] == img_hash.encode():
+            self.request.setHeader(b'Cache-Control', b'public, max-age=31536000, immutable')
+            self.request.responseHeaders.removeHeader(b'Pragma')
+            self.request.responseHeaders.removeHeader(b'Expires')
+
+        self.request.setHeader(b'Content-Type', get_img_content_type(data, content_type))
+
+        returnValue(data)
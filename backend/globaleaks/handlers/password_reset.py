@@ -89,6 +89,7 @@ def generate_password_reset_token(session, state, tid, username_or_email):
 
 class PasswordResetHandler(BaseHandler):
     check_roles = 'none'
+    rate_limit = 'auth'
 
     def post(self):
         if State.tenant_cache[self.request.tid]['enable_password_reset'] is False:
@@ -8,6 +8,7 @@ from sqlalchemy import or_
 from globaleaks import models, LANGUAGES_SUPPORTED, LANGUAGES_SUPPORTED_CODES
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.handlers.admin.file import db_get_file
+from globaleaks.handlers.admin.modelimgs import get_img_url
 from globaleaks.handlers.admin.submission_statuses import db_retrieve_all_submission_statuses
 from globaleaks.models import get_localized_values
 from globaleaks.models.config import ConfigFactory, ConfigL10NFactory
@@ -43,8 +44,8 @@ def db_prepare_contexts_serialization(session, contexts):
     contexts_ids = [c.id for c in contexts]
 
     if contexts_ids:
-        for o in session.query(models.ContextImg).filter(models.ContextImg.id.in_(contexts_ids)):
-            data['imgs'][o.id] = o.data
+        for o in session.query(models.ContextImg.id, models.ContextImg.hash).filter(models.ContextImg.id.in_(contexts_ids)):
+            data['imgs'][o.id] = get_img_url('s/img/contexts/' + o.id, o.hash)
 
         for o in session.query(models.ReceiverContext).filter(models.ReceiverContext.context_id.in_(contexts_ids)).order_by(models.ReceiverContext.presentation_order):
             if o.context_id not in data['receivers']:
@@ -61,8 +62,8 @@ def db_prepare_receivers_serialization(session, receivers):
     receivers_ids = [r.id for r in receivers]
 
     if receivers_ids:
-        for o in session.query(models.UserImg).filter(models.UserImg.id.in_(receivers_ids)):
-            data['imgs'][o.id] = o.data
+        for o in session.query(models.UserImg.id, models.UserImg.hash).filter(models.UserImg.id.in_(receivers_ids)):
+            data['imgs'][o.id] = get_img_url('s/img/users/' + o.id, o.hash)
 
     return data
 
@@ -131,9 +132,9 @@ def db_serialize_node(session, tid, language):
     ret_dict['languages_enabled'] = models.EnabledLanguage.list(session, tid) if node_dict['wizard_done'] else list(LANGUAGES_SUPPORTED_CODES)
     ret_dict['languages_supported'] = LANGUAGES_SUPPORTED
 
-    records = session.query(models.File.id, models.File.data).filter(models.File.tid == tid, models.File.id.in_(['logo', 'favicon', 'css', 'script']))
+    records = session.query(models.File.id, models.File.hash).filter(models.File.tid == tid, models.File.id.in_(['logo', 'favicon', 'css', 'script']))
     for x in records:
-        ret_dict[x[0]] = x[1] if x[0] in ['logo', 'favicon'] else True
+        ret_dict[x[0]] = get_img_url('s/img/' + x[0], x[1]) if x[0] in ['logo', 'favicon'] else True
 
     if tid != 1:
         root_tenant_node = ConfigFactory(session, 1)
@@ -154,10 +155,10 @@ def db_serialize_node(session, tid, language):
             ret_dict['disclaimer_title'] = root_tenant_l10n.get_val('disclaimer_title', language)
             ret_dict['disclaimer_text'] = root_tenant_l10n.get_val('disclaimer_text', language)
 
-            records = session.query(models.File.id, models.File.data).filter(models.File.tid == 1, models.File.id.in_(['logo', 'favicon', 'css', 'script']))
+            records = session.query(models.File.id, models.File.hash).filter(models.File.tid == 1, models.File.id.in_(['logo', 'favicon', 'css', 'script']))
             for x in records:
                 if not ret_dict.get(x[0]):
-                    ret_dict[x[0]] = x[1] if x[0] in ['logo', 'favicon'] else True
+                    ret_dict[x[0]] = get_img_url('s/img/' + x[0], x[1]) if x[0] in ['logo', 'favicon'] else True
 
     return ret_dict
 
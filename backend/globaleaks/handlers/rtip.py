@@ -12,7 +12,8 @@ from globaleaks.handlers.admin.context import admin_serialize_context
 from globaleaks.handlers.admin.node import db_admin_serialize_node
 from globaleaks.handlers.admin.notification import db_get_notification
 from globaleaks.handlers.base import BaseHandler
-from globaleaks.handlers.custodian import serialize_identityaccessrequest
+from globaleaks.handlers.custodian import db_query_identityaccessrequests, \
+    serialize_identityaccessrequest, serialize_identityaccessrequest_row
 from globaleaks.handlers.file import db_mark_file_for_secure_deletion
 from globaleaks.handlers.operation import OperationHandler
 from globaleaks.handlers.submission import serialize_usertip, decrypt_tip
@@ -448,7 +449,8 @@ def db_get_itip_message_list(session, rtip_id):
 
 
 def db_get_rtip_identityaccessrequest_list(session, rtip_id):
-    return [serialize_identityaccessrequest(session, iar) for iar in session.query(models.IdentityAccessRequest).filter(models.IdentityAccessRequest.receivertip_id == rtip_id)]
+    return [serialize_identityaccessrequest_row(*row)
+            for row in db_query_identityaccessrequests(session, models.IdentityAccessRequest.receivertip_id == rtip_id)]
 
 
 @transact
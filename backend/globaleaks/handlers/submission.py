@@ -221,6 +221,7 @@ def serialize_itip(session, internaltip, language):
     questionnaires = []
     for ita, aqs in x:
         questionnaires.append({
+            'hash': aqs.hash,
             'steps': db_serialize_archived_questionnaire_schema(aqs.schema, language),
             'answers': ita.answers
         })
@@ -11,6 +11,7 @@ class TokenCreate(BaseHandler):
     This class implement the handler for requesting a token.
     """
     check_roles = 'none'
+    rate_limit = 'token'
 
     def post(self):
         """
@@ -24,10 +25,11 @@ class TokenCreate(BaseHandler):
 
         request = self.validate_message(self.request.content.read(), requests.TokenReqDesc)
 
+        ip_filter = self.state.tenant_cache[self.request.tid]['ip_filter'].get('whistleblower')
+
         if (request['type'] == 'submission' and (not self.state.accept_submissions or
                                                  self.state.tenant_cache[self.request.tid]['disable_submissions'])) or \
-            (self.state.tenant_cache[self.request.tid]['ip_filter_whistleblower_enable'] and
-             not check_ip(self.state.tenant_cache[self.request.tid]['ip_filter_whistleblower'], self.request.client_ip)):
+            (ip_filter is not None and not check_ip(self.request.client_ip, ip_filter)):
             raise errors.SubmissionDisabled
 
         token = self.state.tokens.new(self.request.tid, request['type'])
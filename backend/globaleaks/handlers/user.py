@@ -6,7 +6,7 @@ import pyotp
 from twisted.internet.defer import inlineCallbacks, returnValue
 
 from globaleaks import models
-from globaleaks.handlers.admin.modelimgs import db_get_model_img
+from globaleaks.handlers.admin.modelimgs import db_get_model_img_url
 from globaleaks.handlers.base import BaseHandler
 from globaleaks.handlers.operation import OperationHandler
 from globaleaks.models import get_localized_values
@@ -50,7 +50,7 @@ def user_serialize_user(session, user, language):
     :param session: the session on which perform queries.
     :return: a serialization of the object
     """
-    picture = db_get_model_img(session, 'users', user.id)
+    picture = db_get_model_img_url(session, 'users', user.id)
 
     ret_dict = {
         'id': user.id,
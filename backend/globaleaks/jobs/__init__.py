@@ -6,6 +6,7 @@ from globaleaks.jobs import anomalies, \
                             exit_nodes_refresh, \
                             notification, \
                             pgp_check, \
+                            secure_file_delete, \
                             session_management, \
                             statistics, \
                             update_check
@@ -19,6 +20,7 @@ jobs_list = [
     exit_nodes_refresh.ExitNodesRefresh,
     notification.Notification,
     pgp_check.PGPCheck,
+    secure_file_delete.SecureFileDeletion,
     session_management.SessionManagement,
     statistics.Statistics,
     update_check.UpdateCheck,
@@ -2,6 +2,8 @@
 # Implementation of the daily operations.
 import fnmatch
 import os
+import time
+
 from datetime import datetime, timedelta
 
 from sqlalchemy import not_
@@ -12,13 +14,14 @@ from twisted.internet.defer import inlineCallbacks
 from globaleaks import models
 from globaleaks.handlers.admin.node import db_admin_serialize_node
 from globaleaks.handlers.admin.notification import db_get_notification
+from globaleaks.handlers.file import mark_files_for_secure_deletion
 from globaleaks.handlers.rtip import db_delete_itips
 from globaleaks.handlers.user import user_serialize_user
 from globaleaks.jobs.job import DailyJob
 from globaleaks.orm import transact
-from globaleaks.utils.fs import overwrite_and_remove
+from globaleaks.utils.log import log
 from globaleaks.utils.templating import Templating
-from globaleaks.utils.utility import datetime_now, datetime_to_ISO8601, is_expired
+from globaleaks.utils.utility import datetime_now, datetime_to_ISO8601, deferred_sleep, is_expired
 
 
 __all__ = ['Cleaning']
@@ -27,16 +30,64 @@ __all__ = ['Cleaning']
 class Cleaning(DailyJob):
     monitor_interval = 5 * 60
 
+    # Expired submissions are deleted in batches so that the database is
+    # never locked for long; the size of the batches is adapted to keep
+    # each transaction within the time budget (seconds)
+    expired_itips_batch_size = 100
+    expired_itips_batch_size_max = 1000
+    expired_itips_time_budget = 0.2
+    expired_itips_pause = 0.1
+
+    expired_itips_deleted = 0
+    expired_itips_batches = 0
+
     @transact
-    def clean_expired_itips(self, session):
+    def clean_expired_itips_batch(self, session, limit):
+        """
+        Delete up to limit expired InternalTips along with all the related
+        DB entries and return the number of InternalTips deleted
+        """
+        itips_ids = [id[0] for id in session.query(models.InternalTip.id)
+                                            .filter(models.InternalTip.expiration_date < datetime_now())
+                                            .limit(limit)]
+        if itips_ids:
+            db_delete_itips(session, itips_ids)
+
+        return len(itips_ids)
+
+    @inlineCallbacks
+    def clean_expired_itips(self):
         """
         This function, checks all the InternalTips and their expiration date.
         if expired InternalTips are found, it removes that along with
         all the related DB entries comment and tip related.
         """
-        itips_ids = [id[0] for id in session.query(models.InternalTip.id).filter(models.InternalTip.expiration_date < datetime_now())]
-        if itips_ids:
-            db_delete_itips(session, itips_ids)
+        self.expired_itips_deleted = 0
+        self.expired_itips_batches = 0
+
+        batch_size = self.expired_itips_batch_size
+
+        while True:
+            start_time = time.time()
+            count = yield self.clean_expired_itips_batch(batch_size)
+            elapsed = time.time() - start_time
+
+            self.expired_itips_deleted += count
+            self.expired_itips_batches += 1
+
+            if count < batch_size:
+                break
+
+            log.info("Deleted %d expired submissions (batch of %d in %.3fs)",
+                     self.expired_itips_deleted, count, elapsed)
+
+            if elapsed > self.expired_itips_time_budget:
+                batch_size = max(1, batch_size // 2)
+            elif elapsed < self.expired_itips_time_budget / 2:
+                batch_size = min(batch_size * 2, self.expired_itips_batch_size_max)
+
+            # Let the pending transactions run between the batches
+            yield deferred_sleep(self.expired_itips_pause)
 
     def db_clean_expired_wbtips(self, session, tid):
         """
@@ -121,31 +172,17 @@ class Cleaning(DailyJob):
                                                           models.Tenant.creation_date < datetime_now() - timedelta(days=1))
         session.query(models.Tenant).filter(models.Tenant.id.in_(subquery)).delete(synchronize_session='fetch')
 
-    @transact
-    def get_files_to_secure_delete(self, session):
-        return [x[0] for x in session.query(models.SecureFileDelete.filepath)]
-
-    @transact
-    def commit_files_deletion(self, session, filepaths):
-        session.query(models.SecureFileDelete).filter(models.SecureFileDelete.filepath.in_(filepaths)).delete(synchronize_session='fetch')
-
     @inlineCallbacks
-    def perform_secure_deletion_of_files(self):
-        # Delete files that are marked for secure deletion
-        files_to_delete = yield self.get_files_to_secure_delete()
-        for file_to_delete in files_to_delete:
-            overwrite_and_remove(file_to_delete)
-
-        if files_to_delete:
-            yield self.commit_files_deletion(files_to_delete)
-
-        # Delete the outdated AES files older than 1 day
-        files_to_remove = [f for f in os.listdir(self.state.settings.tmp_path) if fnmatch.fnmatch(f, '*.aes')]
-        for f in files_to_remove:
+    def clean_outdated_aes_files(self):
+        # Enqueue for secure deletion the outdated AES files older than 1 day
+        filepaths = []
+        for f in os.listdir(self.state.settings.tmp_path):
             path = os.path.join(self.state.settings.tmp_path, f)
-            timestamp = datetime.fromtimestamp(os.path.getmtime(path))
-            if is_expired(timestamp, days=1):
-                overwrite_and_remove(path)
+            if fnmatch.fnmatch(f, '*.aes') and is_expired(datetime.fromtimestamp(os.path.getmtime(path)), days=1):
+                filepaths.append(path)
+
+        if filepaths:
+            yield mark_files_for_secure_deletion(filepaths)
 
     @transact
     def per_tenant_clean(self, session, tid):
@@ -162,4 +199,4 @@ class Cleaning(DailyJob):
 
         yield self.clean()
 
-        yield self.perform_secure_deletion_of_files()
+        yield self.clean_outdated_aes_files()
@@ -5,6 +5,7 @@ from twisted.internet import task, defer, reactor
 
 from globaleaks.state import State, extract_exception_traceback_and_schedule_email
 from globaleaks.utils.log import log
+from globaleaks.utils.metrics import metrics
 from globaleaks.utils.utility import datetime_now
 
 
@@ -78,6 +79,8 @@ class Job(task.LoopingCall):
         if self.high_time == -1 or current_run_time > self.high_time:
             self.high_time = current_run_time
 
+        metrics.observe_job(self.name, current_run_time / 1000.0)
+
         self.active.callback(None)
         self.active = None
 
@@ -2,6 +2,8 @@
 # Implement the notification of new submissions
 import copy
 
+from datetime import timedelta
+
 from twisted.internet import defer
 
 from globaleaks import models
@@ -16,6 +18,7 @@ from globaleaks.orm import transact
 from globaleaks.utils.log import log
 from globaleaks.utils.pgp import PGPContext
 from globaleaks.utils.templating import Templating
+from globaleaks.utils.utility import datetime_now
 
 
 trigger_template_map = {
@@ -42,6 +45,7 @@ class MailGenerator(object):
     def __init__(self, state):
         self.state = state
         self.cache = {}
+        self.answers_cache = {}
 
     def serialize_config(self, session, key, tid, language):
         cache_key = gen_cache_key(key, tid, language)
@@ -191,6 +195,8 @@ class MailGenerator(object):
         else:
             data['notification'] = self.serialize_config(session, 'notification', 1, language)
 
+        data['answers_cache'] = self.answers_cache
+
         subject, body = Templating().get_mail_subject_and_body(data)
 
         # If the receiver has encryption enabled encrypt the mail body
@@ -250,14 +256,39 @@ def delete_sent_mails(session, mail_ids):
     session.query(models.Mail).filter(models.Mail.id.in_(mail_ids)).delete(synchronize_session='fetch')
 
 
+def get_mail_retry_delay(attempts):
+    """
+    Return the delay in seconds before the next delivery attempt of a mail
+
+    The delay doubles at each failed attempt up to a maximum of one hour
+    """
+    return min(5 * 2 ** attempts, 3600)
+
+
 @transact
-def get_mails_from_the_pool(session):
-    session.query(models.Mail).filter(models.Mail.processing_attempts > 9).delete(synchronize_session='fetch')
-    session.query(models.Mail).update({'processing_attempts': models.Mail.processing_attempts + 1})
+def get_mails_from_the_pool(session, limit, max_attempts=10):
+    """
+    Load the batch of the mails scheduled for a delivery attempt
+
+    Only the selected mails are updated by rescheduling their next
+    attempt so that a mail failing to be delivered is retried with
+    an exponential backoff and discarded after max_attempts attempts.
+    """
+    now = datetime_now()
 
     ret = []
 
-    for mail in session.query(models.Mail).order_by(models.Mail.creation_date):
+    for mail in session.query(models.Mail) \
+                       .filter(models.Mail.next_attempt <= now) \
+                       .order_by(models.Mail.next_attempt) \
+                       .limit(limit):
+        if mail.processing_attempts >= max_attempts:
+            session.delete(mail)
+            continue
+
+        mail.processing_attempts += 1
+        mail.next_attempt = now + timedelta(seconds=get_mail_retry_delay(mail.processing_attempts))
+
         ret.append({
             'id': mail.id,
             'address': mail.address,
@@ -274,6 +305,9 @@ class Notification(LoopingJob):
     monitor_interval = 3 * 60
     mails_to_delete = []
 
+    # Maximum number of mails sent at each run
+    mail_batch_size = 100
+
     @defer.inlineCallbacks
     def sendmail(self, mail):
         success = yield self.state.sendmail(mail['tid'], mail['address'], mail['subject'], mail['body'])
@@ -282,9 +316,11 @@ class Notification(LoopingJob):
 
     @defer.inlineCallbacks
     def spool_emails(self):
-        mails = yield get_mails_from_the_pool()
-        for mail in mails:
-            yield self.sendmail(mail)
+        mails = yield get_mails_from_the_pool(self.mail_batch_size)
+
+        # The mails are sent concurrently; the SMTP pool bounds the
+        # number of parallel connections opened to each SMTP server
+        yield defer.DeferredList([self.sendmail(mail) for mail in mails])
 
         if self.mails_to_delete:
             yield delete_sent_mails(self.mails_to_delete)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8
+# Implementation of the secure deletion of the files enqueued for removal
+import os
+import time
+
+from twisted.internet.defer import inlineCallbacks
+from twisted.internet.threads import deferToThread
+
+from globaleaks import models
+from globaleaks.jobs.job import LoopingJob
+from globaleaks.orm import transact
+from globaleaks.utils.fs import overwrite_and_remove
+from globaleaks.utils.log import log
+from globaleaks.utils.metrics import metrics
+
+__all__ = ['SecureFileDeletion']
+
+
+class SecureFileDeletion(LoopingJob):
+    interval = 10
+    monitor_interval = 5 * 60
+
+    # The queue is kept in the database so that the pending deletions
+    # survive a restart; the files are taken in batches and deleted by a
+    # single thread limiting the I/O to max_bytes_per_second and the
+    # duration of each execution to time_budget seconds
+    batch_size = 100
+    max_bytes_per_second = 32 * 1024 * 1024
+    time_budget = 60
+
+    @transact
+    def get_files_to_secure_delete(self, session, limit):
+        return [x[0] for x in session.query(models.SecureFileDelete.filepath).distinct().limit(limit)]
+
+    @transact
+    def commit_files_deletion(self, session, filepaths):
+        if filepaths:
+            session.query(models.SecureFileDelete) \
+                   .filter(models.SecureFileDelete.filepath.in_(filepaths)) \
+                   .delete(synchronize_session=False)
+
+        return session.query(models.SecureFileDelete.filepath).distinct().count()
+
+    def throttle(self, seconds):
+        time.sleep(seconds)
+
+    def delete_files(self, filepaths):
+        """
+        Securely delete the files within the rate and the time budget
+
+        :param filepaths: The paths of the files to be deleted
+        :return: The paths processed and the number of bytes deleted
+        """
+        start = time.monotonic()
+        processed = []
+        size = 0
+
+        for filepath in filepaths:
+            elapsed = time.monotonic() - start
+            if processed and elapsed > self.time_budget:
+                break
+
+            wait = size / self.max_bytes_per_second - elapsed
+            if wait > 0:
+                self.throttle(wait)
+
+            # The entries of the files that cannot be deleted are dropped
+            # as well so that a single failure does not stall the queue
+            try:
+                if os.path.exists(filepath):
+                    size += os.path.getsize(filepath)
+                    overwrite_and_remove(filepath)
+            except Exception as excep:
+                log.err('Unable to securely delete the file %s: %s', filepath, excep)
+
+            processed.append(filepath)
+
+        return processed, size
+
+    @inlineCallbacks
+    def operation(self):
+        filepaths = yield self.get_files_to_secure_delete(self.batch_size)
+
+        processed, size = [], 0
+        if filepaths:
+            processed, size = yield deferToThread(self.delete_files, filepaths)
+            log.debug('Securely deleted %d files (%d bytes)', len(processed), size)
+
+        queue = yield self.commit_files_deletion(processed)
+
+        metrics.observe_secure_deletion(queue, len(processed), size)
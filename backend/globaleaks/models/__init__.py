@@ -338,11 +338,15 @@ class _Config(Model):
         if not isinstance(val, desc._type):
             raise ValueError("Cannot assign %s with %s" % (self, type(val)))
 
-        if self.value != val:
-            if self.value != None:
-                self.update_date = datetime_now()
+        if self.value == val:
+            return False
+
+        if self.value != None:
+            self.update_date = datetime_now()
+
+        self.value = val
 
-            self.value = val
+        return True
 
 
 class _ConfigL10N(Model):
@@ -475,9 +479,10 @@ class _ContextImg(Model):
 
     id = Column(UnicodeText(36), primary_key=True, default=uuid4)
 
-    data = Column(UnicodeText, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    hash = Column(UnicodeText(16), default='', nullable=False)
 
-    unicode_keys = ['data']
+    binary_keys = ['data']
 
     @declared_attr
     def __table_args__(self):
@@ -716,9 +721,11 @@ class _File(Model):
     id = Column(UnicodeText(36), primary_key=True, default=uuid4)
 
     name = Column(UnicodeText, default='', nullable=False)
-    data = Column(UnicodeText, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    hash = Column(UnicodeText(16), default='', nullable=False)
 
-    unicode_keys = ['data', 'name']
+    unicode_keys = ['name']
+    binary_keys = ['data']
 
     @declared_attr
     def __table_args__(self):
@@ -751,7 +758,7 @@ class _IdentityAccessRequest(Model):
     id = Column(UnicodeText(36), primary_key=True, default=uuid4, nullable=False)
 
     receivertip_id = Column(UnicodeText(36), nullable=False)
-    request_date = Column(DateTime, default=datetime_now, nullable=False)
+    request_date = Column(DateTime, default=datetime_now, nullable=False, index=True)
     request_motivation = Column(UnicodeText, default='')
     reply_date = Column(DateTime, default=datetime_null, nullable=False)
     reply_user_id = Column(UnicodeText(36), default='', nullable=False)
@@ -874,6 +881,7 @@ class _Mail(Model):
     subject = Column(UnicodeText, nullable=False)
     body = Column(UnicodeText, nullable=False)
     processing_attempts = Column(Integer, default=0, nullable=False)
+    next_attempt = Column(DateTime, default=datetime_now, nullable=False, index=True)
 
     unicode_keys = ['address', 'subject', 'body']
 
@@ -1007,7 +1015,7 @@ class _Signup(Model):
     __tablename__ = 'signup'
 
     id = Column(Integer, primary_key=True)
-    tid = Column(Integer, nullable=False)
+    tid = Column(Integer, nullable=False, index=True)
     subdomain = Column(UnicodeText, unique=True, nullable=False)
     language = Column(UnicodeText, nullable=False)
     name = Column(UnicodeText, nullable=False)
@@ -1189,10 +1197,10 @@ class _Tenant(Model):
 
     id = Column(Integer, primary_key=True, nullable=False)
 
-    label = Column(UnicodeText, default='', nullable=False)
+    label = Column(UnicodeText, default='', nullable=False, index=True)
     active = Column(Boolean, default=False, nullable=False)
-    creation_date = Column(DateTime, default=datetime_now, nullable=False)
-    subdomain = Column(UnicodeText, default='', nullable=False)
+    creation_date = Column(DateTime, default=datetime_now, nullable=False, index=True)
+    subdomain = Column(UnicodeText, default='', nullable=False, index=True)
 
     unicode_keys = ['label', 'subdomain']
     bool_keys = ['active']
@@ -1293,9 +1301,10 @@ class _UserImg(Model):
 
     id = Column(UnicodeText(36), primary_key=True, default=uuid4)
 
-    data = Column(UnicodeText, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    hash = Column(UnicodeText(16), default='', nullable=False)
 
-    unicode_keys = ['data']
+    binary_keys = ['data']
 
     @declared_attr
     def __table_args__(self):
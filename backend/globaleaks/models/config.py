@@ -27,14 +27,15 @@ class ConfigFactory(object):
     def __init__(self, session, tid):
         self.session = session
         self.tid = tid
+        self.changed = set()
 
     def get_all(self, group):
         return {c.var_name: c for c in self.session.query(Config).filter(Config.tid == self.tid, Config.var_name.in_(ConfigFilters[group]))}
 
     def update(self, group, data):
         for k, v in self.get_all(group).items():
-            if k in data:
-                v.set_v(data[k])
+            if k in data and v.set_v(data[k]):
+                self.changed.add(k)
 
     def get_cfg(self, var_name):
         return self.session.query(Config).filter(Config.tid == self.tid, Config.var_name == var_name).one()
@@ -43,7 +44,8 @@ class ConfigFactory(object):
         return self.get_cfg(var_name).value
 
     def set_val(self, var_name, value):
-        self.get_cfg(var_name).set_v(value)
+        if self.get_cfg(var_name).set_v(value):
+            self.changed.add(var_name)
 
     def serialize(self, group):
         return {k: v.value for k, v in self.get_all(group).items()}
@@ -67,9 +69,9 @@ class ConfigL10NFactory(object):
         self.tid = tid
 
     def initialize(self, keys, lang, data):
-        for key in keys:
-            value = data[key][lang] if key in data else ''
-            self.session.add(ConfigL10N({'tid': self.tid, 'lang': lang, 'var_name': key, 'value': value}))
+        rows = [{'tid': self.tid, 'lang': lang, 'var_name': key, 'value': data[key][lang] if key in data else ''} for key in keys]
+        if rows:
+            self.session.bulk_insert_mappings(ConfigL10N, rows)
 
     def get_all(self, group, lang):
         return [r for r in self.session.query(ConfigL10N).filter(ConfigL10N.tid == self.tid, ConfigL10N.lang == lang, ConfigL10N.var_name.in_(ConfigL10NFilters[group]))]
@@ -140,8 +142,7 @@ def initialize_config(session, tid, mode):
         for name in inherit_from_root_tenant:
             variables[name] = root_tenant_node[name]
 
-    for name, value in variables.items():
-        session.add(Config({'tid': tid, 'var_name': name, 'value': value}))
+    session.bulk_insert_mappings(Config, [{'tid': tid, 'var_name': name, 'value': value} for name, value in variables.items()])
 
 
 def add_new_lang(session, tid, lang, appdata_dict):
@@ -10,6 +10,8 @@ from sqlalchemy.orm import sessionmaker
 from twisted.internet import reactor
 from twisted.internet.threads import deferToThreadPool
 
+from globaleaks.utils.metrics import metrics
+
 _DEBUG = False
 _DB_URI = 'sqlite:'
 _THREAD_POOL = None
@@ -82,7 +84,7 @@ class transact(object):
         return self
 
     def __call__(self, *args, **kwargs):
-        return self.run(self._wrap, self.method, *args, **kwargs)
+        return self.run(self._wrap, self.method, time.time(), *args, **kwargs)
 
     def run(self, function, *args, **kwargs):
         return deferToThreadPool(reactor,
@@ -91,13 +93,15 @@ class transact(object):
                                  *args,
                                  **kwargs)
 
-    def _wrap(self, function, *args, **kwargs):
+    def _wrap(self, function, queue_time, *args, **kwargs):
         """
         Wrap provided function calling it inside a thread and
         passing the ORM session to it.
         """
+        start_time = time.time()
         session = get_session()
         retries = 0
+        success = False
 
         try:
             while True:
@@ -124,10 +128,13 @@ class transact(object):
                     session.rollback()
                     raise
                 else:
+                    success = True
                     return result
         finally:
             session.close()
 
+            metrics.observe_transaction(start_time - queue_time, time.time() - start_time, retries, success)
+
 
 class transact_sync(transact):
     def run(self, function, *args, **kwargs):
@@ -5,8 +5,10 @@
 #   This file defines the URI mapping for the GlobaLeaks API and its factory
 
 import json
+import math
 import re
 import sys
+import time
 
 from urllib.parse import urlsplit # pylint: disable=import-error
 
@@ -52,9 +54,12 @@ from globaleaks.handlers.admin import step as admin_step
 from globaleaks.handlers.admin import tenant as admin_tenant
 from globaleaks.handlers.admin import user as admin_user
 from globaleaks.handlers.admin import submission_statuses as admin_submission_statuses
+from globaleaks.handlers.base import StreamingFileUpload
 from globaleaks.rest import decorators, requests, errors
 from globaleaks.settings import Settings
 from globaleaks.state import State, extract_exception_traceback_and_schedule_email
+from globaleaks.utils.metrics import metrics
+from globaleaks.utils.ratelimit import RateLimiter
 
 tid_regexp = r'([0-9]+)'
 uuid_regexp = r'([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})'
@@ -147,6 +152,7 @@ api_spec = [
     (r'/admin/activities/(summary|details)', admin_statistics.RecentEventsCollection),
     (r'/admin/anomalies', admin_statistics.AnomalyCollection),
     (r'/admin/jobs', admin_statistics.JobsTiming),
+    (r'/admin/metrics', admin_statistics.MetricsHandler),
     (r'/admin/l10n/(' + '|'.join(LANGUAGES_SUPPORTED_CODES) + ')', admin_l10n.AdminL10NHandler),
     (r'/admin/files/(logo|favicon|css|script)', admin_file.FileInstance),
     (r'/admin/config', admin_operation.AdminOperationHandler),
@@ -156,6 +162,7 @@ api_spec = [
     (r'/admin/files$', admin_file.FileCollection),
     (r'/admin/files/(.+)', admin_file.FileInstance),
     (r'/admin/tenants', admin_tenant.TenantCollection),
+    (r'/admin/tenants/batch', admin_tenant.TenantBatchCollection),
     (r'/admin/tenants/' + '([0-9]{1,20})', admin_tenant.TenantInstance),
     (r'/admin/manifest', admin_manifest.ManifestHandler),
     (r'/admin/submission_statuses', admin_submission_statuses.SubmissionStatusCollection),
@@ -175,6 +182,8 @@ api_spec = [
     ## Special Files Handlers##
     (r'/robots.txt', robots.RobotstxtHandler),
     (r'/sitemap.xml', sitemap.SitemapHandler),
+    (r'/s/img/(logo|favicon)', file.ImageHandler),
+    (r'/s/img/(users|contexts)/' + uuid_regexp, file.ImageHandler),
     (r'/s/(.+)', file.FileHandler),
     (r'/l10n/(' + '|'.join(LANGUAGES_SUPPORTED_CODES) + ')', l10n.L10NHandler),
 
@@ -185,6 +194,31 @@ api_spec = [
 ]
 
 
+def get_tenant_id_and_path(hostname, path):
+    """
+    Return the id of the tenant addressed by a request and the path
+    of the resource requested relative to the tenant
+    """
+    if (hostname == b'localhost' or
+        isIPAddress(hostname) or
+        isIPv6Address(hostname)):
+        tid = 1
+    else:
+        tid = State.tenant_hostname_id_map.get(hostname, None)
+
+    if tid == 1:
+        match = re.match(b'^/t/([0-9]+)(/.*)', path)
+    else:
+        match = re.match(b'^/t/(1)(/.*)', path)
+
+    if match is not None:
+        groups = match.groups()
+        if int(groups[0]) in State.tenant_cache:
+            tid, path = int(groups[0]), groups[1]
+
+    return tid, path
+
+
 class APIResourceWrapper(Resource):
     _registry = None
     isLeaf = True
@@ -194,6 +228,7 @@ class APIResourceWrapper(Resource):
         Resource.__init__(self)
         self._registry = []
         self.handler = None
+        self.rate_limiter = RateLimiter()
 
         for tup in api_spec:
             args = {}
@@ -281,28 +316,75 @@ class APIResourceWrapper(Resource):
 
         request.write(response.encode())
 
+    def match_route(self, request_path):
+        """
+        Return the handler, the arguments and the match of the route of a path
+        """
+        for regexp, handler, args in self._registry:
+            try:
+                match = regexp.match(request_path)
+            except UnicodeDecodeError:
+                match = None
+            if match:
+                return handler, args, match
+
+        return None, None, None
+
+    def check_rate_limit(self, request, handler, method):
+        rate_limit = 'upload' if handler.upload_handler and method == 'post' else handler.rate_limit
+        return self.rate_limiter.check(request.tid, request.client_ip, rate_limit, request.client_using_tor)
+
+    def prepare_upload(self, request, boundary):
+        """
+        Return the parser streaming to disk the body of an upload request
+
+        The body is streamed only once the request has been routed to an upload
+        handler, admitted by the rate limiter and authenticated; the body of the
+        other requests is buffered and dispatched by render as usual.
+
+        Requests that would be rejected anyway are answered before receiving
+        their body by raising the corresponding GLException.
+        """
+        self.preprocess(request)
+
+        if request.tid is None or \
+           self.should_redirect_tor(request) or \
+           self.should_redirect_https(request):
+            return
+
+        self.set_headers(request)
+
+        try:
+            request_path = request.path.decode()
+        except UnicodeDecodeError:
+            return
+
+        handler, args, match = self.match_route(request_path)
+        if match is None or not handler.upload_handler or not hasattr(handler, 'post'):
+            return
+
+        wait = self.check_rate_limit(request, handler, 'post')
+        if wait:
+            request.setHeader(b'Retry-After', b'%d' % math.ceil(wait))
+            raise errors.TooManyRequests
+
+        h = handler(State, request, **args)
+
+        if h.root_tenant_only and request.tid != 1:
+            raise errors.ForbiddenOperation
+
+        decorators.check_authentication(h, decorators.get_roles(handler))
+
+        h.check_upload(*match.groups())
+
+        return StreamingFileUpload(State, request.tid, boundary, h.get_upload_scope())
+
     def preprocess(self, request):
         request.headers = request.getAllHeaders()
         request.hostname = request.getRequestHostname()
         request.port = request.getHost().port
 
-        if (request.hostname == b'localhost' or
-            isIPAddress(request.hostname) or
-            isIPv6Address(request.hostname)):
-            request.tid = 1
-        else:
-            request.tid = State.tenant_hostname_id_map.get(request.hostname, None)
-
-        if request.tid == 1:
-            match = re.match(b'^/t/([0-9]+)(/.*)', request.path)
-        else:
-            match = re.match(b'^/t/(1)(/.*)', request.path)
-
-        if match is not None:
-            groups = match.groups()
-            tid = int(groups[0])
-            if tid in State.tenant_cache:
-                request.tid, request.path = tid, groups[1]
+        request.tid, request.path = get_tenant_id_and_path(request.hostname, request.path)
 
         request.client_ip = request.getClientIP()
         request.client_proto = b'https' if request.port in [443, 8443] else b'http'
@@ -331,10 +413,18 @@ class APIResourceWrapper(Resource):
         @return: empty `str` or `NOT_DONE_YET`
         """
         request_finished = [False]
+        request_route = ['none']
+        request_start = time.time()
 
         def _finish(ret):
             request_finished[0] = True
 
+            method = request.method.decode(errors='replace').lower()
+            if method not in self.method_map:
+                method = 'other'
+
+            metrics.observe_request(request_route[0], method, request.code, time.time() - request_start)
+
         request.notifyFinish().addBoth(_finish)
 
         self.preprocess(request)
@@ -361,19 +451,14 @@ class APIResourceWrapper(Resource):
             request.redirect(State.tenant_cache[request.tid]['redirects'][request_path])
             return b''
 
-        match = None
-        for regexp, handler, args in self._registry:
-            try:
-                match = regexp.match(request_path)
-            except UnicodeDecodeError:
-                match = None
-            if match:
-                break
+        handler, args, match = self.match_route(request_path)
 
         if match is None:
             self.handle_exception(errors.ResourceNotFound(), request)
             return b''
 
+        request_route[0] = handler.__name__
+
         method = request.method.lower().decode()
 
         if method == 'head':
@@ -383,6 +468,16 @@ class APIResourceWrapper(Resource):
             self.handle_exception(errors.MethodNotImplemented(), request)
             return b''
 
+        # The rate limit is enforced before instantiating the handler so that
+        # rejected requests do not allocate sessions or tokens; the uploads
+        # streamed while receiving have been already admitted by prepare_upload
+        if getattr(request, 'upload', None) is None:
+            wait = self.check_rate_limit(request, handler, method)
+            if wait:
+                request.setHeader(b'Retry-After', b'%d' % math.ceil(wait))
+                self.handle_exception(errors.TooManyRequests(), request)
+                return b''
+
         f = getattr(handler, method)
         groups = [g for g in match.groups()]
 
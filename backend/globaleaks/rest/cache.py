@@ -2,6 +2,9 @@
 import gzip
 import io
 
+from globaleaks.utils.crypto import sha256
+
+
 def gzipdata(data):
     if isinstance(data, str):
         data = data.encode()
@@ -16,14 +19,19 @@ def gzipdata(data):
 
 class Cache(object):
     memory_cache_dict = {}
+    hits = 0
+    misses = 0
 
     @classmethod
     def get(cls, tid, resource, language):
         if tid in cls.memory_cache_dict \
            and resource in cls.memory_cache_dict[tid] \
            and language in cls.memory_cache_dict[tid][resource]:
+            cls.hits += 1
             return cls.memory_cache_dict[tid][resource][language]
 
+        cls.misses += 1
+
     @classmethod
     def set(cls, tid, resource, language, content_type, data):
         data = gzipdata(data)
@@ -34,7 +42,7 @@ class Cache(object):
         if resource not in Cache.memory_cache_dict[tid]:
             cls.memory_cache_dict[tid][resource] = {}
 
-        entry = (content_type, data)
+        entry = (content_type, data, b'"' + sha256(data)[:32] + b'"')
 
         cls.memory_cache_dict[tid][resource][language] = entry
 
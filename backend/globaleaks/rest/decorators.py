@@ -8,20 +8,33 @@ from globaleaks.rest.cache import Cache
 from globaleaks.state import State
 
 
-def decorator_authentication(f, roles):
-    def wrapper(self, *args, **kwargs):
-        if self.state.tenant_cache[self.request.tid].basic_auth and not self.bypass_basic_auth:
-            self.basic_auth()
+def get_roles(h):
+    value = getattr(h, 'check_roles')
+    if isinstance(value, str):
+        value = {value}
+
+    return value
+
+
+def check_authentication(handler, roles):
+    if handler.state.tenant_cache[handler.request.tid].basic_auth and not handler.bypass_basic_auth:
+        handler.basic_auth()
 
-        if (('none' in roles) or
-            ((self.current_user and self.current_user.tid == self.request.tid) and
-             (('user' in roles and
-               self.current_user.user_role in ['admin', 'receiver', 'custodian']) or
-              (self.current_user.user_role in roles)))):
+    if (('none' in roles) or
+        ((handler.current_user and handler.current_user.tid == handler.request.tid) and
+         (('user' in roles and
+           handler.current_user.user_role in ['admin', 'receiver', 'custodian']) or
+          (handler.current_user.user_role in roles)))):
+        return
 
-            return f(self, *args, **kwargs)
+    raise errors.NotAuthenticated
 
-        raise errors.NotAuthenticated
+
+def decorator_authentication(f, roles):
+    def wrapper(self, *args, **kwargs):
+        check_authentication(self, roles)
+
+        return f(self, *args, **kwargs)
 
     return wrapper
 
@@ -79,9 +92,7 @@ def decorator_refresh_connection_handpoints(f):
 
 
 def decorate_method(h, method):
-    value = getattr(h, 'check_roles')
-    if isinstance(value, str):
-        value = {value}
+    value = get_roles(h)
 
     f = getattr(h, method)
 
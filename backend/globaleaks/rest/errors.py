@@ -203,3 +203,9 @@ class SessionExpired(GLException):
     reason = "Session expired"
     error_code = 17
     status_code = 401
+
+
+class TooManyRequests(GLException):
+    reason = "Too many requests"
+    error_code = 18
+    status_code = 429
@@ -13,6 +13,7 @@ from globaleaks.models.config import ConfigFactory
 from globaleaks.orm import transact
 from globaleaks.rest.cache import Cache
 from globaleaks.services.service import Service
+from globaleaks.settings import Settings
 from globaleaks.state import State
 from globaleaks.utils.utility import deferred_sleep
 from globaleaks.utils.log import log
@@ -58,6 +59,9 @@ class OnionService(Service):
     tor_conn = None
     hs_map = {}
     startup_semaphore = {}
+    provisioning_total = 0
+    provisioning_completed = 0
+    provisioning_failed = 0
 
     def reset(self):
         self.tor_con = None
@@ -76,13 +80,46 @@ class OnionService(Service):
 
     @defer.inlineCallbacks
     def add_all_hidden_services(self):
+        """
+        Provision the onion services of all the tenants with a bounded
+        parallelism giving priority to the services with an existing key
+        """
         if self.tor_conn is None:
             return
 
         hostname_key_list = yield list_onion_service_info()
-        for tid, hostname, key in hostname_key_list:
-            if hostname not in self.hs_map:
-                yield self.add_hidden_service(tid, hostname, key)
+        hostname_key_list = [x for x in hostname_key_list if x[1] not in self.hs_map]
+        hostname_key_list.sort(key=lambda x: not x[2])
+
+        self.provisioning_total = len(hostname_key_list)
+        self.provisioning_completed = 0
+        self.provisioning_failed = 0
+
+        if not hostname_key_list:
+            return
+
+        log.info('Provisioning %d onion services', self.provisioning_total)
+
+        semaphore = defer.DeferredSemaphore(max(1, Settings.onion_provisioning_concurrency))
+
+        yield defer.DeferredList([semaphore.run(self.provision_hidden_service, tid, hostname, key)
+                                  for tid, hostname, key in hostname_key_list])
+
+        log.info('Provisioning of the onion services completed: %d/%d (%d failed)',
+                 self.provisioning_completed, self.provisioning_total, self.provisioning_failed)
+
+    @defer.inlineCallbacks
+    def provision_hidden_service(self, tid, hostname, key):
+        try:
+            yield self.add_hidden_service(tid, hostname, key)
+            self.provisioning_completed += 1
+        except Exception as e:
+            self.provisioning_failed += 1
+            log.err('Failed to provision the onion service: %s', e, tid=tid)
+
+        done = self.provisioning_completed + self.provisioning_failed
+        if done % 10 == 0 or done == self.provisioning_total:
+            log.info('Onion services provisioned: %d/%d', done, self.provisioning_total)
 
     def add_hidden_service(self, tid, hostname, key):
         if self.tor_conn is None:
@@ -120,7 +157,7 @@ class OnionService(Service):
                 for x in tid_list:
                     Cache().invalidate(x)
 
-                yield refresh_memory_variables(tid_list)
+                yield refresh_memory_variables([tid], {'onionservice'})
 
                 del self.startup_semaphore[tid]
 
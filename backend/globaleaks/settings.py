@@ -129,6 +129,12 @@ class SettingsClass(object, metaclass=Singleton):
         self.log_file_size = 1000000  # 1MB
         self.num_log_files = self.log_size / self.log_file_size
 
+        # Policy applied when the buffer of the log writer is full ('drop' or 'block')
+        self.log_buffer_policy = 'drop'
+
+        # Number of onion services provisioned concurrently on the Tor control port
+        self.onion_provisioning_concurrency = 8
+
         self.AES_key_id_regexp = '[A-Za-z0-9]{16}'
         self.AES_file_regexp = r'(.*)\.aes'
         self.AES_file_regexp_comp = re.compile(self.AES_file_regexp)
@@ -188,6 +194,10 @@ class SettingsClass(object, metaclass=Singleton):
     def load_cmdline_options(self):
         self.nodaemon = self.cmdline_options.nodaemon
 
+        self.log_buffer_policy = self.cmdline_options.log_buffer_policy
+
+        self.onion_provisioning_concurrency = self.cmdline_options.onion_provisioning_concurrency
+
         if self.cmdline_options.disable_swap:
             self.disable_swap = True
 
@@ -23,6 +23,7 @@ from globaleaks.utils.singleton import Singleton
 from globaleaks.utils.sni import SNIMap
 from globaleaks.utils.tempdict import TempDict
 from globaleaks.utils.templating import Templating
+from globaleaks.utils.tempupload import TempUploadRegistry
 from globaleaks.utils.token import TokenList
 from globaleaks.utils.tor_exit_set import TorExitSet
 from globaleaks.utils.utility import datetime_now
@@ -75,7 +76,7 @@ class StateClass(ObjectDict, metaclass=Singleton):
         self.tenant_hostname_id_map = {}
 
         self.set_orm_tp(ThreadPool(4, 16))
-        self.TempUploadFiles = TempDict(timeout=3600)
+        self.TempUploadFiles = TempUploadRegistry(timeout=3600)
 
         self.shutdown = False
 
@@ -139,30 +140,30 @@ class StateClass(ObjectDict, metaclass=Singleton):
         temporally_encrypted_dir
         """
         # temporary .aes files must be simply deleted
-        for f in os.listdir(self.settings.tmp_path):
-            path = os.path.join(self.settings.tmp_path, f)
-            log.debug("Removing old temporary file: %s", path)
+        with os.scandir(self.settings.tmp_path) as it:
+            for entry in it:
+                log.debug("Removing old temporary file: %s", entry.path)
 
-            try:
-                os.remove(path)
-            except OSError as excep:
-                log.debug("Error while evaluating removal for %s: %s", path, excep.strerror)
+                try:
+                    os.remove(entry.path)
+                except OSError as excep:
+                    log.debug("Error while evaluating removal for %s: %s", entry.path, excep.strerror)
 
         # temporary .aes files with lost keys can be deleted
         # while temporary .aes files with valid current key
         # will be automagically handled by delivery sched.
-        keypath = os.path.join(self.settings.tmp_path, self.settings.AES_keyfile_prefix)
-
-        for f in os.listdir(self.settings.attachments_path):
-            path = os.path.join(self.settings.attachments_path, f)
-            try:
-                result = self.settings.AES_file_regexp_comp.match(f)
-                if result is not None:
-                    if not os.path.isfile("%s%s" % (keypath, result.group(1))):
-                        log.debug("Removing old encrypted file (lost key): %s", path)
-                        os.remove(path)
-            except Exception as excep:
-                log.debug("Error while evaluating removal for %s: %s", path, excep)
+        keyfiles = set(os.listdir(self.settings.tmp_path))
+
+        with os.scandir(self.settings.attachments_path) as it:
+            for entry in it:
+                try:
+                    result = self.settings.AES_file_regexp_comp.match(entry.name)
+                    if result is not None:
+                        if self.settings.AES_keyfile_prefix + result.group(1) not in keyfiles:
+                            log.debug("Removing old encrypted file (lost key): %s", entry.path)
+                            os.remove(entry.path)
+                except Exception as excep:
+                    log.debug("Error while evaluating removal for %s: %s", entry.path, excep)
 
     def get_mail_counter(self, receiver_id):
         return self.mail_counters.get(receiver_id, 0)
@@ -265,9 +266,7 @@ class StateClass(ObjectDict, metaclass=Singleton):
         db_schedule_email(session, tid, user_desc['mail_address'], subject, body)
 
     def get_tmp_file_by_name(self, filename):
-        for k, v in self.TempUploadFiles.items():
-            if os.path.basename(v.filepath) == filename:
-                return self.TempUploadFiles.pop(k)
+        return self.TempUploadFiles.pop_by_name(filename)
 
 
 def mail_exception_handler(etype, value, tback):
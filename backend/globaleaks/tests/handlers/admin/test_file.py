@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import base64
 
 from globaleaks.handlers.admin import file
 from globaleaks.tests import helpers
@@ -15,7 +16,7 @@ class TestFileInstance(helpers.TestHandler):
         yield handler.post(u'antani')
 
         img = yield file.get_file(1, u'antani')
-        self.assertEqual(img, helpers.VALID_BASE64_IMG)
+        self.assertEqual(img, base64.b64decode(helpers.VALID_BASE64_IMG))
 
     @inlineCallbacks
     def test_delete(self):
@@ -23,7 +24,7 @@ class TestFileInstance(helpers.TestHandler):
         yield handler.delete(u'antani')
 
         img = yield file.get_file(1, u'antani')
-        self.assertEqual(img, '')
+        self.assertEqual(img, b'')
 
 
 class TestFileCollection(helpers.TestHandler):
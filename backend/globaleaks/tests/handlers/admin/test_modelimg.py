@@ -14,7 +14,7 @@ class TestModelImgInstance(helpers.TestHandlerWithPopulatedDB):
         yield handler.post('users', self.dummyReceiverUser_1['id'])
 
         img = yield modelimgs.get_model_img('users', self.dummyReceiverUser_1['id'])
-        self.assertNotEqual(img, '')
+        self.assertNotEqual(img, b'')
 
     @inlineCallbacks
     def test_delete(self):
@@ -22,4 +22,4 @@ class TestModelImgInstance(helpers.TestHandlerWithPopulatedDB):
         yield handler.delete('users', self.dummyReceiverUser_1['id'])
 
         img = yield modelimgs.get_model_img('users', self.dummyReceiverUser_1['id'])
-        self.assertEqual(img, '')
+        self.assertEqual(img, b'')
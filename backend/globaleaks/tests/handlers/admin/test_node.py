@@ -164,3 +164,22 @@ class TestNodeInstance(helpers.TestHandlerWithPopulatedDB):
 
         smtp_server = yield get_config_value(1, 'smtp_server')
         self.assertNotEqual('not.a.real.smtpserver', smtp_server)
+
+    @inlineCallbacks
+    def test_put_update_node_refreshes_tenant_cache(self):
+        self.dummyNode['ip_filter_admin_enable'] = True
+        self.dummyNode['ip_filter_admin'] = '192.168.2.0/24'
+
+        handler = self.request(self.dummyNode, role='admin')
+        yield handler.put()
+
+        self.assertIn('admin', self.state.tenant_cache[1].ip_filter)
+
+        self.dummyNode['ip_filter_admin_enable'] = False
+
+        handler = self.request(self.dummyNode, role='admin')
+        yield handler.put()
+
+        self.assertNotIn('admin', self.state.tenant_cache[1].ip_filter)
+        self.assertEqual(sorted(self.state.tenant_cache[1].languages_enabled),
+                         sorted(self.dummyNode['languages_enabled']))
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import json
 import os
 
 from sqlalchemy.exc import IntegrityError
@@ -11,7 +12,7 @@ from globaleaks.models import Questionnaire
 from globaleaks.orm import transact
 from globaleaks.rest import errors
 from globaleaks.tests import helpers
-from globaleaks.utils.utility import read_json_file
+from globaleaks.utils.utility import read_json_file, uuid4
 
 
 class TestQuestionnairesCollection(helpers.TestCollectionHandler):
@@ -84,3 +85,78 @@ class TestQuestionnareDuplication(helpers.TestHandlerWithPopulatedDB):
 
         new_questionnare = yield self.get_new_questionnare()
         self.assertEqual(new_questionnare.name, 'Duplicated Default')
+
+    @transact
+    def get_questionnaire_id(self, session, name):
+        return session.query(models.Questionnaire.id).filter(models.Questionnaire.name == name).one()[0]
+
+    @inlineCallbacks
+    def test_duplicate_questionnaire_with_triggers(self):
+        checkbox = helpers.get_dummy_field()
+        checkbox['id'] = uuid4()
+        checkbox['instance'] = 'instance'
+        checkbox['attrs'] = {'min_len': {'type': 'int', 'value': '1'}}
+
+        inputbox = helpers.get_dummy_field()
+        inputbox['id'] = uuid4()
+        inputbox['instance'] = 'instance'
+        inputbox['type'] = 'inputbox'
+        inputbox['options'] = []
+        inputbox['y'] = 2
+        inputbox['triggered_by_options'] = [{'field': checkbox['id'], 'option': checkbox['options'][0]['id'], 'sufficient': True}]
+
+        group = helpers.get_dummy_field()
+        group['id'] = uuid4()
+        group['instance'] = 'instance'
+        group['type'] = 'fieldgroup'
+        group['options'] = []
+        group['children'] = [checkbox, inputbox]
+
+        step1 = helpers.get_dummy_step()
+        step1['id'] = uuid4()
+        step1['children'] = [group]
+
+        step2 = helpers.get_dummy_step()
+        step2['id'] = uuid4()
+        step2['presentation_order'] = 1
+        step2['triggered_by_options'] = [{'field': checkbox['id'], 'option': checkbox['options'][1]['id'], 'sufficient': False}]
+
+        yield questionnaire.create_questionnaire(1, {'id': uuid4(), 'name': 'Original', 'steps': [step1, step2]}, 'en')
+
+        original_id = yield self.get_questionnaire_id('Original')
+
+        handler = self.request({'questionnaire_id': original_id, 'new_name': 'Copy'}, role='admin')
+        yield handler.post()
+
+        copy_id = yield self.get_questionnaire_id('Copy')
+
+        original = yield questionnaire.get_questionnaire(1, original_id, 'en')
+        copy = yield questionnaire.get_questionnaire(1, copy_id, 'en')
+
+        # Replace the IDs of the original with the ones assigned to the copy
+        id_map = {}
+
+        def map_ids(a, b):
+            id_map[a['id']] = b['id']
+            for key in ['options', 'children']:
+                for x, y in zip(a.get(key, []), b.get(key, [])):
+                    map_ids(x, y)
+
+            for name, attr in a.get('attrs', {}).items():
+                id_map[attr['id']] = b['attrs'][name]['id']
+
+        map_ids(original, copy)
+        for x, y in zip(original['steps'], copy['steps']):
+            map_ids(x, y)
+
+        self.assertEqual(len(set(id_map.values())), 9)
+        self.assertTrue(set(id_map.keys()).isdisjoint(id_map.values()))
+
+        original = json.dumps(original)
+        for old_id, new_id in id_map.items():
+            original = original.replace(old_id, new_id)
+
+        original = json.loads(original)
+        original['name'] = 'Copy'
+
+        self.assertEqual(original, copy)
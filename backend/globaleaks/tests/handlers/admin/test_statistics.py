@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
+from twisted.internet.address import IPv4Address
 from twisted.internet.defer import inlineCallbacks
 
 from globaleaks import anomaly
 from globaleaks.handlers.admin import statistics
 from globaleaks.jobs.anomalies import Anomalies
 from globaleaks.jobs.statistics import Statistics
+from globaleaks.rest import errors
+from globaleaks.sessions import Sessions
 from globaleaks.tests import helpers
 
 
@@ -84,3 +87,35 @@ class TestJobsTiming(helpers.TestHandler):
         handler = self.request({}, role='admin')
 
         yield handler.get()
+
+
+class TestMetricsHandler(helpers.TestHandler):
+    _handler = statistics.MetricsHandler
+
+    @inlineCallbacks
+    def test_get(self):
+        yield Statistics().run()
+
+        handler = self.request({}, client_addr=IPv4Address('TCP', '127.0.0.1', 12345))
+        response = yield handler.get()
+
+        for metric in ['globaleaks_http_requests_total',
+                       'globaleaks_job_duration_seconds_count{job="Statistics"}',
+                       'globaleaks_orm_transactions_total',
+                       'globaleaks_orm_queue_depth',
+                       'globaleaks_mail_spool_size',
+                       'globaleaks_pending_uploads']:
+            self.assertIn(metric, response)
+
+    @inlineCallbacks
+    def test_get_from_remote_address(self):
+        handler = self.request({})
+        yield self.assertFailure(handler.get(), errors.NotAuthenticated)
+
+        handler = self.request({}, role='admin')
+        yield handler.get()
+
+        # the administrators of the other tenants cannot access the metrics
+        session = Sessions.new(2, self.dummyAdminUser['id'], 2, 'admin', False, False, '')
+        handler = self.request({}, headers={'x-session': session.id})
+        yield self.assertFailure(handler.get(), errors.NotAuthenticated)
@@ -5,6 +5,8 @@ from globaleaks.db import refresh_memory_variables
 from globaleaks.handlers.admin import tenant
 from globaleaks.models import config
 from globaleaks.orm import tw
+from globaleaks.rest import errors
+from globaleaks.state import State
 from globaleaks.tests import helpers
 
 
@@ -32,6 +34,41 @@ class TestTenantCollection(helpers.TestHandlerWithPopulatedDB):
 
         self.assertEqual(len(response), self.population_of_tenants + n)
 
+    @inlineCallbacks
+    def test_get_paginated(self):
+        for i in range(5):
+            desc = get_dummy_tenant_desc()
+            desc['label'] = 'paginated-%d' % i
+            desc['subdomain'] = 'paginated%d' % i
+            if i % 2 == 0:
+                yield tenant.create(desc)
+            else:
+                # Tenants preallocated by the signup are not active
+                desc['active'] = False
+                yield tw(tenant.db_preallocate, desc)
+
+        handler = self.request(role='admin')
+        handler.request.args = {b'label': [b'paginated'], b'sort': [b'-label'], b'limit': [b'2'], b'offset': [b'1']}
+        response = yield handler.get()
+        self.assertEqual([t['label'] for t in response], ['paginated-3', 'paginated-2'])
+
+        handler = self.request(role='admin')
+        handler.request.args = {b'subdomain': [b'paginated'], b'active': [b'false']}
+        response = yield handler.get()
+        self.assertEqual([t['label'] for t in response], ['paginated-1', 'paginated-3'])
+
+        # the wildcards of the filters are matched literally
+        for args in [{b'label': [b'paginated_']}, {b'subdomain': [b'%']}]:
+            handler = self.request(role='admin')
+            handler.request.args = args
+            response = yield handler.get()
+            self.assertEqual(response, [])
+
+        for args in [{b'limit': [b'0']}, {b'offset': [b'-1']}, {b'active': [b'maybe']}, {b'sort': [b'email']}]:
+            handler = self.request(role='admin')
+            handler.request.args = args
+            self.assertRaises(errors.InputValidationError, handler.get)
+
     @inlineCallbacks
     def test_post(self):
         r = {}
@@ -46,6 +83,31 @@ class TestTenantCollection(helpers.TestHandlerWithPopulatedDB):
         self.assertNotEqual(r[2], r[0])
 
 
+class TestTenantBatchCollection(helpers.TestHandlerWithPopulatedDB):
+    _handler = tenant.TenantBatchCollection
+
+    @inlineCallbacks
+    def test_post(self):
+        handler = self.request([get_dummy_tenant_desc() for _ in range(3)], role='admin')
+        response = yield handler.post()
+
+        self.assertEqual(len(response), 3)
+
+        salts = set()
+        for t in response:
+            self.assertIn(t['id'], State.tenant_cache)
+            self.assertEqual(t['mode'], 'default')
+            salt = yield tw(config.db_get_config_variable, t['id'], 'receipt_salt')
+            salts.add(salt)
+
+        self.assertEqual(len(salts), 3)
+
+    def test_post_invalid_request(self):
+        handler = self.request(get_dummy_tenant_desc(), role='admin')
+
+        self.assertRaises(errors.InputValidationError, handler.post)
+
+
 class TestTenantInstance(helpers.TestHandlerWithPopulatedDB):
     _handler = tenant.TenantInstance
 
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 import json
 
-from globaleaks.handlers.base import BaseHandler
-from globaleaks.rest.errors import InputValidationError
+from globaleaks.handlers.base import BaseHandler, StreamingFileUpload
+from globaleaks.rest.errors import FileTooBig, InputValidationError
 from globaleaks.tests import helpers
 
 FUTURE = 100
@@ -69,3 +69,57 @@ class TestBaseHandler(helpers.TestHandlerWithPopulatedDB):
     def test_validate_regexp_valid(self):
         self.assertTrue(BaseHandler.validate_regexp('Foca', '\w+'))
         self.assertFalse(BaseHandler.validate_regexp('Foca', '\d+'))
+
+
+class TestStreamingFileUpload(helpers.TestGL):
+    boundary = b'----GlobaLeaksBoundary'
+    scope = (1, b'/submission/token/file', None)
+
+    def forge_body(self, file_id, content, chunk_number=1, total_chunks=1):
+        fields = {
+            b'flowChunkNumber': str(chunk_number).encode(),
+            b'flowTotalChunks': str(total_chunks).encode(),
+            b'flowTotalSize': str(len(content)).encode(),
+            b'flowIdentifier': file_id.encode(),
+            b'flowFilename': b'antani.txt'
+        }
+
+        body = b''
+        for k, v in fields.items():
+            body += b'--' + self.boundary + b'\r\nContent-Disposition: form-data; name="' + k + b'"\r\n\r\n' + v + b'\r\n'
+
+        body += b'--' + self.boundary + b'\r\nContent-Disposition: form-data; name="file"; filename="blob"\r\n\r\n'
+
+        return body + content + b'\r\n--' + self.boundary + b'--\r\n'
+
+    def test_upload(self):
+        content = b'0123456789' * 1000
+
+        upload = StreamingFileUpload(self.state, 1, self.boundary, self.scope)
+        body = self.forge_body('upload', content)
+        for i in range(0, len(body), 1000):
+            upload.feed(body[i:i + 1000])
+
+        upload.conclude()
+
+        self.assertIsNone(upload.error)
+        self.assertEqual(upload.fields[b'flowFilename'], [b'antani.txt'])
+
+        with self.state.TempUploadFiles[self.scope + ('upload',)].open('r') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_upload_incomplete(self):
+        upload = StreamingFileUpload(self.state, 1, self.boundary, self.scope)
+        upload.feed(self.forge_body('upload_incomplete', b'0123456789' * 1000, 1, 2)[:-100])
+        upload.conclude()
+
+        self.assertIsInstance(upload.error, InputValidationError)
+        self.assertEqual(self.state.TempUploadFiles[self.scope + ('upload_incomplete',)].size(), 0)
+
+    def test_upload_too_big(self):
+        self.state.tenant_cache[1].maximum_filesize = 1
+
+        upload = StreamingFileUpload(self.state, 1, self.boundary, self.scope)
+        upload.feed(self.forge_body('upload_too_big', b'0' * 2 * 1024 * 1024))
+
+        self.assertIsInstance(upload.error, FileTooBig)
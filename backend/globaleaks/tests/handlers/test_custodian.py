@@ -56,3 +56,37 @@ class TestIdentityAccessRequestsCollection(helpers.TestHandlerWithPopulatedDB):
     def test_get(self):
         handler = self.request(user_id=self.dummyCustodianUser['id'], role='custodian')
         return handler.get()
+
+    @inlineCallbacks
+    def test_get_paginated(self):
+        dummyRTips = yield self.get_rtips()
+
+        for rtip_desc in dummyRTips:
+            yield rtip.create_identityaccessrequest(1,
+                                                    rtip_desc['receiver_id'],
+                                                    rtip_desc['id'],
+                                                    {'request_motivation': u'request motivation'})
+
+        handler = self.request(user_id=self.dummyCustodianUser['id'], role='custodian')
+        iars = yield handler.get()
+        self.assertEqual(len(iars), len(dummyRTips))
+        self.assertEqual(iars, sorted(iars, key=lambda x: (x['request_date'], x['id']), reverse=True))
+
+        pages = []
+        before = None
+        while True:
+            args = {b'limit': [b'2']}
+            if before is not None:
+                args[b'before'] = [before.encode()]
+
+            handler = self.request(user_id=self.dummyCustodianUser['id'], role='custodian')
+            handler.request.args = args
+            page = yield handler.get()
+            if not page:
+                break
+
+            self.assertTrue(len(page) <= 2)
+            pages.extend(page)
+            before = page[-1]['id']
+
+        self.assertEqual(pages, iars)
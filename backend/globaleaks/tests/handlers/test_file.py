@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
+import base64
+
 from globaleaks.handlers import file
 from globaleaks.handlers.admin import file as admin_file
+from globaleaks.handlers.admin import modelimgs
+from globaleaks.handlers.public import db_get_public_context_list
+from globaleaks.handlers.user import get_user
+from globaleaks.orm import tw
 from globaleaks.rest import errors
+from globaleaks.rest.cache import Cache, gzipdata
 from globaleaks.tests import helpers
 from twisted.internet.defer import inlineCallbacks
 
@@ -23,3 +30,89 @@ class TestFileInstance(helpers.TestHandler):
         x = yield handler.get(u'upload.raw')
 
         self.assertIsNone(x)
+
+    @inlineCallbacks
+    def test_get_appfile(self):
+        Cache.invalidate()
+
+        self._handler = admin_file.FileInstance
+        handler = self.request({}, role='admin')
+        yield handler.post('css')
+
+        self._handler = file.FileHandler
+        handler = self.request(uri=b'https://www.globaleaks.org/s/css')
+        self.state.settings.enable_api_cache = True
+        try:
+            x = yield handler.get('css')
+        finally:
+            self.state.settings.enable_api_cache = False
+
+        self.assertEqual(x, gzipdata(base64.b64decode(helpers.VALID_BASE64_IMG)))
+        self.assertEqual(Cache.get(1, b'/s/css', None)[1], x)
+
+        etag = handler.request.responseHeaders.getRawHeaders(b'ETag')[0]
+        handler = self.request(uri=b'https://www.globaleaks.org/s/css', headers={b'If-None-Match': etag})
+        self.state.settings.enable_api_cache = True
+        try:
+            x = yield handler.get('css')
+        finally:
+            self.state.settings.enable_api_cache = False
+
+        self.assertIsNone(x)
+        self.assertEqual(handler.request.responseCode, 304)
+
+        Cache.invalidate()
+
+
+class TestImageHandler(helpers.TestHandlerWithPopulatedDB):
+    _handler = file.ImageHandler
+
+    @inlineCallbacks
+    def test_get(self):
+        self._handler = modelimgs.ModelImgInstance
+        handler = self.request({}, role='admin')
+        yield handler.post('users', self.dummyReceiverUser_1['id'])
+
+        user = yield get_user(1, self.dummyReceiverUser_1['id'], 'en')
+        path, h = user['picture'].split('?h=')
+        self.assertEqual(path, 's/img/users/' + self.dummyReceiverUser_1['id'])
+
+        self._handler = file.ImageHandler
+        handler = self.request()
+        handler.request.args[b'h'] = [h.encode()]
+        img = yield handler.get('users', self.dummyReceiverUser_1['id'])
+
+        self.assertEqual(img, base64.b64decode(helpers.VALID_BASE64_IMG))
+        self.assertEqual(handler.request.responseHeaders.getRawHeaders(b'Cache-Control'),
+                         [b'public, max-age=31536000, immutable'])
+        self.assertEqual(handler.request.responseHeaders.getRawHeaders(b'Content-Type'), [b'image/png'])
+
+    @inlineCallbacks
+    def test_get_content_type(self):
+        for data, content_type in [(b'\xff\xd8\xff\xe0JFIF', b'image/jpeg'),
+                                   (b'GIF89a\x01\x00', b'image/gif'),
+                                   (b'RIFF\x00\x00\x00\x00WEBPVP8 ', b'image/webp')]:
+            yield modelimgs.add_model_img(1, 'contexts', self.dummyContext['id'], data)
+
+            public = yield tw(db_get_public_context_list, 1, 'en')
+            url = [c['picture'] for c in public if c['id'] == self.dummyContext['id']][0]
+            self.assertEqual(url.split('?h=')[1], modelimgs.get_img_hash(data))
+
+            handler = self.request()
+            img = yield handler.get('contexts', self.dummyContext['id'])
+
+            self.assertEqual(img, data)
+            self.assertEqual(handler.request.responseHeaders.getRawHeaders(b'Content-Type'), [content_type])
+
+    @inlineCallbacks
+    def test_get_not_found(self):
+        handler = self.request()
+        yield self.assertFailure(handler.get('contexts', self.dummyContext['id']), errors.ResourceNotFound)
+
+    @inlineCallbacks
+    def test_get_not_receiver(self):
+        for user in [self.dummyAdminUser, self.dummyCustodianUser]:
+            yield modelimgs.add_model_img(1, 'users', user['id'], base64.b64decode(helpers.VALID_BASE64_IMG))
+
+            handler = self.request()
+            yield self.assertFailure(handler.get('users', user['id']), errors.ResourceNotFound)
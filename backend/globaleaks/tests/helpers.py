@@ -46,7 +46,7 @@ from globaleaks.rest import decorators
 from globaleaks.sessions import Sessions
 from globaleaks.settings import Settings
 from globaleaks.state import State
-from globaleaks.utils import process, tempdict, token, utility
+from globaleaks.utils import process, tempdict, tempupload, token, utility
 from globaleaks.utils.crypto import GCE, Base32Encoder
 from globaleaks.utils.objectdict import ObjectDict
 from globaleaks.utils.securetempfile import SecureTemporaryFile
@@ -275,7 +275,7 @@ def get_dummy_file(filename=None, content=None):
         f.write(content)
         f.finalize_write()
 
-    State.TempUploadFiles[os.path.basename(temporary_file.filepath)] = temporary_file
+    State.TempUploadFiles.set(os.path.basename(temporary_file.filepath), temporary_file)
 
     return {
         'id': filename,
@@ -351,6 +351,14 @@ def forge_request(uri=b'https://www.globaleaks.org/',
 
     request.notifyFinish = notifyFinish
 
+    def registerProducer(producer, streaming):
+        # Push producers drive by themselves the writes and
+        # must not be resumed in loop as done for pull producers
+        if not streaming:
+            DummyRequest.registerProducer(request, producer, streaming)
+
+    request.registerProducer = registerProducer
+
     request.requestHeaders.setRawHeaders('host', [b'127.0.0.1'])
     request.requestHeaders.setRawHeaders('user-agent', [b'NSA Agent'])
 
@@ -362,7 +370,7 @@ def forge_request(uri=b'https://www.globaleaks.org/',
     class fakeBody(object):
         def read(self):
             ret = body
-            if isinstance(ret, dict):
+            if isinstance(ret, (dict, list)):
                 ret = json.dumps(ret)
 
             if isinstance(ret, str):
@@ -388,6 +396,7 @@ class TestGL(unittest.TestCase):
 
         jobs.job.reactor = self.test_reactor
         tempdict.reactor = self.test_reactor
+        tempupload.reactor = self.test_reactor
         token.TokenList.reactor = self.test_reactor
         Sessions.reactor = self.test_reactor
 
@@ -2,7 +2,7 @@
 import os
 
 from globaleaks import models
-from globaleaks.jobs import cleaning, delivery
+from globaleaks.jobs import cleaning, delivery, secure_file_delete
 from globaleaks.orm import transact
 from globaleaks.settings import Settings
 from globaleaks.state import State
@@ -121,6 +121,8 @@ class TestCleaning(helpers.TestGLWithPopulatedDB):
 
         yield cleaning.Cleaning().run()
 
+        yield secure_file_delete.SecureFileDeletion().run()
+
         # verify cascade deletion when tips expire
         yield self.check4()
 
@@ -129,3 +131,20 @@ class TestCleaning(helpers.TestGLWithPopulatedDB):
         yield self.set_passwords_ready_to_expire(1)
         yield cleaning.Cleaning().run()
         yield self.check5()
+
+    @inlineCallbacks
+    def test_clean_expired_itips_in_batches(self):
+        yield self.perform_full_submission_actions()
+        yield delivery.Delivery().run()
+        yield self.force_itip_expiration()
+
+        job = cleaning.Cleaning()
+        job.expired_itips_batch_size = 1
+        job.expired_itips_pause = 0
+
+        yield job.clean_expired_itips()
+
+        self.assertEqual(job.expired_itips_deleted, self.population_of_submissions)
+        self.assertTrue(job.expired_itips_batches > 1)
+
+        yield self.test_model_count(models.InternalTip, 0)
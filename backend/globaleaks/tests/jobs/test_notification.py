@@ -2,9 +2,22 @@
 from twisted.internet.defer import inlineCallbacks, succeed
 
 from globaleaks import models
+from globaleaks.jobs import notification as notification_job
 from globaleaks.jobs.delivery import Delivery
 from globaleaks.jobs.notification import Notification
+from globaleaks.orm import transact
 from globaleaks.tests import helpers
+from globaleaks.utils.utility import datetime_now
+
+
+@transact
+def get_mails_attempts(session):
+    return [(mail.processing_attempts, mail.next_attempt) for mail in session.query(models.Mail)]
+
+
+def sendmail_failure(_):
+    # simulate the failure just returning with no action
+    return succeed(None)
 
 
 class TestNotification(helpers.TestGLWithPopulatedDB):
@@ -33,13 +46,11 @@ class TestNotification(helpers.TestGLWithPopulatedDB):
 
         notification = Notification()
         notification.skip_sleep = True
-
-        def sendmail_failure(_):
-            # simulate the failure just returning with no action
-            return succeed(None)
-
         notification.sendmail = sendmail_failure
 
+        # retry the delivery at each run
+        self.patch(notification_job, 'get_mail_retry_delay', lambda attempts: 0)
+
         for _ in range(10):
             yield notification.run()
             yield self.test_model_count(models.Mail, 24)
@@ -47,3 +58,34 @@ class TestNotification(helpers.TestGLWithPopulatedDB):
         yield notification.run()
 
         yield self.test_model_count(models.Mail, 0)
+
+    @inlineCallbacks
+    def test_notification_failure_backoff(self):
+        yield Delivery().run()
+
+        notification = Notification()
+        notification.skip_sleep = True
+        notification.sendmail = sendmail_failure
+
+        for _ in range(2):
+            yield notification.run()
+
+        # the mails are not retried until their next attempt is due
+        for attempts, next_attempt in (yield get_mails_attempts()):
+            self.assertEqual(attempts, 1)
+            self.assertTrue(next_attempt > datetime_now())
+
+    @inlineCallbacks
+    def test_notification_batch_size(self):
+        yield Delivery().run()
+
+        notification = Notification()
+        notification.skip_sleep = True
+        notification.sendmail = sendmail_failure
+        notification.mail_batch_size = 10
+
+        yield notification.run()
+
+        attempts = [x[0] for x in (yield get_mails_attempts())]
+        self.assertEqual(attempts.count(1), 10)
+        self.assertEqual(attempts.count(0), 14)
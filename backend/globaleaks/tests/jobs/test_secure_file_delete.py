@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import os
+
+from twisted.internet.defer import inlineCallbacks
+
+from globaleaks import models
+from globaleaks.handlers.file import mark_files_for_secure_deletion
+from globaleaks.jobs import secure_file_delete
+from globaleaks.jobs.secure_file_delete import SecureFileDeletion
+from globaleaks.settings import Settings
+from globaleaks.tests import helpers
+from globaleaks.utils.metrics import metrics
+
+
+class TestSecureFileDeletion(helpers.TestGL):
+    def create_files(self, n, size=1024):
+        paths = []
+        for i in range(n):
+            path = os.path.join(Settings.attachments_path, 'delete-%d' % i)
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+
+            paths.append(path)
+
+        return paths
+
+    @inlineCallbacks
+    def test_job(self):
+        paths = self.create_files(3)
+
+        # the missing files are not enqueued
+        yield mark_files_for_secure_deletion(paths + [paths[0] + '-missing'])
+        yield self.test_model_count(models.SecureFileDelete, 3)
+
+        metrics.reset()
+
+        yield SecureFileDeletion().run()
+
+        yield self.test_model_count(models.SecureFileDelete, 0)
+        self.assertEqual(os.listdir(Settings.attachments_path), [])
+        self.assertEqual(metrics.secure_deletion_queue, 0)
+        self.assertEqual(metrics.secure_deleted_files, 3)
+        self.assertEqual(metrics.secure_deleted_bytes, 3 * 1024)
+
+    @inlineCallbacks
+    def test_job_with_limits(self):
+        paths = self.create_files(3)
+
+        yield mark_files_for_secure_deletion(paths)
+
+        waits = []
+
+        job = SecureFileDeletion()
+        job.max_bytes_per_second = 1024
+        job.throttle = waits.append
+        job.time_budget = 0
+
+        # the time budget is exhausted after the first file
+        yield job.run()
+
+        yield self.test_model_count(models.SecureFileDelete, 2)
+        self.assertEqual(metrics.secure_deletion_queue, 2)
+        self.assertEqual(len(os.listdir(Settings.attachments_path)), 2)
+
+        job.time_budget = 60
+
+        # the deletion of each file after the first is delayed by the rate limit
+        yield job.run()
+
+        yield self.test_model_count(models.SecureFileDelete, 0)
+        self.assertEqual(len(waits), 1)
+        self.assertTrue(0 < waits[0] <= 1)
+
+    @inlineCallbacks
+    def test_job_with_failures(self):
+        paths = self.create_files(3)
+
+        yield mark_files_for_secure_deletion(paths)
+
+        def overwrite_and_remove(filepath):
+            if filepath == paths[0]:
+                raise OSError('Operation not permitted')
+
+            os.remove(filepath)
+
+        self.patch(secure_file_delete, 'overwrite_and_remove', overwrite_and_remove)
+
+        # the failure is logged and the queue keeps moving
+        yield SecureFileDeletion().run()
+
+        yield self.test_model_count(models.SecureFileDelete, 0)
+        self.assertEqual(os.listdir(Settings.attachments_path), ['delete-0'])
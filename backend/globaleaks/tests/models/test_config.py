@@ -30,3 +30,16 @@ class TestModels(helpers.TestGL):
             config.ConfigFactory(session, 1).update_defaults()
 
         return transaction()
+
+    def test_config_track_changes(self):
+        @transact
+        def transaction(session):
+            node = config.ConfigFactory(session, 1)
+            node.set_val('name', node.get_val('name'))
+            self.assertEqual(node.changed, set())
+
+            node.update('node', {'name': 'changed', 'log_level': node.get_val('log_level')})
+            node.set_val('hostname', 'www.example.org')
+            self.assertEqual(node.changed, {'name', 'hostname'})
+
+        return transaction()
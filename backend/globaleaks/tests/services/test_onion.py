@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from twisted.internet import defer, reactor, task
+
+from globaleaks.services import onion
+from globaleaks.settings import Settings
+from globaleaks.state import State
+from globaleaks.tests import helpers
+
+
+class FakeTorControlProtocol(object):
+    """
+    Tor control protocol answering the ADD_ONION commands on request
+    """
+    def __init__(self, failing_keys=()):
+        self.failing_keys = failing_keys
+        self.listeners = []
+        self.pending = []
+        self.commands = []
+        self.max_pending = 0
+
+    def add_event_listener(self, name, callback):
+        self.listeners.append(callback)
+
+    def remove_event_listener(self, name, callback):
+        self.listeners.remove(callback)
+
+    def queue_command(self, command):
+        if command.startswith('DEL_ONION'):
+            return defer.succeed('OK')
+
+        key = command.split()[1]
+        self.commands.append(key)
+
+        d = defer.Deferred()
+        self.pending.append((key, d))
+        self.max_pending = max(self.max_pending, len(self.pending))
+
+        return d
+
+    def complete(self):
+        key, d = self.pending.pop(0)
+        if key in self.failing_keys:
+            d.errback(Exception('ADD_ONION failed'))
+            return
+
+        service_id = 'service%d' % len(self.commands)
+        answer = 'ServiceID=%s' % service_id
+        if key.startswith('NEW:'):
+            answer += '\nPrivateKey=ED25519-V3:%s' % service_id
+
+        d.callback(answer)
+
+        # notify the upload of the descriptor of the onion service
+        for listener in list(self.listeners):
+            listener('UPLOAD %s UNKNOWN hsdir' % service_id)
+            listener('UPLOADED %s UNKNOWN hsdir' % service_id)
+
+
+class FakeTorConnection(object):
+    def __init__(self, protocol):
+        self.protocol = protocol
+
+
+class TestOnionService(helpers.TestGL):
+    @defer.inlineCallbacks
+    def test_add_all_hidden_services(self):
+        self.patch(onion.OnionService, 'operation', lambda self: defer.Deferred())
+        self.patch(Settings, 'onion_provisioning_concurrency', 3)
+
+        # the tenants without a key are listed first and one of the others fails
+        new_tids = [tid for tid in State.tenant_cache]
+        services = [(tid, '', '') for tid in new_tids]
+        services += [(tid, 'existing%d.onion' % tid, 'ED25519-V3:key%d' % tid) for tid in range(10, 20)]
+
+        self.patch(onion, 'list_onion_service_info', lambda: defer.succeed(services))
+
+        protocol = FakeTorControlProtocol(failing_keys=['ED25519-V3:key12'])
+
+        service = onion.OnionService()
+        service.reset()
+        service.tor_conn = FakeTorConnection(protocol)
+
+        d = service.add_all_hidden_services()
+
+        while not d.called:
+            if protocol.pending:
+                protocol.complete()
+
+            yield task.deferLater(reactor, 0.01, lambda: None)
+
+        service.tor_conn = None
+        service.stop()
+
+        self.assertEqual(protocol.max_pending, 3)
+        self.assertEqual(len(protocol.commands), len(services))
+
+        # the services with an existing key are provisioned first
+        self.assertTrue(all(not key.startswith('NEW:') for key in protocol.commands[:10]))
+        self.assertTrue(all(key.startswith('NEW:') for key in protocol.commands[10:]))
+
+        # the failure of a tenant does not prevent the provisioning of the others
+        self.assertEqual(service.provisioning_total, len(services))
+        self.assertEqual(service.provisioning_failed, 1)
+        self.assertEqual(service.provisioning_completed, len(services) - 1)
+
+        for tid in new_tids:
+            self.assertTrue(State.tenant_cache[tid].onionservice.startswith('service'))
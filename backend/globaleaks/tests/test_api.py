@@ -100,6 +100,29 @@ class TestAPI(TestGL):
                 returnedHeaderValue = request.responseHeaders.getRawHeaders(headerName)[0]
                 self.assertEqual(returnedHeaderValue, expectedHeaderValue)
 
+    def test_rate_limit(self):
+        self.api.rate_limiter.budgets = {'api': (1, 2)}
+
+        for status_code in [200, 200, 429]:
+            request = forge_request(uri=b"https://www.globaleaks.org/")
+            self.api.render(request)
+            self.assertEqual(request.responseCode, status_code)
+
+        self.assertEqual(request.responseHeaders.getRawHeaders('retry-after')[0], '1')
+
+    def test_rate_limit_tor_clients(self):
+        self.api.rate_limiter.budgets = {'api': (1, 2)}
+        self.api.rate_limiter.tenant_budgets = {'api': (1, 6)}
+
+        # two distinct Tor clients connected via the onion service share the
+        # same local address; the requests of the first do not exhaust the
+        # budget of the second but are limited by the budget of the tenant
+        for port, status_code in [(12345, 200)] * 5 + [(23456, 200), (23456, 429)]:
+            request = forge_request(uri=b'http://127.0.0.1:8083/', client_addr=IPv4Address('TCP', '127.0.0.1', port))
+            self.api.render(request)
+            self.assertTrue(request.client_using_tor)
+            self.assertEqual(request.responseCode, status_code)
+
     def test_request_state_and_redirects(self):
         # Remote HTTP connection with HTTPS disabled
         request = forge_request(uri=b'http://www.globaleaks.org/')
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from twisted.internet.defer import inlineCallbacks
+from twisted.test.proto_helpers import StringTransport
+
+from globaleaks.rest import api
+from globaleaks.tests import helpers
+
+
+class TestRequest(helpers.TestGL):
+    boundary = b'----GlobaLeaksBoundary'
+
+    @inlineCallbacks
+    def setUp(self):
+        yield helpers.TestGL.setUp(self)
+
+        # the module is imported once the working directory of the test is set
+        from globaleaks import backend
+
+        self.site = backend.Site(api.APIResourceWrapper(), timeout=None)
+
+    def forge_upload(self, path, content, total_size=None):
+        if total_size is None:
+            total_size = len(content)
+
+        fields = {
+            b'flowChunkNumber': b'1',
+            b'flowTotalChunks': b'1',
+            b'flowTotalSize': str(total_size).encode(),
+            b'flowIdentifier': b'upload',
+            b'flowFilename': b'antani.txt'
+        }
+
+        body = b''
+        for k, v in fields.items():
+            body += b'--' + self.boundary + b'\r\nContent-Disposition: form-data; name="' + k + b'"\r\n\r\n' + v + b'\r\n'
+
+        body += b'--' + self.boundary + b'\r\nContent-Disposition: form-data; name="file"; filename="blob"\r\n\r\n'
+        body += content + b'\r\n--' + self.boundary + b'--\r\n'
+
+        headers = b'POST ' + path + b' HTTP/1.1\r\n' \
+                  b'Host: 127.0.0.1\r\n' \
+                  b'Content-Type: multipart/form-data; boundary=' + self.boundary + b'\r\n' \
+                  b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n'
+
+        return headers, body
+
+    def send(self, data, chunk_size=64 * 1024):
+        """
+        Send the data to a new connection until it is closed by the server
+
+        :return: The transport of the connection and the number of bytes sent
+        """
+        transport = StringTransport()
+        channel = self.site.buildProtocol(None)
+        channel.makeConnection(transport)
+
+        sent = 0
+        while sent < len(data) and not transport.disconnecting:
+            channel.dataReceived(data[sent:sent + chunk_size])
+            sent += chunk_size
+
+        return transport, min(sent, len(data))
+
+    def test_upload(self):
+        token = self.state.tokens.new(1)
+        path = b'/submission/' + token.id.encode() + b'/file'
+
+        headers, body = self.forge_upload(path, b'0123456789' * 1000)
+        transport, _ = self.send(headers + body)
+
+        self.assertTrue(transport.value().startswith(b'HTTP/1.1 201'))
+        self.assertEqual(len(token.uploaded_files), 1)
+
+        with token.uploaded_files[0]['body'].open('r') as f:
+            self.assertEqual(f.read(), b'0123456789' * 1000)
+
+    def test_upload_with_invalid_token(self):
+        pending_uploads = len(self.state.TempUploadFiles)
+
+        headers, body = self.forge_upload(b'/submission/' + b'a' * 42 + b'/file', b'0' * 1024 * 1024)
+        transport, _ = self.send(headers + body)
+
+        # the request is rejected before receiving the body
+        self.assertTrue(transport.value().startswith(b'HTTP/1.1 403'))
+        self.assertTrue(transport.disconnecting)
+        self.assertEqual(len(self.state.TempUploadFiles), pending_uploads)
+
+    def test_upload_without_session(self):
+        pending_uploads = len(self.state.TempUploadFiles)
+
+        headers, body = self.forge_upload(b'/wbtip/rfile', b'0' * 1024 * 1024)
+        transport, _ = self.send(headers + body)
+
+        self.assertTrue(transport.value().startswith(b'HTTP/1.1 412'))
+        self.assertTrue(transport.disconnecting)
+        self.assertEqual(len(self.state.TempUploadFiles), pending_uploads)
+
+    def test_upload_rate_limited(self):
+        self.site.resource.rate_limiter.budgets = {'upload': (1, 1)}
+
+        token = self.state.tokens.new(1)
+        headers, body = self.forge_upload(b'/submission/' + token.id.encode() + b'/file', b'0' * 1024)
+
+        for status_code in [b'201', b'429']:
+            transport, _ = self.send(headers + body)
+            self.assertTrue(transport.value().startswith(b'HTTP/1.1 ' + status_code))
+
+        self.assertIn(b'Retry-After: 1\r\n', transport.value())
+        self.assertTrue(transport.disconnecting)
+
+    def test_upload_too_big(self):
+        self.state.tenant_cache[1].maximum_filesize = 1
+
+        token = self.state.tokens.new(1)
+        path = b'/submission/' + token.id.encode() + b'/file'
+
+        # the size declared by the client is within the limit
+        headers, body = self.forge_upload(path, b'0' * 4 * 1024 * 1024, 1024)
+        transport, sent = self.send(headers + body)
+
+        # the request is answered as soon as the limit is exceeded
+        self.assertTrue(transport.value().startswith(b'HTTP/1.1 400'))
+        self.assertTrue(transport.disconnecting)
+        self.assertLess(sent, 2 * 1024 * 1024)
+        self.assertEqual(len(token.uploaded_files), 0)
+
+        key = (1, path, None, 'upload')
+        self.assertEqual(self.state.TempUploadFiles[key].size(), 0)
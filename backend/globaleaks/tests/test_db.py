@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import os
+
+from twisted.internet.defer import inlineCallbacks
+
+from globaleaks import db, models
+from globaleaks.db import appdata
+from globaleaks.jobs.secure_file_delete import SecureFileDeletion
+from globaleaks.orm import transact, tw
+from globaleaks.settings import Settings
+from globaleaks.tests import helpers
+
+
+class TestUntrackedFiles(helpers.TestGL):
+    @inlineCallbacks
+    def test_clean_untracked_files(self):
+        paths = []
+        for i in range(3):
+            path = os.path.join(Settings.attachments_path, 'untracked-%d' % i)
+            with open(path, 'wb') as f:
+                f.write(b'antani')
+
+            paths.append(path)
+
+        self.patch(db, 'db_get_tracked_files', lambda session: {'untracked-0'})
+
+        untracked_files = db.sync_get_untracked_files()
+        self.assertEqual(sorted(untracked_files), paths[1:])
+
+        db.sync_mark_untracked_files_for_secure_deletion(untracked_files)
+
+        queue = yield SecureFileDeletion().get_files_to_secure_delete(10)
+        self.assertEqual(sorted(queue), paths[1:])
+
+        yield SecureFileDeletion().run()
+        self.assertEqual(os.listdir(Settings.attachments_path), ['untracked-0'])
+
+        os.remove(paths[0])
+
+
+class TestFixFieldsAttrs(helpers.TestGL):
+    @transact
+    def alter_fieldattrs(self, session):
+        field_id = session.query(models.Field.id).filter(models.Field.type == 'inputbox',
+                                                         models.Field.template_id == None).first()[0]
+
+        attrs = {a.name: a for a in session.query(models.FieldAttr).filter(models.FieldAttr.field_id == field_id)}
+        session.delete(attrs['regexp'])
+        attrs['min_len'].value = '10'
+        attrs['max_len'].type = 'unicode'
+        session.add(models.FieldAttr({'field_id': field_id, 'name': 'stale', 'type': 'unicode', 'value': ''}))
+
+        # the extra attrs of the non-standard fields like the selectbox
+        # of the whistleblower_identity question are kept
+        selectbox_id = session.query(models.FieldAttr.field_id).filter(models.FieldAttr.name == 'layout_orientation',
+                                                                      models.FieldAttr.field_id == models.Field.id,
+                                                                      models.Field.type == 'selectbox').first()[0]
+
+        return field_id, selectbox_id
+
+    @transact
+    def get_fieldattrs(self, session, field_id):
+        return {a.name: (a.type, a.value) for a in session.query(models.FieldAttr).filter(models.FieldAttr.field_id == field_id)}
+
+    @inlineCallbacks
+    def test_fix_fields_attrs(self):
+        field_id, selectbox_id = yield self.alter_fieldattrs()
+
+        for _ in range(2):
+            yield tw(appdata.db_fix_fields_attrs)
+
+            attrs = yield self.get_fieldattrs(field_id)
+            self.assertEqual(attrs, {
+                'min_len': ('int', '10'),
+                'max_len': ('int', '-1'),
+                'input_validation': ('unicode', 'none'),
+                'regexp': ('unicode', '')
+            })
+
+            attrs = yield self.get_fieldattrs(selectbox_id)
+            self.assertIn('layout_orientation', attrs)
+            self.assertIn('display_alphabetically', attrs)
+
+
+
+class TestRefreshMemoryVariables(helpers.TestGL):
+    @inlineCallbacks
+    def test_refresh_without_changes(self):
+        name = self.state.tenant_cache[1].name
+        self.state.tenant_cache[1].name = 'stale'
+
+        # nothing is reloaded when no variable changed
+        yield db.refresh_memory_variables([1], set())
+        self.assertEqual(self.state.tenant_cache[1].name, 'stale')
+
+        yield db.refresh_memory_variables([1], {'name'})
+        self.assertEqual(self.state.tenant_cache[1].name, name)
@@ -21,3 +21,28 @@ class TestIPUtils(unittest.TestCase):
         # Now confirm we properly fail when garbage is appended
         ip_str = ip_str + ",abcdef"
         self.assertEqual(ip.parse_csv_ip_ranges_to_ip_networks(ip_str), [])
+
+    def test_check_ip(self):
+        ip_filter = ip.compile_ip_filter("192.168.1.1,10.0.0.0/8,::1,2001:db8::/32")
+
+        for x in ["192.168.1.1", b"10.1.2.3", "::1", "2001:db8::1234"]:
+            self.assertTrue(ip.check_ip(x, ip_filter))
+
+        for x in ["192.168.1.2", "11.0.0.1", "::2", "2001:db9::1", "garbage"]:
+            self.assertFalse(ip.check_ip(x, ip_filter))
+
+        self.assertTrue(ip.check_ip("10.1.2.3", "10.0.0.0/8"))
+        self.assertFalse(ip.check_ip("10.1.2.3", "10.0.0.0/8,abcdef"))
+
+    def test_ip_network_set(self):
+        ip_networks = ip.IPNetworkSet()
+        ip_networks.add(ipaddress.ip_network("10.1.0.0/16"))
+        ip_networks.add(ipaddress.ip_network("10.0.0.0/8"))
+        ip_networks.add(ipaddress.ip_network("10.1.2.0/24"))
+
+        self.assertIn(ipaddress.ip_address("10.255.0.1"), ip_networks)
+        self.assertNotIn(ipaddress.ip_address("11.0.0.1"), ip_networks)
+
+        ip_networks.add(ipaddress.ip_network("0.0.0.0/0"))
+        self.assertIn(ipaddress.ip_address("11.0.0.1"), ip_networks)
+        self.assertNotIn(ipaddress.ip_address("::1"), ip_networks)
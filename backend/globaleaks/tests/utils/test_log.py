@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import os
 import re
 import sys
 
@@ -69,3 +70,71 @@ class TestLogObserver(unittest.TestCase):
         m = re.findall(gex, s)
         self.assertTrue(len(m) == 2)
         self.assertTrue(s.endswith("[-] 'error'\n"))
+
+
+class StringIOKeepingValue(StringIO):
+    def close(self):
+        self.value = self.getvalue()
+        StringIO.close(self)
+
+
+class TestBufferedLogFile(unittest.TestCase):
+    def test_write(self):
+        fo = StringIOKeepingValue()
+        logfile = log.BufferedLogFile(fo, flush_size=100)
+
+        lines = ['line %d\n' % i for i in range(1000)]
+        for line in lines:
+            logfile.write(line)
+
+        logfile.close()
+
+        self.assertEqual(fo.value, ''.join(lines))
+
+    def test_drop_policy(self):
+        fo = StringIOKeepingValue()
+        logfile = log.BufferedLogFile(fo, flush_size=1000, flush_interval=3600, max_size=100, policy='drop')
+
+        for i in range(20):
+            logfile.write('line %02d\n' % i)
+
+        logfile.close()
+
+        self.assertEqual(fo.value, ''.join('line %02d\n' % i for i in range(12)) +
+                                   '[E] Log buffer full: 8 log lines dropped\n')
+
+    def test_block_policy(self):
+        fo = StringIOKeepingValue()
+        logfile = log.BufferedLogFile(fo, flush_size=1000, flush_interval=0.01, max_size=100, policy='block')
+
+        lines = ['line %02d\n' % i for i in range(20)]
+        for line in lines:
+            logfile.write(line)
+
+        logfile.close()
+
+        self.assertEqual(fo.value, ''.join(lines))
+
+    def test_write_after_fork(self):
+        path = self.mktemp()
+        with open(path, 'w') as fo:
+            logfile = log.BufferedLogFile(fo, flush_interval=0.01)
+            logfile.write('before fork\n')
+
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    # the writer thread of the parent does not survive the fork
+                    logfile.write('after fork\n')
+                    logfile.close()
+                finally:
+                    os._exit(0)
+
+            os.waitpid(pid, 0)
+            logfile.close()
+
+        with open(path) as fo:
+            lines = fo.readlines()
+
+        self.assertIn('after fork\n', lines)
+        self.assertIn('before fork\n', lines)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+from twisted.internet import defer, protocol, reactor, task
+from twisted.protocols.basic import LineReceiver
+
+from globaleaks.tests import helpers
+from globaleaks.utils import mail
+
+
+class DummySMTPServer(LineReceiver):
+    def connectionMade(self):
+        self.factory.connections += 1
+        self.factory.active += 1
+        self.data = None
+        self.sendLine(b'220 localhost ESMTP')
+
+    def lineReceived(self, line):
+        if self.data is not None:
+            if line == b'.':
+                self.factory.messages.append(b'\r\n'.join(self.data))
+                self.data = None
+                self.sendLine(b'250 Ok')
+            else:
+                self.data.append(line)
+        elif line.startswith(b'DATA'):
+            self.data = []
+            self.sendLine(b'354 End data with <CR><LF>.<CR><LF>')
+        elif line.startswith(b'QUIT'):
+            self.sendLine(b'221 Bye')
+            self.transport.loseConnection()
+        else:
+            self.sendLine(b'250 Ok')
+
+    def connectionLost(self, reason):
+        self.factory.active -= 1
+
+
+class TestSMTPPool(helpers.TestGL):
+    @defer.inlineCallbacks
+    def setUp(self):
+        yield helpers.TestGL.setUp(self)
+
+        self.factory = protocol.ServerFactory()
+        self.factory.protocol = DummySMTPServer
+        self.factory.connections = 0
+        self.factory.active = 0
+        self.factory.messages = []
+
+        self.port = reactor.listenTCP(0, self.factory, interface='127.0.0.1')
+        self.pool = mail.SMTPPool()
+        self.patch(mail, 'smtp_pool', self.pool)
+
+    @defer.inlineCallbacks
+    def tearDown(self):
+        # Wait for the SMTP sessions to be closed
+        while self.factory.active or any(relay.connections for relay in self.pool.relays.values()):
+            yield task.deferLater(reactor, 0.01, lambda: None)
+
+        yield self.port.stopListening()
+        yield helpers.TestGL.tearDown(self)
+
+    def sendmail(self, smtp_port, to_address):
+        return mail.sendmail(1, '127.0.0.1', smtp_port, 'PLAINTEXT', False, '', '',
+                             'GlobaLeaks', 'notification@localhost', to_address,
+                             'Subject', 'Body', anonymize=False)
+
+    @defer.inlineCallbacks
+    def test_sendmail_reuses_connections(self):
+        port = self.port.getHost().port
+
+        results = yield defer.DeferredList([self.sendmail(port, 'user%d@localhost' % i) for i in range(20)])
+
+        self.assertTrue(all(result for _, result in results))
+        self.assertEqual(len(self.factory.messages), 20)
+        self.assertTrue(self.factory.connections <= mail.SMTPRelay.max_connections)
+
+        stats = self.pool.get_stats()['127.0.0.1:%d [PLAINTEXT]' % port]
+        self.assertEqual(stats['sent'], 20)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['opened_connections'], self.factory.connections)
+
+    @defer.inlineCallbacks
+    def test_sendmail_connection_failure(self):
+        port = self.port.getHost().port
+        yield self.port.stopListening()
+
+        results = yield defer.DeferredList([self.sendmail(port, 'user%d@localhost' % i) for i in range(10)])
+
+        self.assertFalse(any(result for _, result in results))
+
+        stats = self.pool.get_stats()['127.0.0.1:%d [PLAINTEXT]' % port]
+        self.assertEqual(stats['sent'], 0)
+        self.assertEqual(stats['failed'], 10)
+        self.assertEqual(stats['connections'], 0)
+        self.assertEqual(stats['failed_connections'], mail.SMTPRelay.max_connections)
+
+    def test_relays_are_not_shared_across_connection_settings(self):
+        config = {
+            'smtp_host': '127.0.0.1',
+            'smtp_port': 25,
+            'security': 'TLS',
+            'authentication': True,
+            'username': 'user',
+            'password': 'password',
+            'anonymize': True,
+            'socks_host': '127.0.0.1',
+            'socks_port': 9050
+        }
+
+        relay = self.pool.get_relay(config)
+        self.assertIs(self.pool.get_relay(dict(config)), relay)
+
+        for k, v in [('password', 'other'), ('anonymize', False), ('socks_port', 9150)]:
+            self.assertIsNot(self.pool.get_relay(dict(config, **{k: v})), relay)
+
+        # the configuration of a relay is not altered by the other senders
+        self.assertEqual(relay.config, config)
+        self.assertEqual(len(self.pool.get_stats()), 3)
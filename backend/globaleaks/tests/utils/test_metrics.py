@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from twisted.trial import unittest
+
+from globaleaks.utils.metrics import Histogram, Metrics, render_metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.1, 1))
+        for value in [0.05, 0.1, 0.5, 5]:
+            histogram.observe(value)
+
+        samples = histogram.samples('latency', (('route', 'Test'),))
+
+        self.assertEqual([x[2] for x in samples], [2, 3, 4, 5.65, 4])
+        self.assertEqual(samples[2][1], (('route', 'Test'), ('le', '+Inf')))
+
+    def test_render(self):
+        metrics = Metrics()
+        metrics.observe_request('Test', 'get', 200, 0.2)
+        metrics.observe_request('Test', 'get', 200, 0.3)
+        metrics.observe_request('Test', 'post', 404, 0.01)
+        metrics.observe_transaction(0.01, 0.1, 2, True)
+        metrics.observe_secure_deletion(5, 2, 2048)
+
+        text = render_metrics(metrics.get_families())
+
+        self.assertIn('# TYPE globaleaks_http_request_duration_seconds histogram', text)
+        self.assertIn('globaleaks_http_request_duration_seconds_count{route="Test"} 3', text)
+        self.assertIn('globaleaks_http_requests_total{route="Test",method="get",status="200"} 2', text)
+        self.assertIn('globaleaks_http_requests_total{route="Test",method="post",status="404"} 1', text)
+        self.assertIn('globaleaks_orm_transaction_retries_total 2', text)
+        self.assertIn('globaleaks_secure_deletion_queue_depth 5', text)
+        self.assertIn('globaleaks_secure_deleted_bytes_total 2048', text)
+        self.assertTrue(text.endswith('\n'))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import os
+
+from twisted.trial import unittest
+
+from globaleaks.utils.multipart import MultipartError, MultipartParser, parse_boundary
+
+
+class TestMultipartParser(unittest.TestCase):
+    boundary = b'----GlobaLeaksBoundary'
+
+    def setUp(self):
+        self.content = os.urandom(100000)
+        self.body = b''.join([
+            b'--' + self.boundary + b'\r\n',
+            b'Content-Disposition: form-data; name="flowFilename"\r\n\r\n',
+            b'antani.txt\r\n',
+            b'--' + self.boundary + b'\r\n',
+            b'Content-Disposition: form-data; name="file"; filename="antani.txt"\r\n',
+            b'Content-Type: application/octet-stream\r\n\r\n',
+            self.content + b'\r\n',
+            b'--' + self.boundary + b'--\r\n'
+        ])
+
+    def parse(self, chunk_size):
+        parts = []
+
+        def on_part_begin(headers):
+            parts.append([headers, b''])
+
+        def on_part_data(data):
+            parts[-1][1] += data
+
+        parser = MultipartParser(self.boundary, on_part_begin, on_part_data, lambda: None)
+
+        for i in range(0, len(self.body), chunk_size):
+            parser.feed(self.body[i:i + chunk_size])
+
+        self.assertTrue(parser.is_complete())
+
+        return parts
+
+    def test_parse_boundary(self):
+        self.assertEqual(parse_boundary(b'multipart/form-data; boundary=' + self.boundary), self.boundary)
+        self.assertEqual(parse_boundary(b'multipart/form-data; boundary="' + self.boundary + b'"'), self.boundary)
+        self.assertIsNone(parse_boundary(b'application/json'))
+
+    def test_parse(self):
+        for chunk_size in [1, 7, 4096, len(self.body)]:
+            parts = self.parse(chunk_size)
+            self.assertEqual(len(parts), 2)
+            self.assertEqual(parts[0][1], b'antani.txt')
+            self.assertEqual(parts[1][0][b'content-type'], b'application/octet-stream')
+            self.assertEqual(parts[1][1], self.content)
+
+    def test_parse_invalid_delimiter(self):
+        parser = MultipartParser(self.boundary, None, None, None)
+        self.assertRaises(MultipartError, parser.feed, b'--' + self.boundary + b'XX')
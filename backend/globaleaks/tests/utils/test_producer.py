@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import os
+
+from io import BytesIO
+from twisted.internet import reactor, task
+from twisted.internet.defer import inlineCallbacks
+
+from globaleaks.tests import helpers
+from globaleaks.utils.producer import ThreadedFileProducer
+
+
+class TestConsumer(object):
+    def __init__(self):
+        self.producer = None
+        self.streaming = None
+        self.written = []
+
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+        self.streaming = streaming
+
+    def unregisterProducer(self):
+        self.producer = None
+
+    def write(self, data):
+        self.written.append(data)
+
+
+class TestThreadedFileProducer(helpers.TestGL):
+    @inlineCallbacks
+    def test_producer(self):
+        content = os.urandom(1024 * 1024)
+        consumer = TestConsumer()
+
+        producer = ThreadedFileProducer(consumer, BytesIO(content), 4096)
+
+        yield producer.start()
+
+        self.assertTrue(consumer.streaming)
+        self.assertIsNone(consumer.producer)
+        self.assertEqual(b''.join(consumer.written), content)
+
+    @inlineCallbacks
+    def test_producer_with_backpressure(self):
+        content = os.urandom(1024 * 1024)
+        consumer = TestConsumer()
+
+        producer = ThreadedFileProducer(consumer, BytesIO(content), 4096)
+        producer.pauseProducing()
+
+        d = producer.start()
+
+        # let the producer fill its buffer while the consumer is paused
+        while producer.reading or len(producer.buffer) < producer.read_ahead:
+            yield task.deferLater(reactor, 0.01, lambda: None)
+
+        self.assertEqual(consumer.written, [])
+
+        producer.resumeProducing()
+
+        yield d
+
+        self.assertEqual(b''.join(consumer.written), content)
+
+    @inlineCallbacks
+    def test_producer_stop(self):
+        consumer = TestConsumer()
+
+        producer = ThreadedFileProducer(consumer, BytesIO(os.urandom(1024 * 1024)), 4096)
+        producer.pauseProducing()
+
+        d = producer.start()
+
+        producer.stopProducing()
+
+        yield self.assertFailure(d, Exception)
+
+        self.assertIsNone(consumer.producer)
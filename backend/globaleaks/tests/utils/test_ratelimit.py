@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from twisted.trial import unittest
+
+from globaleaks.utils.ratelimit import RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.limiter = RateLimiter(clock=lambda: self.now)
+        self.limiter.budgets = {'auth': (1, 3)}
+
+    def test_burst_and_refill(self):
+        for _ in range(3):
+            self.assertEqual(self.limiter.check(1, '1.2.3.4', 'auth'), 0)
+
+        self.assertEqual(self.limiter.check(1, '1.2.3.4', 'auth'), 1)
+        self.assertEqual(self.limiter.rejected, 1)
+
+        # buckets are separated by tenant and client
+        self.assertEqual(self.limiter.check(2, '1.2.3.4', 'auth'), 0)
+        self.assertEqual(self.limiter.check(1, '5.6.7.8', 'auth'), 0)
+
+        self.now += 1
+        self.assertEqual(self.limiter.check(1, '1.2.3.4', 'auth'), 0)
+        self.assertNotEqual(self.limiter.check(1, '1.2.3.4', 'auth'), 0)
+
+    def test_tor_clients(self):
+        self.limiter.tenant_budgets = {'auth': (1, 10)}
+
+        # all the Tor clients share the same address and are limited
+        # as a whole by the budget of the tenant
+        for _ in range(10):
+            self.assertEqual(self.limiter.check(1, '127.0.0.1', 'auth', True), 0)
+
+        self.assertEqual(self.limiter.check(1, '127.0.0.1', 'auth', True), 1)
+        self.assertEqual(self.limiter.check(1, '1.2.3.4', 'auth', True), 1)
+
+        # the budget is separated by tenant
+        self.assertEqual(self.limiter.check(2, '127.0.0.1', 'auth', True), 0)
+
+        # the local address is instead limited by client when not used by Tor
+        for _ in range(3):
+            self.assertEqual(self.limiter.check(1, '127.0.0.1', 'auth'), 0)
+
+        self.assertNotEqual(self.limiter.check(1, '127.0.0.1', 'auth'), 0)
+
+    def test_max_buckets(self):
+        self.limiter.max_buckets = 10
+
+        for i in range(20):
+            self.limiter.check(1, str(i), 'auth')
+
+        self.assertEqual(len(self.limiter.buckets), 10)
+        self.assertEqual(list(self.limiter.buckets)[0], (1, '10', 'auth'))
@@ -16,3 +16,17 @@ class TestSecureTemporaryFiles(helpers.TestGL):
         with a.open('r') as f:
             for x in range(1000):
                 self.assertTrue(antani == f.read(10).decode())
+
+    def test_temporary_file_truncate(self):
+        a = SecureTemporaryFile(Settings.tmp_path)
+        with a.open('w') as f:
+            f.write(b'0123456789')
+            f.write(b'discarded')
+            f.truncate(10)
+            f.write(b'abcdefghij')
+            f.finalize_write()
+
+        self.assertEqual(a.size(), 20)
+
+        with a.open('r') as f:
+            self.assertEqual(f.read(), b'0123456789abcdefghij')
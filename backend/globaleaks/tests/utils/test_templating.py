@@ -4,7 +4,7 @@ from globaleaks.handlers import admin, rtip, user
 from globaleaks.jobs.delivery import Delivery
 from globaleaks.orm import tw
 from globaleaks.tests import helpers
-from globaleaks.utils.templating import Templating, supported_template_types
+from globaleaks.utils.templating import Templating, compile_template, supported_template_types
 
 
 class notifTemplateTest(helpers.TestGLWithPopulatedDB):
@@ -41,3 +41,126 @@ class notifTemplateTest(helpers.TestGLWithPopulatedDB):
             data['type'] = key
             template = ''.join(supported_template_types[key].keyword_list)
             Templating().format_template(template, data)
+
+    @inlineCallbacks
+    def test_questionnaire_answers_cache_shared_by_rtips(self):
+        yield self.perform_full_submission_actions()
+
+        itip_id = self.dummyRTips[0]['internaltip_id']
+        rtips = [tip for tip in self.dummyRTips if tip['internaltip_id'] == itip_id]
+        self.assertEqual(len(rtips), 2)
+
+        cache = {}
+        dumps = []
+        for tip in rtips:
+            data = {
+                'type': 'tip',
+                'answers_cache': cache,
+                'user': (yield user.get_user(1, tip['receiver_id'], u'en')),
+                'context': (yield admin.context.get_context(1, self.dummyContext['id'], u'en')),
+                'notification': (yield tw(admin.notification.db_get_notification, 1, u'en')),
+                'node': (yield tw(admin.node.db_admin_serialize_node, 1, u'en')),
+                'submission_statuses': (yield tw(admin.submission_statuses.db_retrieve_all_submission_statuses, 1, u'en'))
+            }
+
+            data['tip'], _ = yield rtip.get_rtip(1, tip['receiver_id'], tip['id'], u'en')
+
+            dumps.append(Templating().format_template('{QuestionnaireAnswers}', data))
+
+            # the second rtip is served from the entry cached for the first one
+            key = (itip_id, data['tip']['questionnaires'][0]['hash'], u'en')
+            self.assertEqual(list(cache.keys()), [key])
+            cache[key] = 'cached'
+
+        self.assertNotEqual(dumps[0], 'cached')
+        self.assertEqual(dumps[1], 'cached')
+
+
+class TestCompiledTemplates(helpers.TestGL):
+    data = {
+        'type': 'admin_test',
+        'node': {'name': 'Node {NodeName}', 'hostname': 'www.globaleaks.org', 'onionservice': ''},
+        'notification': {},
+        'user': {'name': 'Recipient'}
+    }
+
+    def test_compile_template(self):
+        self.assertEqual(compile_template('Hi {RecipientName}, {Unknown}!'),
+                         ('Hi ', '{RecipientName}', ', ', '{Unknown}', '!'))
+
+        self.assertIs(compile_template('{NodeName}'), compile_template('{NodeName}'))
+
+    def test_format_template(self):
+        template = 'Hi {RecipientName},\n{Blank}\n{Url} {Url} {Unknown}\n{Blank}'
+
+        self.assertEqual(Templating().format_template(template, self.data),
+                         'Hi Recipient,\nhttps://www.globaleaks.org/ https://www.globaleaks.org/ {Unknown}')
+
+    def test_format_template_resolves_values_once(self):
+        # the value of a keyword is not subject to further replacements
+        self.assertEqual(Templating().format_template('{NodeName}', self.data), 'Node {NodeName}')
+
+
+class TestQuestionnaireAnswers(helpers.TestGL):
+    def get_data(self):
+        fields = [
+            {'id': 'f1', 'label': 'Checkbox', 'type': 'checkbox', 'x': 0, 'y': 0, 'template_id': '',
+             'options': [{'id': 'o1', 'label': 'A'}, {'id': 'o2', 'label': 'B'}, {'id': 'o3', 'label': 'C'}]},
+            {'id': 'f2', 'label': 'Selectbox', 'type': 'selectbox', 'x': 0, 'y': 1, 'template_id': '',
+             'options': [{'id': 'o4', 'label': 'D'}, {'id': 'o5', 'label': 'E'}]}
+        ]
+
+        answers = {
+            'f1': [{'o1': True, 'o2': False, 'o3': True}],
+            'f2': [{'value': 'o5'}]
+        }
+
+        return {
+            'type': 'export_template',
+            'node': {'name': '', 'hostname': '', 'onionservice': ''},
+            'notification': {},
+            'user': {'name': 'Recipient', 'language': 'en'},
+            'context': {'name': 'Context'},
+            'tip': {'id': 'tip', 'questionnaires': [{'hash': 'hash',
+                                                     'steps': [{'label': 'Step', 'presentation_order': 0, 'children': fields}],
+                                                     'answers': answers}]}
+        }
+
+    def test_dump_questionnaire_answers(self):
+        self.assertEqual(Templating().format_template('{QuestionnaireAnswers}', self.get_data()),
+                         'Step\n  Checkbox\n    A\n    C\n\n  Selectbox\n    E')
+
+    def test_dump_questionnaire_answers_cache(self):
+        data = self.get_data()
+        data['answers_cache'] = {}
+
+        ret = Templating().format_template('{QuestionnaireAnswers}', data)
+
+        self.assertEqual(list(data['answers_cache'].keys()), [('tip', 'hash', 'en')])
+
+        data['answers_cache'][('tip', 'hash', 'en')] = 'cached'
+        self.assertEqual(Templating().format_template('{QuestionnaireAnswers}', data), 'cached')
+        self.assertNotEqual(ret, 'cached')
+
+
+class TestAnomalyTemplate(helpers.TestGLWithPopulatedDB):
+    @inlineCallbacks
+    def test_admin_anomaly_mail_template(self):
+        data = {
+            'type': 'admin_anomaly',
+            'node': (yield tw(admin.node.db_admin_serialize_node, 1, u'en')),
+            'notification': (yield tw(admin.notification.db_get_notification, 1, u'en')),
+            'user': (yield user.get_user(1, self.dummyAdminUser['id'], u'en')),
+            'alert': {
+                'alarm_levels': {'activity': 1, 'disk_space': 2},
+                'measured_freespace': 2000000,
+                'measured_totalspace': 3000000000,
+                'event_matrix': {'submission': 42}
+            }
+        }
+
+        _, body = Templating().get_mail_subject_and_body(data)
+
+        self.assertIn('2MB of 3GB available diskspace used.', body)
+        self.assertIn('submission               42', body)
+        self.assertNotIn('{', body)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+
+from globaleaks.settings import Settings
+from globaleaks.tests import helpers
+from globaleaks.utils.securetempfile import SecureTemporaryFile
+from globaleaks.utils.tempupload import TempUploadRegistry
+
+
+class TestTempUploadRegistry(helpers.TestGL):
+    def test_registry(self):
+        registry = TempUploadRegistry(timeout=3600)
+
+        files = []
+        for i in range(10):
+            f = SecureTemporaryFile(Settings.tmp_path)
+            with f.open('w') as fd:
+                fd.write(b'x' * 100)
+            registry.set('flow-%d' % i, f)
+            files.append(f)
+
+        self.assertEqual(len(registry), 10)
+        self.assertEqual(registry.get_size(), 1000)
+        self.assertTrue('flow-3' in registry)
+
+        self.assertIs(registry.pop_by_name(os.path.basename(files[3].filepath)), files[3])
+        self.assertFalse('flow-3' in registry)
+        self.assertIsNone(registry.pop_by_name(os.path.basename(files[3].filepath)))
+        self.assertEqual(len(registry), 9)
+
+    def test_expiration(self):
+        registry = TempUploadRegistry(timeout=300)
+
+        for i in range(5):
+            registry.set('flow-%d' % i, SecureTemporaryFile(Settings.tmp_path))
+            self.test_reactor.advance(50)
+
+        # Accessing a file postpones its expiration
+        registry['flow-0']
+
+        self.test_reactor.advance(120)
+        self.assertEqual(set(registry.files), {'flow-0', 'flow-2', 'flow-3', 'flow-4'})
+
+        self.test_reactor.advance(600)
+        self.assertEqual(len(registry), 0)
+        self.assertIsNone(registry.sweepCall)
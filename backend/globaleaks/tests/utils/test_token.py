@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
 
+from datetime import timedelta
+
+from globaleaks import event
 from globaleaks.jobs import anomalies
 from globaleaks.tests import helpers
+from globaleaks.utils.crypto import sha256
+from globaleaks.utils.token import Token, TokenList
 from twisted.internet.defer import inlineCallbacks
 
 
@@ -78,3 +83,24 @@ class TestToken(helpers.TestGL):
         self.test_reactor.advance(self.state.tokens.get_timeout()+1)
 
         self.assertTrue(len(self.state.tokens) == 0)
+
+    def test_proof_of_work_difficulty(self):
+        self.state.tenant_state[1].RecentEventQ[:] = []
+        self.assertEqual(self.state.tokens.new(1, 'submission').difficulty, Token.min_difficulty)
+
+        for _ in range(4 * TokenList.difficulty_rate_threshold):
+            self.state.tenant_state[1].RecentEventQ.append(event.Event({'name': 'created_tokens'}, timedelta(0)))
+
+        token = self.state.tokens.new(1, 'submission')
+        self.assertEqual(token.difficulty, Token.min_difficulty + 3)
+        self.assertEqual(token.serialize()['difficulty'], Token.min_difficulty + 3)
+
+        # the answer valid for the minimum difficulty is not sufficient anymore
+        token.question = "7GJ4Sl37AEnP10Zk9p7q"
+        self.assertFalse(token.update(26))
+
+        answer = 0
+        while not token.update(answer):
+            answer += 1
+
+        self.assertTrue(int(sha256(("%s%d" % (token.question, answer)).encode()), 16) % (1 << token.difficulty) == 0)
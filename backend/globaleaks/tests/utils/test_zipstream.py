@@ -6,6 +6,7 @@ from twisted.internet.defer import inlineCallbacks
 from zipfile import ZipFile
 
 from globaleaks.tests import helpers
+from globaleaks.utils import zipstream
 from globaleaks.utils.zipstream import ZipStream
 
 
@@ -39,3 +40,42 @@ class TestZipStream(helpers.TestGL):
                     self.assertTrue(ff.file_size == len(self.unicode_seq.encode()))
                 else:
                     self.assertTrue(ff.file_size == os.stat(os.path.abspath(__file__)).st_size)
+
+    def test_zipstream_compression_policy(self):
+        text = b'GlobaLeaks' * 10000
+
+        files = [
+          {'name': 'text.txt', 'fo': BytesIO(text)},
+          {'name': 'random.bin', 'fo': BytesIO(os.urandom(100000))},
+          {'name': 'image.jpg', 'fo': BytesIO(text)}
+        ]
+
+        output = BytesIO()
+
+        for data in ZipStream(files):
+            output.write(data)
+
+        with ZipFile(output, 'r') as f:
+            self.assertIsNone(f.testzip())
+
+            infolist = {x.filename: x for x in f.infolist()}
+            self.assertEqual(infolist['text.txt'].compress_type, zipstream.ZIP_DEFLATED)
+            self.assertEqual(infolist['random.bin'].compress_type, zipstream.ZIP_STORED)
+            self.assertEqual(infolist['image.jpg'].compress_type, zipstream.ZIP_STORED)
+            self.assertEqual(f.read('image.jpg'), text)
+
+    def test_zipstream_zip64(self):
+        self.patch(zipstream, 'ZIP64_LIMIT', 1000)
+
+        contents = [os.urandom(1500) for _ in range(3)]
+        files = [{'name': 'file-%d.bin' % i, 'fo': BytesIO(x), 'size': len(x)} for i, x in enumerate(contents)]
+
+        output = BytesIO()
+
+        for data in ZipStream(files):
+            output.write(data)
+
+        with ZipFile(output, 'r') as f:
+            self.assertIsNone(f.testzip())
+            for i, x in enumerate(contents):
+                self.assertEqual(f.read('file-%d.bin' % i), x)
@@ -34,19 +34,68 @@ def parse_csv_ip_ranges_to_ip_networks(ip_str):
         return []
 
 
+class IPNetworkSet(object):
+    """
+    Set of IP networks compiled in a binary prefix trie for each IP version
+
+    The check of an address is performed in O(prefix length)
+    independently of the number of networks in the set.
+    """
+    def __init__(self, ip_networks=()):
+        self.tries = {4: {}, 6: {}}
+
+        for ip_network in ip_networks:
+            self.add(ip_network)
+
+    def add(self, ip_network):
+        node = self.tries[ip_network.version]
+        bits = int(ip_network.network_address) >> (ip_network.max_prefixlen - ip_network.prefixlen)
+
+        for i in range(ip_network.prefixlen - 1, -1, -1):
+            if None in node:
+                # The network is already included in a shorter prefix
+                return
+
+            node = node.setdefault((bits >> i) & 1, {})
+
+        # A terminal node includes all the longer prefixes
+        node.clear()
+        node[None] = True
+
+    def __contains__(self, ip_address):
+        node = self.tries[ip_address.version]
+        value = int(ip_address)
+
+        for i in range(ip_address.max_prefixlen - 1, -1, -1):
+            if None in node:
+                return True
+
+            node = node.get((value >> i) & 1)
+            if node is None:
+                return False
+
+        return None in node
+
+
+def compile_ip_filter(ip_str):
+    """Compile a list of IP addresses and/or CIDRs into an IPNetworkSet"""
+    return IPNetworkSet(parse_csv_ip_ranges_to_ip_networks(ip_str))
+
+
 def check_ip(client_ip, ip_filter):
+    """
+    Check if an IP address is included in an IP filter
+
+    :param client_ip: the IP address to be checked
+    :param ip_filter: a list of IP addresses and/or CIDRs or its compiled IPNetworkSet
+    """
     try:
-        ip_networks = parse_csv_ip_ranges_to_ip_networks(ip_filter)
+        if not isinstance(ip_filter, IPNetworkSet):
+            ip_filter = compile_ip_filter(ip_filter)
 
         if isinstance(client_ip, bytes):
             client_ip = client_ip.decode()
 
-        client_ip_obj = ipaddress.ip_address(client_ip)
-
-        for ip_network in ip_networks:
-            if client_ip_obj in ip_network:
-                return True
+        return ipaddress.ip_address(client_ip) in ip_filter
     except:
         return False
-
-    return False
@@ -1,8 +1,11 @@
 # -*- coding: utf-8
+import atexit
 import codecs
 import logging
 import os
+import re
 import sys
+import threading
 import traceback
 from datetime import datetime
 
@@ -11,6 +14,10 @@ from twisted.python import util, failure
 from twisted.web.http import _escape
 
 
+# Printable ASCII characters excluding the backslash
+_no_escapes_regexp = re.compile(r'[\x20-\x5b\x5d-\x7e]*\Z')
+
+
 def timedelta_to_milliseconds(t):
     return (t.microseconds + (t.seconds + t.days * 24 * 3600) * 10**6) / 10**3.0
 
@@ -20,6 +27,10 @@ def log_remove_escapes(s):
     This function removes escape sequence from log strings
     """
     if isinstance(s, str):
+        if _no_escapes_regexp.match(s):
+            # Fast path for the common case of strings not needing any escape
+            return s
+
         return codecs.encode(s, 'unicode_escape').decode()
     else:
         try:
@@ -32,14 +43,130 @@ def log_remove_escapes(s):
             return string
 
 
-def openLogFile(logfile, max_file_size, rotated_log_files):
+class BufferedLogFile(object):
+    """
+    File-like object buffering the writes in memory and writing them to
+    the wrapped file from a background thread in order to not block the
+    reactor on the disk.
+
+    The buffer is flushed when it reaches flush_size bytes or after
+    flush_interval seconds; when it reaches max_size bytes the new lines
+    are dropped or the writer is blocked until the buffer is flushed,
+    depending on the policy ('drop' or 'block').
+
+    The background thread is started on the first write and restarted
+    in the child process after a fork, as happens when twistd daemonizes
+    after the log file has been opened, as threads do not survive forking.
+    """
+    def __init__(self, fo, flush_size=64 * 1024, flush_interval=1, max_size=4 * 1024 * 1024, policy='drop'):
+        self.fo = fo
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.policy = policy
+
+        self.lines = []
+        self.size = 0
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = None
+        self.pid = None
+
+        atexit.register(self.close)
+
+    def start(self):
+        if self.pid == os.getpid():
+            return
+
+        # The lock could have been held by a thread of the parent process
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+
+        self.thread = threading.Thread(target=self._run, name='BufferedLogFile')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write(self, data):
+        self.start()
+
+        with self.condition:
+            while self.size + len(data) > self.max_size and not self.closed:
+                if self.policy == 'drop':
+                    self.dropped += 1
+                    return
+
+                self.condition.notify_all()
+                self.condition.wait()
+
+            if self.closed:
+                return
+
+            self.lines.append(data)
+            self.size += len(data)
+
+            if self.size >= self.flush_size:
+                self.condition.notify_all()
+
+    def flush(self):
+        """
+        The buffer is flushed by the background thread; to be used
+        when the file is wrapped by components expecting a file object
+        """
+        pass
+
+    def close(self):
+        self.start()
+
+        with self.condition:
+            if self.closed:
+                return
+
+            self.closed = True
+            self.condition.notify_all()
+
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.size < self.flush_size and not self.closed:
+                    self.condition.wait(self.flush_interval)
+
+                lines, self.lines, self.size = self.lines, [], 0
+                closed = self.closed
+                dropped, self.dropped = self.dropped, 0
+
+                # Wake up the writers blocked waiting for space in the buffer
+                self.condition.notify_all()
+
+            try:
+                # The lines are written one by one so that the wrapped file
+                # is able to perform its rotation on the lines boundaries
+                for line in lines:
+                    self.fo.write(line)
+
+                if dropped:
+                    self.fo.write('[E] Log buffer full: %d log lines dropped\n' % dropped)
+
+                self.fo.flush()
+            except Exception:
+                pass
+
+            if closed:
+                self.fo.close()
+                return
+
+
+def openLogFile(logfile, max_file_size, rotated_log_files, buffer_policy='drop'):
     name = os.path.basename(logfile)
     directory = os.path.dirname(logfile)
 
-    return txlogfile.LogFile(name,
-                             directory,
-                             rotateLength=max_file_size,
-                             maxRotatedFiles=rotated_log_files)
+    return BufferedLogFile(txlogfile.LogFile(name,
+                                             directory,
+                                             rotateLength=max_file_size,
+                                             maxRotatedFiles=rotated_log_files),
+                           policy=buffer_policy)
 
 
 def logFormatter(timestamp, request):
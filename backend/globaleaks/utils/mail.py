@@ -1,5 +1,8 @@
 # -*- coding: utf-8
 # GlobaLeaks Utility used to handle Mail, format, exception, etc
+import time
+
+from collections import deque
 from io import BytesIO
 
 from email import utils  # pylint: disable=no-name-in-module
@@ -9,9 +12,11 @@ from email.mime.text import MIMEText
 
 from twisted.internet import reactor, defer
 from twisted.internet.endpoints import TCP4ClientEndpoint
-from twisted.mail.smtp import ESMTPSenderFactory
+from twisted.internet.protocol import connectionDone
+from twisted.mail.smtp import ESMTPSender, ESMTPSenderFactory, SMTPClient, SMTPDeliveryError, SUCCESS
 from twisted.protocols import tls
 
+from globaleaks.utils.crypto import sha256
 from globaleaks.utils.socks import SOCKS5ClientEndpoint
 from globaleaks.utils.tls import TLSClientContextFactory
 from globaleaks.utils.log import log
@@ -38,6 +43,228 @@ def MIME_mail_build(src_name, src_mail, dest_name, dest_mail, title, mail_body):
     return BytesIO(multipart_as_bytes)  # pylint: disable=no-member
 
 
+class PooledESMTPSender(ESMTPSender):
+    """
+    ESMTP client sending in a single session the messages queued on its relay
+    """
+    message = None
+    error = None
+
+    def getMailFrom(self):
+        self.message = self.factory.relay.get_message()
+        if self.message is None:
+            return None
+
+        return self.message['from_address']
+
+    def getMailTo(self):
+        return [self.message['to_address'].encode()]
+
+    def getMailData(self):
+        return self.message['data']
+
+    def sentMail(self, code, resp, numOk, addresses, log):
+        message, self.message = self.message, None
+        if code in SUCCESS:
+            self.factory.relay.message_sent(message)
+        else:
+            self.factory.relay.message_failed(message, SMTPDeliveryError(code, resp, log.str(), addresses))
+
+    def sendError(self, exc):
+        self.error = exc
+
+        message, self.message = self.message, None
+        if message is not None:
+            self.factory.relay.message_failed(message, exc)
+
+        SMTPClient.sendError(self, exc)
+
+    def connectionLost(self, reason=connectionDone):
+        ESMTPSender.connectionLost(self, reason)
+
+        message, self.message = self.message, None
+        if message is not None:
+            self.error = reason.value
+            self.factory.relay.message_failed(message, reason.value)
+
+        self.factory.relay.connection_closed(self.error)
+
+
+class PooledESMTPSenderFactory(ESMTPSenderFactory):
+    protocol = PooledESMTPSender
+
+    def __init__(self, relay, username, password, **kwargs):
+        # The envelope sender is provided by each of the messages
+        ESMTPSenderFactory.__init__(self, username, password, None, [], None, defer.Deferred(), **kwargs)
+        self.relay = relay
+
+        # Size of the log of the SMTP session reported on errors
+        self.nEmails = 4
+
+
+class SMTPRelay(object):
+    """
+    Queue of the messages to be sent through an SMTP server
+
+    The messages are sent over a bounded number of parallel connections
+    each sending in the same authenticated session all the messages queued;
+    the configuration of the connections is fixed when the relay is created
+    """
+    max_connections = 4
+    timeout = 30
+
+    def __init__(self, config):
+        self.queue = deque()
+        self.config = dict(config)
+        self.connections = 0
+        self.busy_since = None
+
+        self.sent = 0
+        self.failed = 0
+        self.opened_connections = 0
+        self.failed_connections = 0
+        self.busy_time = 0
+
+    def send(self, message):
+        self.queue.append(message)
+
+        if self.connections < min(self.max_connections, len(self.queue)):
+            self.open_connection()
+
+    def get_message(self):
+        if self.queue:
+            return self.queue.popleft()
+
+    def message_sent(self, message):
+        self.sent += 1
+        message['deferred'].callback(True)
+
+    def message_failed(self, message, excep):
+        self.failed += 1
+        log.err("SMTP connection failed (Exception: %s)", excep, tid=message['tid'])
+        message['deferred'].callback(False)
+
+    def open_connection(self):
+        config = self.config
+
+        if self.connections == 0:
+            self.busy_since = time.time()
+
+        self.connections += 1
+        self.opened_connections += 1
+
+        context_factory = TLSClientContextFactory()
+
+        factory = PooledESMTPSenderFactory(
+            self,
+            config['username'].encode() if config['authentication'] else None,
+            config['password'].encode() if config['authentication'] else None,
+            contextFactory=context_factory,
+            requireAuthentication=config['authentication'],
+            requireTransportSecurity=(config['security'] == 'TLS'),
+            retries=0,
+            timeout=self.timeout)
+
+        if config['security'] == "SSL":
+            factory = tls.TLSMemoryBIOFactory(context_factory, True, factory)
+
+        if config['anonymize']:
+            socksProxy = TCP4ClientEndpoint(reactor, config['socks_host'], config['socks_port'], timeout=self.timeout)
+            endpoint = SOCKS5ClientEndpoint(config['smtp_host'], config['smtp_port'], socksProxy)
+        else:
+            endpoint = TCP4ClientEndpoint(reactor, config['smtp_host'], config['smtp_port'], timeout=self.timeout)
+
+        endpoint.connect(factory).addErrback(self.connection_failed)
+
+    def connection_failed(self, failure):
+        self.failed_connections += 1
+        self.connection_closed(failure.value)
+
+    def connection_closed(self, excep=None):
+        self.connections -= 1
+
+        if self.connections == 0:
+            self.busy_time += time.time() - self.busy_since
+
+        if not self.queue:
+            return
+
+        if excep is None:
+            self.open_connection()
+        elif self.connections == 0:
+            # No connection succeeded in sending the queued messages
+            while self.queue:
+                self.message_failed(self.queue.popleft(), excep)
+
+    def get_stats(self):
+        busy_time = self.busy_time
+        if self.connections:
+            busy_time += time.time() - self.busy_since
+
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'pending': len(self.queue),
+            'connections': self.connections,
+            'opened_connections': self.opened_connections,
+            'failed_connections': self.failed_connections,
+            'throughput': self.sent / busy_time if busy_time else 0
+        }
+
+
+class SMTPPool(object):
+    """
+    Pool of the SMTP relays indexed by all the settings of their connections
+
+    The relays are shared only by the senders using the same server, the same
+    credentials and the same routing so that a message is never sent over a
+    connection configured by another tenant.
+    """
+    def __init__(self):
+        self.relays = {}
+
+    def get_relay(self, config):
+        authentication = config['authentication']
+
+        key = (config['smtp_host'],
+               config['smtp_port'],
+               config['security'],
+               config['username'] if authentication else None,
+               sha256(config['password']) if authentication else None,
+               config['anonymize'],
+               config['socks_host'] if config['anonymize'] else None,
+               config['socks_port'] if config['anonymize'] else None)
+
+        if key not in self.relays:
+            self.relays[key] = SMTPRelay(config)
+
+        return self.relays[key]
+
+    def get_stats(self):
+        """
+        Return the stats of the relays summed by server, security and routing
+
+        The credentials are not included in the names of the relays as
+        these are exported as labels of the metrics.
+        """
+        ret = {}
+        for key, relay in self.relays.items():
+            name = '%s:%d [%s]' % key[:3]
+            if key[5]:
+                name += ' via %s:%d' % key[6:]
+
+            stats = relay.get_stats()
+            if name in ret:
+                stats = {k: v + ret[name][k] for k, v in stats.items()}
+
+            ret[name] = stats
+
+        return ret
+
+
+smtp_pool = SMTPPool()
+
+
 def sendmail(tid, smtp_host, smtp_port, security, authentication, username, password, from_name, from_address, to_address, subject, body, anonymize=True, socks_host='127.0.0.1', socks_port=9050):
     """
     Send an email using SMTPS/SMTP+TLS and maybe torify the connection.
@@ -62,8 +289,6 @@ def sendmail(tid, smtp_host, smtp_port, security, authentication, username, pass
              :param socks_port:
     """
     try:
-        timeout = 30
-
         message = MIME_mail_build(from_name,
                                   from_address,
                                   to_address,
@@ -78,52 +303,30 @@ def sendmail(tid, smtp_host, smtp_port, security, authentication, username, pass
                   security,
                   tid=tid)
 
-        context_factory = TLSClientContextFactory()
-
-        smtp_deferred = defer.Deferred()
-
-        factory = ESMTPSenderFactory(
-            username.encode() if authentication else None,
-            password.encode() if authentication else None,
-            from_address,
-            to_address,
-            message,
-            smtp_deferred,
-            contextFactory=context_factory,
-            requireAuthentication=authentication,
-            requireTransportSecurity=(security == 'TLS'),
-            retries=0,
-            timeout=timeout)
-
-        if security == "SSL":
-            factory = tls.TLSMemoryBIOFactory(context_factory, True, factory)
-
-        if anonymize:
-            socksProxy = TCP4ClientEndpoint(reactor, socks_host, socks_port, timeout=timeout)
-            endpoint = SOCKS5ClientEndpoint(smtp_host, smtp_port, socksProxy)
-        else:
-            endpoint = TCP4ClientEndpoint(reactor, smtp_host, smtp_port, timeout=timeout)
-
-        conn_deferred = endpoint.connect(factory)
-
-        final = defer.DeferredList([conn_deferred, smtp_deferred], fireOnOneErrback=True, consumeErrors=True)
+        config = {
+            'smtp_host': smtp_host,
+            'smtp_port': smtp_port,
+            'security': security,
+            'authentication': authentication,
+            'username': username,
+            'password': password,
+            'anonymize': anonymize,
+            'socks_host': socks_host,
+            'socks_port': socks_port
+        }
 
-        def failure_cb(failure):
-            """
-            @param failure {Failure {twisted.internet.FirstError {Failure}}}
-            """
-            log.err("SMTP connection failed (Exception: %s)",
-                    failure.value.subFailure.value, tid=tid)
-            log.debug(failure)
-            return False
+        result = defer.Deferred()
 
-        def success_cb(results):
-            """
-            @param results {list of (success, return_val) tuples}
-            """
-            return True
+        relay = smtp_pool.get_relay(config)
+        relay.send({
+            'tid': tid,
+            'from_address': from_address,
+            'to_address': to_address,
+            'data': message,
+            'deferred': result
+        })
 
-        return final.addCallbacks(success_cb, failure_cb)
+        return result
 
     except Exception as excep:
         # avoids raising an exception inside email logic to avoid chained errors
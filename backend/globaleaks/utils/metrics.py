@@ -0,0 +1,187 @@
+# -*- coding: utf-8
+# Implementation of the runtime metrics exported in the Prometheus text format
+import threading
+
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_sample(name, labels, value):
+    value = repr(value) if isinstance(value, float) else str(value)
+
+    if labels:
+        labels = ','.join('%s="%s"' % (k, escape_label_value(v)) for k, v in labels)
+        return '%s{%s} %s' % (name, labels, value)
+
+    return '%s %s' % (name, value)
+
+
+class Histogram(object):
+    """
+    A cumulative histogram with fixed buckets
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels=()):
+        labels = tuple(labels)
+        ret = []
+        count = 0
+        for bound, n in zip(self.buckets, self.counts):
+            count += n
+            ret.append((name + '_bucket', labels + (('le', repr(float(bound))),), count))
+
+        ret.append((name + '_bucket', labels + (('le', '+Inf'),), self.count))
+        ret.append((name + '_sum', labels, self.sum))
+        ret.append((name + '_count', labels, self.count))
+
+        return ret
+
+
+class MetricFamily(object):
+    def __init__(self, name, type, description):
+        self.name = name
+        self.type = type
+        self.description = description
+        self.samples = []
+
+    def add(self, labels, value):
+        self.samples.append((self.name, tuple(labels), value))
+
+    def add_histogram(self, labels, histogram):
+        self.samples.extend(histogram.samples(self.name, labels))
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.description),
+                 '# TYPE %s %s' % (self.name, self.type)]
+
+        for name, labels, value in self.samples:
+            lines.append(format_sample(name, labels, value))
+
+        return '\n'.join(lines)
+
+
+def render_metrics(families):
+    return '\n'.join(family.render() for family in families) + '\n'
+
+
+class Metrics(object):
+    """
+    Registry of the counters fed by the request and transaction paths
+
+    The transaction counters are updated by the threads of the ORM pool
+    and are thus protected by a lock.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.request_latency = {}
+        self.requests = {}
+        self.jobs_duration = {}
+        self.transaction_wait = Histogram()
+        self.transaction_duration = Histogram()
+        self.transactions = 0
+        self.transaction_retries = 0
+        self.transaction_failures = 0
+        self.secure_deletion_queue = 0
+        self.secure_deleted_files = 0
+        self.secure_deleted_bytes = 0
+
+    def observe_request(self, route, method, code, duration):
+        if route not in self.request_latency:
+            self.request_latency[route] = Histogram()
+
+        self.request_latency[route].observe(duration)
+
+        key = (route, method, code)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def observe_transaction(self, wait, duration, retries, success):
+        with self.lock:
+            self.transaction_wait.observe(wait)
+            self.transaction_duration.observe(duration)
+            self.transactions += 1
+            self.transaction_retries += retries
+            if not success:
+                self.transaction_failures += 1
+
+    def observe_job(self, name, duration):
+        if name not in self.jobs_duration:
+            self.jobs_duration[name] = Histogram()
+
+        self.jobs_duration[name].observe(duration)
+
+    def observe_secure_deletion(self, queue, files, size):
+        self.secure_deletion_queue = queue
+        self.secure_deleted_files += files
+        self.secure_deleted_bytes += size
+
+    def get_families(self):
+        latency = MetricFamily('globaleaks_http_request_duration_seconds', 'histogram',
+                               'Latency of the HTTP requests by route')
+        for route, histogram in sorted(self.request_latency.items()):
+            latency.add_histogram((('route', route),), histogram)
+
+        requests = MetricFamily('globaleaks_http_requests_total', 'counter',
+                                'Number of HTTP requests by route, method and status')
+        for (route, method, code), count in sorted(self.requests.items()):
+            requests.add((('route', route), ('method', method), ('status', code)), count)
+
+        jobs = MetricFamily('globaleaks_job_duration_seconds', 'histogram',
+                            'Duration of the executions of the scheduled jobs')
+        for name, histogram in sorted(self.jobs_duration.items()):
+            jobs.add_histogram((('job', name),), histogram)
+
+        queue = MetricFamily('globaleaks_secure_deletion_queue_depth', 'gauge',
+                             'Number of files waiting for secure deletion')
+        queue.add((), self.secure_deletion_queue)
+
+        deleted_files = MetricFamily('globaleaks_secure_deleted_files_total', 'counter',
+                                     'Number of files securely deleted')
+        deleted_files.add((), self.secure_deleted_files)
+
+        deleted_bytes = MetricFamily('globaleaks_secure_deleted_bytes_total', 'counter',
+                                     'Number of bytes of the files securely deleted')
+        deleted_bytes.add((), self.secure_deleted_bytes)
+
+        with self.lock:
+            wait = MetricFamily('globaleaks_orm_transaction_wait_seconds', 'histogram',
+                                'Time spent by the transactions waiting for a thread of the ORM pool')
+            wait.add_histogram((), self.transaction_wait)
+
+            duration = MetricFamily('globaleaks_orm_transaction_duration_seconds', 'histogram',
+                                    'Duration of the transactions including retries')
+            duration.add_histogram((), self.transaction_duration)
+
+            transactions = MetricFamily('globaleaks_orm_transactions_total', 'counter',
+                                        'Number of transactions executed')
+            transactions.add((), self.transactions)
+
+            retries = MetricFamily('globaleaks_orm_transaction_retries_total', 'counter',
+                                   'Number of transaction retries due to a locked database')
+            retries.add((), self.transaction_retries)
+
+            failures = MetricFamily('globaleaks_orm_transaction_failures_total', 'counter',
+                                    'Number of transactions terminated with an error')
+            failures.add((), self.transaction_failures)
+
+        return [latency, requests, jobs, queue, deleted_files, deleted_bytes,
+                wait, duration, transactions, retries, failures]
+
+
+metrics = Metrics()
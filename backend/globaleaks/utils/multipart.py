@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Incremental parser for multipart/form-data request bodies
+#
+# The parser is fed with the body while it is received and notifies the
+# beginning, the content and the end of each part so that the content can
+# be processed without buffering the whole body in memory.
+import re
+
+_param_regexp = re.compile(br';\s*([^\s=;]+)\s*=\s*(?:"((?:[^"\\]|\\.)*)"|([^\s;]*))')
+
+
+class MultipartError(Exception):
+    pass
+
+
+def parse_boundary(content_type):
+    """
+    Return the boundary of a multipart/form-data content type or None
+    """
+    if not content_type.lower().startswith(b'multipart/form-data'):
+        return None
+
+    return parse_header_params(content_type).get(b'boundary')
+
+
+def parse_header_params(value):
+    """
+    Return the parameters of a header value in the form: value; k1=v1; k2="v2"
+    """
+    params = {}
+
+    for k, quoted, unquoted in _param_regexp.findall(value):
+        params[k.lower()] = quoted.replace(b'\\"', b'"') if quoted else unquoted
+
+    return params
+
+
+class MultipartParser(object):
+    max_headers_size = 8192
+
+    def __init__(self, boundary, on_part_begin, on_part_data, on_part_end):
+        """
+        :param boundary: the boundary of the multipart body
+        :param on_part_begin: callback invoked with the dict of the headers of a part
+        :param on_part_data: callback invoked with each chunk of the content of a part
+        :param on_part_end: callback invoked at the end of the content of a part
+        """
+        self.delimiter = b'--' + boundary
+        self.body_delimiter = b'\r\n' + self.delimiter
+        self.on_part_begin = on_part_begin
+        self.on_part_data = on_part_data
+        self.on_part_end = on_part_end
+        self.buffer = b''
+        self.state = 'preamble'
+
+    def feed(self, data):
+        self.buffer += data
+
+        while self.buffer and self.state != 'end':
+            if not getattr(self, 'parse_' + self.state)():
+                break
+
+    def parse_preamble(self):
+        idx = self.buffer.find(self.delimiter)
+        if idx == -1:
+            self.buffer = self.buffer[-len(self.delimiter):]
+            return False
+
+        self.buffer = self.buffer[idx + len(self.delimiter):]
+        self.state = 'delimiter'
+        return True
+
+    def parse_delimiter(self):
+        if len(self.buffer) < 2:
+            return False
+
+        if self.buffer.startswith(b'--'):
+            self.buffer = b''
+            self.state = 'end'
+        elif self.buffer.startswith(b'\r\n'):
+            self.buffer = self.buffer[2:]
+            self.state = 'headers'
+        else:
+            raise MultipartError("Invalid multipart delimiter")
+
+        return True
+
+    def parse_headers(self):
+        idx = self.buffer.find(b'\r\n\r\n')
+        if idx == -1:
+            if len(self.buffer) > self.max_headers_size:
+                raise MultipartError("Multipart headers too long")
+
+            return False
+
+        headers = {}
+        for line in self.buffer[:idx].split(b'\r\n'):
+            if b':' not in line:
+                raise MultipartError("Invalid multipart header")
+
+            k, v = line.split(b':', 1)
+            headers[k.strip().lower()] = v.strip()
+
+        self.buffer = self.buffer[idx + 4:]
+        self.state = 'body'
+        self.on_part_begin(headers)
+        return True
+
+    def parse_body(self):
+        idx = self.buffer.find(self.body_delimiter)
+        if idx == -1:
+            # The tail of the buffer is kept as it could be the
+            # beginning of a delimiter split across two chunks
+            keep = len(self.body_delimiter) - 1
+            if len(self.buffer) > keep:
+                self.on_part_data(self.buffer[:-keep])
+                self.buffer = self.buffer[-keep:]
+
+            return False
+
+        if idx:
+            self.on_part_data(self.buffer[:idx])
+
+        self.buffer = self.buffer[idx + len(self.body_delimiter):]
+        self.state = 'delimiter'
+        self.on_part_end()
+        return True
+
+    def is_complete(self):
+        return self.state == 'end'
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Streaming producers used to feed the twisted transports with content
+# generated (read, decrypted, compressed) in worker threads
+from collections import deque
+
+from twisted.internet import abstract
+from twisted.internet.defer import Deferred
+from twisted.internet.threads import deferToThread
+
+
+class ThreadedProducer(object):
+    """
+    Push producer that invokes a blocking read function in a worker thread
+    and feeds the consumer with the data produced.
+
+    Chunks are produced ahead of the consumer into a bounded buffer so that
+    the transport is never starved, while the pause/resume notifications
+    of the transport stop the production when the client is slow.
+
+    The read function is never invoked concurrently and the production ends
+    as soon as the function returns an empty value.
+    """
+    read_ahead = 4
+
+    def __init__(self, consumer, read):
+        self.consumer = consumer
+        self.read = read
+        self.buffer = deque()
+        self.finish = Deferred()
+        self.reading = False
+        self.paused = False
+        self.stopped = False
+        self.eof = False
+        self.error = None
+
+    def start(self):
+        self.consumer.registerProducer(self, True)
+        self.produce()
+        return self.finish
+
+    def produce(self):
+        if self.reading or self.eof or self.stopped or len(self.buffer) >= self.read_ahead:
+            return
+
+        self.reading = True
+        deferToThread(self.read).addCallbacks(self.on_data, self.on_error)
+
+    def on_data(self, data):
+        self.reading = False
+
+        if data:
+            self.buffer.append(data)
+        else:
+            self.eof = True
+
+        self.feed()
+
+    def on_error(self, failure):
+        self.reading = False
+        self.error = failure
+        self.stopped = True
+        self.feed()
+
+    def feed(self):
+        if self.finish.called:
+            return
+
+        if self.stopped:
+            # the conclusion is delayed until the pending read is concluded
+            # in order to not let the caller release resources still in use
+            if not self.reading:
+                self.conclude()
+
+            return
+
+        while self.buffer and not self.paused:
+            self.consumer.write(self.buffer.popleft())
+
+        if self.eof and not self.buffer:
+            self.stopped = True
+            self.conclude()
+            return
+
+        self.produce()
+
+    def conclude(self):
+        self.buffer.clear()
+        self.consumer.unregisterProducer()
+
+        if self.error is not None:
+            self.finish.errback(self.error)
+        else:
+            self.finish.callback(None)
+
+    def pauseProducing(self):
+        self.paused = True
+
+    def resumeProducing(self):
+        self.paused = False
+        self.feed()
+
+    def stopProducing(self):
+        if self.stopped:
+            return
+
+        self.error = Exception("Consumer asked us to stop producing")
+        self.stopped = True
+        self.feed()
+
+
+class ThreadedFileProducer(ThreadedProducer):
+    """
+    Streaming producer reading a file-like object in a worker thread.
+
+    Used for files whose read operation is expensive as in the case of files
+    that need to be decrypted on the fly.
+    """
+    def __init__(self, consumer, fo, chunk_size=abstract.FileDescriptor.bufferSize):
+        ThreadedProducer.__init__(self, consumer, lambda: fo.read(chunk_size))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8
+# Implementation of an in-memory token bucket rate limiter
+import time
+
+from collections import OrderedDict
+
+
+class TokenBucket(object):
+    """
+    A bucket of capacity `burst` refilled at `rate` tokens per second
+    """
+    __slots__ = ['tokens', 'last']
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.last = now
+
+    def consume(self, rate, burst, now):
+        """
+        Consume a token returning 0 on success or the number of seconds
+        to be waited before a token becomes available
+        """
+        self.tokens = min(burst, self.tokens + (now - self.last) * rate)
+        self.last = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter(object):
+    """
+    Rate limiter keeping a token bucket for each tenant, client and budget
+
+    The budgets are expressed as (rate per second, burst); the buckets
+    are kept in LRU order and the least recently used are evicted when
+    the limit of max_buckets is reached so that both the checks and the
+    memory used are bounded.
+
+    The requests of the Tor clients are instead limited by a bucket
+    shared by all the Tor clients of the tenant with the tenant_budgets.
+    """
+    budgets = {
+        'auth': (10 / 60.0, 10),
+        'token': (30 / 60.0, 30),
+        'upload': (2, 60),
+        'api': (20, 200)
+    }
+
+    tenant_budgets = {
+        'auth': (100 / 60.0, 100),
+        'token': (300 / 60.0, 300),
+        'upload': (20, 600),
+        'api': (200, 2000)
+    }
+
+    max_buckets = 100000
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.buckets = OrderedDict()
+        self.rejected = 0
+
+    def check(self, tid, client, budget, using_tor=False):
+        """
+        Consume a token for the specified request returning 0 if the
+        request is allowed or the seconds after which it should be retried
+        """
+        # All the users connected via Tor share the same client address (the
+        # local one for the onion services or the one of the exit node) and
+        # the ephemeral onion services do not expose the circuit of the
+        # connections; a per address budget would let a single client lock
+        # out all the others and thus the Tor clients are limited as a whole
+        # by a larger budget of the tenant
+        if using_tor:
+            rate, burst = self.tenant_budgets[budget]
+            key = (tid, budget)
+        else:
+            rate, burst = self.budgets[budget]
+            key = (tid, client, budget)
+
+        now = self.clock()
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.buckets.popitem(last=False)
+
+            bucket = self.buckets[key] = TokenBucket(burst, now)
+        else:
+            self.buckets.move_to_end(key)
+
+        wait = bucket.consume(rate, burst, now)
+        if wait:
+            self.rejected += 1
+
+        return wait
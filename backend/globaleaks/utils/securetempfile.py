@@ -11,6 +11,7 @@ crypto_backend = default_backend()
 
 class SecureTemporaryFile(object):
     file = None
+    fd = None
 
     def __init__(self, filesdir):
         """
@@ -43,6 +44,24 @@ class SecureTemporaryFile(object):
     def finalize_write(self):
         self.fd.write(self.enc.finalize())
 
+    def size(self):
+        return os.path.getsize(self.filepath)
+
+    def truncate(self, size):
+        """
+        Truncate the file to the specified size in order to discard
+        the content of a write that could not be completed.
+
+        The cipher is reinitialized at the counter of the new end of file
+        """
+        block, offset = divmod(size, 16)
+        counter = (int.from_bytes(self.key_counter_nonce, 'big') + block) % (1 << 128)
+        cipher = Cipher(algorithms.AES(self.key), modes.CTR(counter.to_bytes(16, 'big')), backend=crypto_backend)
+
+        self.fd.truncate(size)
+        self.enc = cipher.encryptor()
+        self.enc.update(b'\0' * offset)
+
     def read(self, c=None):
         if c is None:
             data = self.fd.read()
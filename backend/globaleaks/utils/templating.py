@@ -3,9 +3,10 @@
 # This filte contains routines dealing with texts templates and variables replacement used
 # mainly in mail notifications.
 import collections
-import copy
+import re
 
 from datetime import timedelta
+from functools import lru_cache
 
 from globaleaks import __version__
 from globaleaks.rest import errors
@@ -227,19 +228,33 @@ class TipKeyword(UserNodeKeyword, ContextKeyword):
     keyword_list = UserNodeKeyword.keyword_list + ContextKeyword.keyword_list + tip_keywords
     data_keys =  UserNodeKeyword.data_keys + ContextKeyword.data_keys + ['tip']
 
+    def __init__(self, data):
+        super(TipKeyword, self).__init__(data)
+        self.options_maps = {}
+
+    def get_options_map(self, field):
+        """
+        Return the map option id -> option label of a field
+        """
+        if field['id'] not in self.options_maps:
+            self.options_maps[field['id']] = {option.get('id', ''): option['label'] for option in field['options']}
+
+        return self.options_maps[field['id']]
+
     def dump_field_entry(self, output, field, entry, indent_n):
 
         field_type = field['type']
 
         if field_type == 'checkbox':
+            options = self.get_options_map(field)
             for k, v in entry.items():
-                for option in field['options']:
-                    if k == option.get('id', '') and v == True:
-                        output += indent(indent_n) + option['label'] + '\n'
+                if k in options and v == True:
+                    output += indent(indent_n) + options[k] + '\n'
         elif field_type in ['selectbox']:
-            for option in field['options']:
-                if entry.get('value', '') == option['id']:
-                    output += indent(indent_n) + option['label'] + '\n'
+            options = self.get_options_map(field)
+            value = entry.get('value', '')
+            if value in options:
+                output += indent(indent_n) + options[value] + '\n'
         elif field_type == 'date':
             date = entry.get('value')
             if date is not None:
@@ -302,9 +317,10 @@ class TipKeyword(UserNodeKeyword, ContextKeyword):
     def dump_messages(self, messages):
         ret = ''
         for message in messages:
-            data = copy.deepcopy(self.data)
+            # the rendering does not alter the data and thus a shallow copy is sufficient
+            data = dict(self.data)
             data['type'] = 'export_message'
-            data['message'] = copy.deepcopy(message)
+            data['message'] = message
             template = 'export_message_whistleblower' if (message['type'] == 'whistleblower') else 'export_message_recipient'
             ret += indent_text('-' * 40) + '\n'
             ret += indent_text(str(Templating().format_template(self.data['notification'][template], data))) + '\n\n'
@@ -349,7 +365,24 @@ class TipKeyword(UserNodeKeyword, ContextKeyword):
         return self.EventTime()
 
     def QuestionnaireAnswers(self):
-        return self.dump_questionnaire_answers(self.data['tip']['questionnaires'][0]['steps'], self.data['tip']['questionnaires'][0]['answers'])
+        questionnaire = self.data['tip']['questionnaires'][0]
+
+        # The notification job provides a cache shared by the mails generated
+        # during the same run so that the answers of a tip are dumped only once
+        # for each of the languages of the recipients
+        cache = self.data.get('answers_cache')
+        if cache is None:
+            return self.dump_questionnaire_answers(questionnaire['steps'], questionnaire['answers'])
+
+        # the serialization of a rtip carries the id of the receivertip and
+        # thus the cache is keyed by the id of the internaltip
+        tip_id = self.data['tip'].get('internaltip_id', self.data['tip']['id'])
+
+        key = (tip_id, questionnaire.get('hash'), self.data['user']['language'])
+        if key not in cache:
+            cache[key] = self.dump_questionnaire_answers(questionnaire['steps'], questionnaire['answers'])
+
+        return cache[key]
 
     def Comments(self):
         comments = self.data.get('comments', [])
@@ -462,16 +495,18 @@ class AnomalyKeyword(UserNodeKeyword):
             return u''
 
         if self.data['alert']['alarm_levels']['disk_space'] == 1:
-            return self.data['notification']['admin_anomaly_disk_low']
+            template = 'admin_anomaly_disk_low'
         else:
-            return self.data['notification']['admin_anomaly_disk_high']
+            template = 'admin_anomaly_disk_high'
+
+        return Templating().format_template(self.data['notification'][template], self.data)
 
     def AnomalyDetailActivities(self):
         # This happens all the time there is not anomalous traffic
         if self.data['alert']['alarm_levels']['activity'] == 0:
             return u''
 
-        return self.data['notification']['admin_anomaly_activities']
+        return Templating().format_template(self.data['notification']['admin_anomaly_activities'], self.data)
 
     def ActivityAlarmLevel(self):
         return '%s' % self.data['alert']['alarm_levels']['activity']
@@ -706,33 +741,54 @@ supported_template_types = {
 }
 
 
+keyword_regexp = re.compile(r'(\{[A-Za-z0-9]+\})')
+
+
+@lru_cache(maxsize=1024)
+def compile_template(raw_template):
+    """
+    Split a template in a tuple alternating literal text and keywords
+
+    The compiled templates are cached by their text so that a template
+    changed by an admin is simply compiled again on its first use.
+    """
+    return tuple(keyword_regexp.split(raw_template))
+
+
+@lru_cache(maxsize=None)
+def get_keyword_set(keyword_class):
+    return frozenset(keyword_class.keyword_list)
+
+
 class Templating(object):
     def format_template(self, raw_template, data):
-        keyword_converter = supported_template_types[data['type']](data)
-        for _ in range(3):
-            count = 0
+        keyword_class = supported_template_types[data['type']]
+        keyword_converter = keyword_class(data)
+        keywords = get_keyword_set(keyword_class)
 
-            for kw in keyword_converter.keyword_list:
-                if raw_template.count(kw):
-                    # if %SomeKeyword% matches, call keyword_converter.SomeKeyword function
-                    variable_content = getattr(keyword_converter, kw[1:-1])()
-                    raw_template = raw_template.replace(kw, variable_content)
+        tokens = compile_template(raw_template)
+        values = {}
+        output = list(tokens)
 
-                    count += 1
+        # the odd tokens are the keywords; each of them is resolved only once
+        for i in range(1, len(tokens), 2):
+            kw = tokens[i]
+            if kw in keywords:
+                if kw not in values:
+                    # if {SomeKeyword} matches, call keyword_converter.SomeKeyword function
+                    values[kw] = getattr(keyword_converter, kw[1:-1])()
 
-            # remove lines with only {Blank}
-            raw_template = raw_template.replace('\n{Blank}\n', '\n')
+                output[i] = values[kw]
 
-            # remove remaining $Blank% tokens
-            raw_template = raw_template.replace('\n{Blank}', '')
+        raw_template = ''.join(output)
 
-            raw_template = raw_template.rstrip()
+        # remove lines with only {Blank}
+        raw_template = raw_template.replace('\n{Blank}\n', '\n')
 
-            if count == 0:
-                # finally!
-                break
+        # remove remaining {Blank} tokens
+        raw_template = raw_template.replace('\n{Blank}', '')
 
-        return raw_template
+        return raw_template.rstrip()
 
     def get_mail_subject_and_body(self, data):
         subject_template = ''
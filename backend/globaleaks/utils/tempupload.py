@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import os
+
+from collections import OrderedDict
+
+from twisted.internet import reactor as _reactor
+
+
+# needed in order to allow UT override
+reactor = _reactor
+
+
+class TempUploadRegistry(object):
+    """
+    Registry of the temporary files of the pending uploads
+
+    The files are indexed both by the flow identifier of the upload and
+    by the name of the file on disk, and are expired in batch by a single
+    periodic sweep instead of keeping a timer for each file.
+    """
+    sweep_interval = 60
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.files = OrderedDict()
+        self.names = {}
+        self.expirations = {}
+        self.sweepCall = None
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, key):
+        return key in self.files
+
+    def __getitem__(self, key):
+        self.touch(key)
+        return self.files[key]
+
+    def set(self, key, item):
+        if key in self.files:
+            self.pop(key)
+
+        self.files[key] = item
+        self.names[os.path.basename(item.filepath)] = key
+        self.touch(key)
+
+        if self.sweepCall is None:
+            self.sweepCall = reactor.callLater(self.sweep_interval, self.sweep)
+
+    def touch(self, key):
+        self.files.move_to_end(key)
+        self.expirations[key] = reactor.seconds() + self.timeout
+
+    def pop(self, key):
+        item = self.files.pop(key)
+        del self.expirations[key]
+        del self.names[os.path.basename(item.filepath)]
+        return item
+
+    def pop_by_name(self, filename):
+        """
+        Remove and return the file with the specified name on disk
+        """
+        key = self.names.get(filename)
+        if key is not None:
+            return self.pop(key)
+
+    def sweep(self):
+        """
+        Expire the files not accessed for longer than the timeout
+
+        The files are kept sorted by last access so that the sweep
+        stops at the first file not yet expired.
+        """
+        self.sweepCall = None
+
+        now = reactor.seconds()
+        for key in list(self.files):
+            if self.expirations[key] > now:
+                break
+
+            self.pop(key)
+
+        if self.files:
+            self.sweepCall = reactor.callLater(self.sweep_interval, self.sweep)
+
+    def get_size(self):
+        """
+        Return the total size in bytes of the files of the pending uploads
+        """
+        size = 0
+        for item in self.files.values():
+            try:
+                size += os.path.getsize(item.filepath)
+            except OSError:
+                pass
+
+        return size
@@ -12,7 +12,13 @@ class Token(object):
     min_ttl = 1
     max_ttl = 3600
 
-    def __init__(self, tokenlist, tid, type='submission'):
+    # The difficulty is the number of trailing zero bits required to the
+    # hash of the answer; each additional bit doubles the expected work
+    # of the client while the verification is always a single hash
+    min_difficulty = 8
+    max_difficulty = 16
+
+    def __init__(self, tokenlist, tid, type='submission', difficulty=min_difficulty):
         self.tokenlist = tokenlist
         self.tid = tid
         self.id = generateRandomKey(42)
@@ -23,6 +29,7 @@ class Token(object):
 
         self.solved = False
         self.question = generateRandomKey(20)
+        self.difficulty = difficulty
 
     def timedelta_check(self):
         now = datetime_now()
@@ -37,7 +44,7 @@ class Token(object):
     def validate(self, answer):
         resolved = "%s%d" % (self.question, answer)
         x = sha256(resolved.encode())
-        self.solved = x.endswith(b'00')
+        self.solved = int(x, 16) & ((1 << self.difficulty) - 1) == 0
 
     def update(self, answer):
         self.validate(answer)
@@ -70,11 +77,15 @@ class Token(object):
             'creation_date': datetime_to_ISO8601(self.creation_date),
             'type': self.type,
             'question': self.question,
+            'difficulty': self.difficulty,
             'solved': self.solved
         }
 
 
 class TokenList(TempDict):
+    # Number of tokens created in a minute above which the difficulty is increased
+    difficulty_rate_threshold = 30
+
     def __init__(self, state, file_path, *args, **kwds):
         self.state = state
         self.file_path = file_path
@@ -103,7 +114,43 @@ class TokenList(TempDict):
 
         return ret
 
+    def get_creation_rate(self, tid):
+        """
+        Return the number of tokens created for the tenant in the last minute
+        as tracked by the events of the anomaly detection
+        """
+        tenant_state = self.state.tenant_state.get(tid)
+        if tenant_state is None:
+            return 0
+
+        count = 0
+        threshold = datetime_now() - timedelta(seconds=60)
+
+        # events are appended in chronological order
+        for event in reversed(tenant_state.RecentEventQ):
+            if event.creation_date < threshold:
+                break
+
+            if event.event_type == 'created_tokens':
+                count += 1
+
+        return count
+
+    def get_difficulty(self, tid):
+        """
+        Return the difficulty of the proof of work increasing it by one bit
+        each time the token creation rate doubles over the threshold
+        """
+        rate = self.get_creation_rate(tid)
+
+        difficulty = Token.min_difficulty
+        while rate >= self.difficulty_rate_threshold and difficulty < Token.max_difficulty:
+            difficulty += 1
+            rate //= 2
+
+        return difficulty
+
     def new(self, tid, type='submission'):
-        token = Token(self, tid, type)
+        token = Token(self, tid, type, self.get_difficulty(tid))
         self.set(token.id, token)
         return token
@@ -7,16 +7,40 @@
 # that is initially derived from zipfile.py and then changed heavily for
 # our purpose (that's the reason why is not in third party)
 import binascii
+import math
 import os
 import struct
 import time
 import zlib
 
+from collections import Counter
+
 __all__ = ["ZipStream"]
 
 ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+ZIP_STORED = 0
 ZIP_DEFLATED = 8
 
+CHUNK_SIZE = 64 * 1024
+
+# Formats that are already compressed (or encrypted) and that are thus
+# archived without compression in order to not waste CPU time in deflate
+INCOMPRESSIBLE_EXTENSIONS = {
+    '.7z', '.aac', '.avi', '.bz2', '.docx', '.flac', '.gif', '.gpg', '.gz',
+    '.heic', '.jpeg', '.jpg', '.m4a', '.m4v', '.mkv', '.mov', '.mp3', '.mp4',
+    '.odp', '.ods', '.odt', '.oga', '.ogg', '.ogv', '.pdf', '.pgp', '.png',
+    '.pptx', '.rar', '.tgz', '.webm', '.webp', '.xlsx', '.xz', '.zip'
+}
+
+# Size of the sample of the file content used to estimate its entropy
+ENTROPY_PROBE_SIZE = 4096
+
+# Estimated entropy (bits per byte) above which a content is considered
+# not compressible; plain text is typically between 4 and 5 bits per byte
+# while compressed or encrypted content is close to the maximum of 8
+ENTROPY_THRESHOLD = 7.5
+
 # Here are some struct module formats for reading headers
 structEndArchive = b"<4s4H2lH"     # 9 items, end of archive, 22 bytes
 stringEndArchive = b"PK\005\006"   # magic number for end of archive record
@@ -32,6 +56,34 @@ stringEndArchive64 = b"PK\x06\x06"  # magic token for Zip64 header
 stringDataDescriptor = b"PK\x07\x08"  # magic number for data descriptor
 
 
+def entropy(data):
+    """
+    Return the Shannon entropy (bits per byte) of the given data
+    """
+    if not data:
+        return 0
+
+    length = len(data)
+
+    return -sum(c / length * math.log(c / length, 2) for c in Counter(data).values())
+
+
+def get_compression_type(filename, probe=b''):
+    """
+    Return the compression type to be used for a file
+
+    :param filename: the name of the file
+    :param probe: the initial content of the file used to estimate its entropy
+    """
+    if os.path.splitext(filename)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+        return ZIP_STORED
+
+    if entropy(probe[:ENTROPY_PROBE_SIZE]) > ENTROPY_THRESHOLD:
+        return ZIP_STORED
+
+    return ZIP_DEFLATED
+
+
 class ZipInfo(object):
     """Class with attributes describing each file in the ZIP archive."""
 
@@ -83,6 +135,10 @@ class ZipInfo(object):
         self.compress_size = 0
         self.file_size = 0
 
+        # Set when the file is expected to exceed the ZIP64 limits;
+        # in such case the ZIP64 extension is declared in the file header
+        self.zip64 = False
+
     def _encodeFilenameFlags(self):
         if isinstance(self.filename, str):
             try:
@@ -93,7 +149,7 @@ class ZipInfo(object):
             return self.filename, self.flag_bits
 
     def DataDescriptor(self):
-        if self.compress_size > ZIP64_LIMIT or self.file_size > ZIP64_LIMIT:
+        if self.zip64 or self.compress_size > ZIP64_LIMIT or self.file_size > ZIP64_LIMIT:
             fmt = "<4sLQQ"
         else:
             fmt = "<4sLLL"
@@ -115,7 +171,7 @@ class ZipInfo(object):
 
         extra = self.extra
 
-        if file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT:
+        if self.zip64 or file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT:
             # File is larger than what fits into a 4 byte integer,
             # fall back to the ZIP64 extension
             fmt = b'<hhqq'
@@ -158,11 +214,18 @@ class ZipStream(object):
         self.data_ptr += len(data)
         return data
 
-    def zipinfo_open(self, arcname):
-        zinfo = ZipInfo(arcname, self.time, ZIP_DEFLATED)
+    def zipinfo_open(self, arcname, compression=ZIP_DEFLATED, size=None):
+        zinfo = ZipInfo(arcname, self.time, compression)
         zinfo.header_offset = self.data_ptr
 
-        cmpr = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        # The final size is not known in advance and so the ZIP64 extension
+        # is declared for all the files that may exceed the limits
+        zinfo.zip64 = size is not None and size * 1.05 > ZIP64_LIMIT
+
+        if compression == ZIP_DEFLATED:
+            cmpr = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        else:
+            cmpr = None
 
         header = zinfo.FileHeader()
 
@@ -176,7 +239,9 @@ class ZipStream(object):
         zinfo.file_size += len(chunk)
         zinfo.CRC = binascii.crc32(chunk, zinfo.CRC) & 0xffffffff
 
-        chunk = cmpr.compress(chunk)
+        if cmpr is not None:
+            chunk = cmpr.compress(chunk)
+
         zinfo.compress_size += len(chunk)
 
         self.update_data_ptr(chunk)
@@ -184,7 +249,7 @@ class ZipStream(object):
         return chunk
 
     def zipinfo_close(self, zinfo, cmpr):
-        buf = cmpr.flush()
+        buf = cmpr.flush() if cmpr is not None else b''
         zinfo.compress_size += len(buf)
         self.update_data_ptr(buf)
 
@@ -193,23 +258,23 @@ class ZipStream(object):
 
         return buf + trailer
 
-    def zip_fo(self, fo, arcname):
-        zipinfo, cmpr, header = self.zipinfo_open(arcname)
+    def zip_fo(self, fo, arcname, size=None):
+        with fo:
+            # The first chunk is used as probe to select the compression type
+            buf = fo.read(CHUNK_SIZE)
 
-        yield header
+            zipinfo, cmpr, header = self.zipinfo_open(arcname, get_compression_type(arcname, buf), size)
 
-        with fo:
-            while True:
-                buf = fo.read(8 * 1024)
-                if not buf:
-                    break
+            yield header
 
+            while buf:
                 yield self.zipinfo_update(zipinfo, cmpr, buf)
+                buf = fo.read(CHUNK_SIZE)
 
         yield self.zipinfo_close(zipinfo, cmpr)
 
     def zip_file(self, filepath, arcname):
-        return self.zip_fo(open(filepath, "rb"), arcname)
+        return self.zip_fo(open(filepath, "rb"), arcname, os.path.getsize(filepath))
 
     def archive_footer(self):
         """
@@ -278,7 +343,7 @@ class ZipStream(object):
 
         pos2 = self.data_ptr
         # Write end-of-zip-archive record
-        if pos1 > ZIP64_LIMIT:
+        if pos1 > ZIP64_LIMIT or pos2 - pos1 > ZIP64_LIMIT or count >= ZIP_FILECOUNT_LIMIT:
             # Need to write the ZIP64 end-of-archive records
             zip64endrec = struct.pack(structEndArchive64, stringEndArchive64,
                                       44, 45, 45, 0, 0, count, count, pos2 - pos1, pos1)
@@ -288,8 +353,11 @@ class ZipStream(object):
                                       stringEndArchive64Locator, 0, pos2, 1)
             data.append(self.update_data_ptr(zip64locrec))
 
+            count = min(count, ZIP_FILECOUNT_LIMIT)
+            centdir_size = pos2 - pos1 if pos2 - pos1 <= ZIP64_LIMIT else -1
+
             endrec = struct.pack(structEndArchive, stringEndArchive,
-                                 0, 0, count, count, pos2 - pos1, -1, 0)
+                                 0, 0, count, count, centdir_size, -1, 0)
             data.append(self.update_data_ptr(endrec))
 
         else:
@@ -302,7 +370,7 @@ class ZipStream(object):
     def __iter__(self):
         for f in self.files:
             if 'fo' in f:
-                for data in self.zip_fo(f['fo'], f['name']):
+                for data in self.zip_fo(f['fo'], f['name'], f.get('size')):
                     yield data
 
             elif 'path' in f:
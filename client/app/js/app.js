@@ -657,10 +657,10 @@ var GLClient = angular.module("GLClient", [
             elem = document.createElement("link");
             elem.setAttribute("id", "load-favicon");
             elem.setAttribute("rel", "shortcut icon");
-            elem.setAttribute("href", "data:image/png;base64," + $rootScope.public.node.favicon);
+            elem.setAttribute("href", $rootScope.public.node.favicon);
             document.getElementsByTagName("head")[0].appendChild(elem);
           } else {
-            elem.setAttribute("href", "data:image/png;base64," + $rootScope.public.node.favicon);
+            elem.setAttribute("href", $rootScope.public.node.favicon);
           }
         }
 
@@ -31,10 +31,26 @@ angular.module("GLCrypto", [])
     }
   };
 
+  // checks that the hash ends with the number of zero bits required by the difficulty
+  var checkDifficulty = function(hash, difficulty) {
+    for (var i = hash.length - 1; difficulty > 0; i--, difficulty -= 8) {
+      var mask = difficulty >= 8 ? 0xff : (1 << difficulty) - 1;
+      if ((hash[i] & mask) !== 0) {
+        return false;
+      }
+    }
+
+    return true;
+  };
+
   return {
-    proofOfWork: function(str) {
+    proofOfWork: function(str, difficulty) {
       var deferred = $q.defer();
 
+      if (typeof difficulty === "undefined") {
+        difficulty = 8;
+      }
+
       var i = 0;
 
       var work = function() {
@@ -44,7 +60,7 @@ angular.module("GLCrypto", [])
 
         var xxx = function (hash) {
           hash = new Uint8Array(hash);
-          if (hash[31] === 0) {
+          if (checkDifficulty(hash, difficulty)) {
             deferred.resolve(i);
           } else {
             i += 1;
@@ -26,6 +26,7 @@ filter("expirationDate", function() {
 filter("anomalyToString", function() {
   return function (anomaly) {
     var anomalies = {
+      "created_tokens": "Created tokens",
       "started_submissions": "Started submissions",
       "completed_submissions": "Completed submissions",
       "failed_submissions": "Failed submissions",
@@ -931,12 +931,12 @@ factory("AdminUtils", ["AdminContextResource", "AdminQuestionnaireResource", "Ad
         return Math.random() * 1000000 + 1000000;
       },
 
-      imgDataUri: function(data) {
-        if (data === "") {
-          data = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8Xw8AAoMBgDTD2qgAAAAASUVORK5CYII=";
+      imgUrl: function(url) {
+        if (!url) {
+          url = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8Xw8AAoMBgDTD2qgAAAAASUVORK5CYII=";
         }
 
-        return "data:image/png;base64," + data;
+        return url;
       },
 
       isWhistleblowerPage: function() {